@@ -0,0 +1,3 @@
+"""
+Benchmarks da API de Vitivinicultura da Embrapa.
+"""
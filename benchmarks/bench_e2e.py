@@ -0,0 +1,326 @@
+"""
+Benchmark ponta a ponta da API contra um mock local da Embrapa.
+
+Uso:
+    python -m benchmarks.bench_e2e [--latencia 0.2] [--concorrencia 8] [--requisicoes 300]
+                                   [--cenarios cold,warm,filtered,projected]
+                                   [--comparar benchmarks/resultados/e2e_<data>.json]
+                                   [--cassetes data/cassetes]
+
+Sobe o mock (benchmarks/mock_embrapa.py) e a aplicação com uvicorn na
+máquina local e dispara requisições concorrentes em cada cenário:
+
+- cold: cache e CSVs locais apagados; a primeira requisição de cada endpoint baixa e processa o CSV
+- warm: datasets completos de todos os endpoints, com o cache quente
+- filtered: filtros por query string e seleção por nível/pai
+- projected: respostas estreitas (séries, cortes de ano, totais, consulta cruzada)
+
+Para cada cenário, reporta vazão, percentis de latência, erros e memória
+residente do processo (que inclui a API, o mock e o cliente). Com
+--cassetes, o mock não é iniciado: os downloads são reproduzidos das
+respostas gravadas com UPSTREAM_CASSETTE_MODE=record (ver
+src/utils/cassette.py), com a mesma latência e jitter. Os resultados
+são gravados em JSON; com --comparar, as diferenças em relação a uma
+execução anterior são listadas e o código de saída é 1 se houver regressão
+acima da tolerância.
+"""
+import os
+
+# Antes de importar a aplicação: sem agendador e com logs discretos
+os.environ.setdefault("REFRESH_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import argparse
+import json
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import requests
+import uvicorn
+
+from benchmarks.mock_embrapa import MockEmbrapa
+
+CATEGORIAS_MODULO = {
+    "producao": ["producao"],
+    "processamento": ["viniferas", "americanas", "mesa"],
+    "importacao": ["vinho", "espumante", "frescas", "passas", "suco"],
+    "exportacao": ["vinho", "espumante", "frescas", "suco"],
+}
+
+# Caminhos completos, um por categoria (ver o prefixo duplicado em src/api/endpoints/__init__.py)
+COMPLETOS = [
+    f"/api/v1/{modulo}/{modulo}/{tipo}" for modulo, tipos in CATEGORIAS_MODULO.items() for tipo in tipos
+] + ["/api/v1/comercializacao/comercializacao/"]
+
+FILTRADOS = [
+    "/api/v1/producao/producao/producao?q=produto=Tinto",
+    "/api/v1/producao/producao/producao?pai=VINHO DE MESA",
+    "/api/v1/producao/producao/producao?nivel=1",
+    "/api/v1/comercializacao/comercializacao/?nivel=2",
+    "/api/v1/importacao/importacao/vinho?q=País=Argentina",
+    "/api/v1/exportacao/exportacao/vinho?q=País=Portugal",
+    "/api/v1/processamento/processamento/viniferas?q=cultivar=Tinta 001",
+]
+
+PROJETADOS = [
+    "/api/v1/producao/producao/series",
+    "/api/v1/producao/producao/series?entidade=Tinto",
+    "/api/v1/exportacao/vinho/series?ano=2019&medida=valor",
+    "/api/v1/importacao/vinho/series?entidade=Argentina&ano_inicio=2000",
+    "/api/v1/producao/producao/producao/totais",
+    "/api/v1/comercializacao/comercializacao/totais",
+    "/api/v1/consulta?series=exportacao_vinho,producao&operacao=razao",
+]
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return float("nan")
+
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    if not ordenados:
+        return float("nan")
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Ambiente:
+    """
+    Mock da Embrapa, diretório de dados temporário e servidor uvicorn em thread.
+    """
+
+    def __init__(self, latencia: float, jitter: float, cassetes: Optional[str] = None):
+        self.mock = None if cassetes else MockEmbrapa(latencia, jitter).start()
+        self.data_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+
+        from src.main import app
+        from src.api.endpoints.health import warmup
+        from src.utils.csv_downloader import csv_downloader
+        from src.utils.upstream import upstream
+        from src.utils.cassette import Cassette
+
+        self.warmup = warmup
+        self.downloader = csv_downloader
+        self.upstream = upstream
+        if cassetes:
+            # As URLs da Embrapa são mantidas: as respostas vêm das gravações
+            upstream.cassete = Cassette(cassetes, "replay", latencia, jitter)
+        else:
+            # O downloader compartilhado passa a baixar do mock
+            csv_downloader.DOWNLOAD_URLS = self.mock.urls_download()
+        # Os CSVs baixados vão para o diretório temporário
+        csv_downloader.data_dir = self.data_dir
+        csv_downloader._ensure_directories()
+
+        self.porta = _porta_livre()
+        self.base = f"http://127.0.0.1:{self.porta}"
+        self.servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.porta, log_level="warning"))
+        self._thread = threading.Thread(target=self.servidor.run, name="uvicorn", daemon=True)
+
+    def __enter__(self) -> "Ambiente":
+        self._thread.start()
+        while not self.servidor.started:
+            time.sleep(0.05)
+        # Aguarda o aquecimento da aplicação para começar de um estado conhecido
+        while self.warmup.fase != "concluido":
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.servidor.should_exit = True
+        self._thread.join(timeout=10)
+        if self.mock:
+            self.mock.stop()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def esfriar(self):
+        """
+        Apaga o cache em memória e os CSVs locais: a próxima requisição baixa do mock.
+        """
+        self.downloader._cache.clear()
+        self.downloader._despejadas.clear()
+        for categoria in self.downloader.DOWNLOAD_URLS:
+            pasta = os.path.join(self.data_dir, categoria)
+            for arquivo in os.listdir(pasta):
+                os.remove(os.path.join(pasta, arquivo))
+
+
+def executar(base: str, caminhos: List[str], total: int, concorrencia: int) -> Dict[str, Any]:
+    """
+    Dispara `total` requisições (em rodízio pelos caminhos) com `concorrencia` threads.
+    """
+    local = threading.local()
+
+    def requisitar(caminho: str):
+        if not hasattr(local, "sessao"):
+            local.sessao = requests.Session()
+        inicio = time.perf_counter()
+        try:
+            resposta = local.sessao.get(base + caminho, timeout=120)
+            corpo = len(resposta.content)
+            ok = resposta.status_code == 200
+        except requests.RequestException:
+            corpo, ok = 0, False
+        return time.perf_counter() - inicio, ok, corpo
+
+    rss_antes = _rss_mb()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(requisitar, (caminhos[i % len(caminhos)] for i in range(total))))
+    duracao = time.perf_counter() - inicio
+
+    latencias = sorted(r[0] * 1000 for r in resultados)
+    return {
+        "requisicoes": total,
+        "erros": sum(1 for r in resultados if not r[1]),
+        "vazao_rps": round(total / duracao, 1),
+        "p50_ms": round(_percentil(latencias, 50), 2),
+        "p90_ms": round(_percentil(latencias, 90), 2),
+        "p99_ms": round(_percentil(latencias, 99), 2),
+        "max_ms": round(latencias[-1], 2),
+        "bytes_medio": int(sum(r[2] for r in resultados) / total),
+        "rss_mb": round(_rss_mb(), 1),
+        "rss_delta_mb": round(_rss_mb() - rss_antes, 1),
+    }
+
+
+def cenario_cold(ambiente: Ambiente, args) -> Dict[str, Any]:
+    rodadas = []
+    for _ in range(args.rodadas_cold):
+        ambiente.esfriar()
+        rodadas.append(executar(ambiente.base, COMPLETOS, len(COMPLETOS), args.concorrencia))
+    # Agrega as rodadas: médias dos percentis, soma de requisições e erros
+    agregado = {chave: round(sum(r[chave] for r in rodadas) / len(rodadas), 2) for chave in rodadas[0]}
+    agregado["requisicoes"] = sum(r["requisicoes"] for r in rodadas)
+    agregado["erros"] = sum(r["erros"] for r in rodadas)
+    agregado["rss_mb"] = rodadas[-1]["rss_mb"]
+    return agregado
+
+
+def cenario_warm(ambiente: Ambiente, args) -> Dict[str, Any]:
+    executar(ambiente.base, COMPLETOS, len(COMPLETOS), args.concorrencia)  # garante o cache quente
+    return executar(ambiente.base, COMPLETOS, args.requisicoes, args.concorrencia)
+
+
+def cenario_filtered(ambiente: Ambiente, args) -> Dict[str, Any]:
+    return executar(ambiente.base, FILTRADOS, args.requisicoes, args.concorrencia)
+
+
+def cenario_projected(ambiente: Ambiente, args) -> Dict[str, Any]:
+    return executar(ambiente.base, PROJETADOS, args.requisicoes, args.concorrencia)
+
+
+CENARIOS = {
+    "cold": cenario_cold,
+    "warm": cenario_warm,
+    "filtered": cenario_filtered,
+    "projected": cenario_projected,
+}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def comparar(atual: Dict[str, Any], anterior: Dict[str, Any], tolerancia: float) -> bool:
+    """
+    Imprime as diferenças entre duas execuções.
+
+    Returns:
+        True se algum cenário piorou além da tolerância (p99 maior ou vazão menor)
+    """
+    regressao = False
+    print(f"\nComparação com {anterior.get('commit') or '?'} ({anterior.get('data')}):")
+    print(f"{'cenário':<11}{'métrica':<12}{'anterior':>12}{'atual':>12}{'variação':>11}")
+    for nome, resultado in atual["cenarios"].items():
+        antes = anterior.get("cenarios", {}).get(nome)
+        if not antes:
+            continue
+        for metrica, pior_se_maior in (("p50_ms", True), ("p99_ms", True), ("vazao_rps", False), ("rss_mb", True)):
+            if not antes.get(metrica):
+                continue
+            variacao = (resultado[metrica] - antes[metrica]) / antes[metrica]
+            piorou = variacao > tolerancia if pior_se_maior else variacao < -tolerancia
+            marca = "  REGRESSÃO" if piorou and metrica in ("p99_ms", "vazao_rps") else ""
+            regressao = regressao or bool(marca)
+            print(f"{nome:<11}{metrica:<12}{antes[metrica]:>12}{resultado[metrica]:>12}{variacao:>+10.1%}{marca}")
+    return regressao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latencia", type=float, default=0.2, help="Latência do mock da Embrapa (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Jitter da latência do mock (s)")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--requisicoes", type=int, default=300, help="Requisições por cenário (exceto cold)")
+    parser.add_argument("--rodadas-cold", type=int, default=3)
+    parser.add_argument("--cenarios", default=",".join(CENARIOS))
+    parser.add_argument("--saida", default=os.path.join(os.path.dirname(__file__), "resultados"))
+    parser.add_argument("--comparar", help="Arquivo JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Variação aceita antes de apontar regressão")
+    parser.add_argument("--cassetes", help="Reproduz as respostas gravadas neste diretório em vez de subir o mock")
+    args = parser.parse_args()
+
+    nomes = [nome.strip() for nome in args.cenarios.split(",") if nome.strip()]
+    desconhecidos = [nome for nome in nomes if nome not in CENARIOS]
+    if desconhecidos:
+        parser.error(f"Cenários desconhecidos: {', '.join(desconhecidos)}")
+    if args.cassetes and not os.path.isdir(args.cassetes):
+        parser.error(f"Diretório de cassetes não encontrado: {args.cassetes}")
+
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar")},
+        "cenarios": {},
+    }
+    with Ambiente(args.latencia, args.jitter, args.cassetes) as ambiente:
+        print(f"{'cenário':<11}{'req':>6}{'erros':>7}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'RSS MB':>9}")
+        for nome in nomes:
+            r = CENARIOS[nome](ambiente, args)
+            resultado["cenarios"][nome] = r
+            print(f"{nome:<11}{r['requisicoes']:>6}{r['erros']:>7}{r['vazao_rps']:>9}{r['p50_ms']:>9}"
+                  f"{r['p90_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}{r['rss_mb']:>9}")
+        if ambiente.mock:
+            resultado["mock_requisicoes"] = ambiente.mock.requisicoes
+        else:
+            resultado["upstream_requisicoes"] = ambiente.upstream.metrics()["requisicoes"]
+    resultado["pico_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"e2e_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {caminho}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            if comparar(resultado, json.load(arquivo), args.tolerancia):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Micro-benchmarks das funções críticas da camada de dados, nas 14 categorias.
+
+Uso:
+    python -m benchmarks.bench_hot_paths [--categorias producao,exportacao_vinho]
+                                         [--funcoes filtro_endpoint,parse_table]
+                                         [--comparar benchmarks/resultados/hot_paths_<data>.json]
+
+Funções medidas, sobre os CSVs e páginas sintéticos de `benchmarks.fixtures`:
+
+- load_csv_data: CSVDownloader._load_csv_data (leitura e processamento do CSV)
+- extract_subcategories: CSVDownloader._extract_subcategories
+- get_subcategories: BaseScraper.get_subcategories sobre os registros do CSV
+- filter_data: BaseScraper.filter_data
+- parse_filters: filter_parser.parse_filters
+- filtro_endpoint: laço de filtros dos endpoints (filter_parser.apply_filters)
+- parse_table: _parse_table do scraper do módulo, sobre a página HTML já parseada
+
+Reporta o melhor tempo e a mediana por chamada. Os resultados são gravados
+em JSON; com --comparar, o código de saída é 1 se alguma função ficar mais
+lenta que a execução anterior além da tolerância.
+"""
+import os
+
+# Antes de importar o projeto: os scrapers registram um log INFO por chamada
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fixtures import escrever_fixtures, gerar_html
+from src.scrapers.base_scraper import BaseScraper
+from src.scrapers.comercializacao_scraper import ComercializacaoScraper
+from src.scrapers.exportacao_scraper import ExportacaoScraper
+from src.scrapers.importacao_scraper import ImportacaoScraper
+from src.scrapers.processamento_scraper import ProcessamentoScraper
+from src.scrapers.producao_scraper import ProducaoScraper
+from src.utils.csv_downloader import CSVDownloader
+from src.utils.filter_parser import parse_filters, apply_filters
+from src.utils.long_format import coluna_entidade
+
+SCRAPERS = {
+    "producao": ProducaoScraper,
+    "processamento": ProcessamentoScraper,
+    "comercializacao": ComercializacaoScraper,
+    "importacao": ImportacaoScraper,
+    "exportacao": ExportacaoScraper,
+}
+
+FUNCOES = [
+    "load_csv_data",
+    "extract_subcategories",
+    "get_subcategories",
+    "filter_data",
+    "parse_filters",
+    "filtro_endpoint",
+    "parse_table",
+]
+
+
+def medir(funcao: Callable, repeticoes: int) -> Dict[str, float]:
+    """
+    Mede uma função: calibra o número de chamadas por amostra (~0,2 s) e
+    retorna o melhor tempo e a mediana por chamada, em microssegundos.
+    """
+    timer = timeit.Timer(funcao)
+    numero, _ = timer.autorange()
+    amostras = [t / numero * 1e6 for t in timer.repeat(repeat=repeticoes, number=numero)]
+    return {"melhor_us": round(min(amostras), 2), "mediana_us": round(statistics.median(amostras), 2)}
+
+
+def casos(categoria: str, caminho: str, downloader: CSVDownloader) -> Dict[str, Callable]:
+    """
+    Monta as chamadas medidas para uma categoria, com entradas preparadas fora da medição.
+    """
+    carga = downloader._read_csv_file(caminho)
+    df, data = carga["df"], carga["result"]["data"]
+    coluna = coluna_entidade(df) or df.columns[0]
+    alvo = data[len(data) // 2][coluna]
+    filtros = {coluna: alvo}
+    consulta = f"{coluna}={alvo},id=10,ano=2019"
+    scraper = SCRAPERS[categoria.split("_")[0]]()
+    soup = BeautifulSoup(gerar_html(categoria), "html.parser")
+
+    return {
+        "load_csv_data": lambda: downloader._load_csv_data(caminho, categoria),
+        "extract_subcategories": lambda: downloader._extract_subcategories(df),
+        "get_subcategories": lambda: BaseScraper.get_subcategories(scraper, data),
+        "filter_data": lambda: scraper.filter_data(data, filtros),
+        "parse_filters": lambda: parse_filters(consulta),
+        "filtro_endpoint": lambda: apply_filters(data, filtros),
+        "parse_table": lambda: scraper._parse_table(soup),
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def comparar(atual: Dict, anterior: Dict, tolerancia: float) -> bool:
+    """
+    Lista as funções que mudaram além da tolerância.
+
+    Returns:
+        True se alguma função ficou mais lenta além da tolerância
+    """
+    regressao = False
+    print(f"\nComparação com {anterior.get('commit') or '?'} ({anterior.get('data')}), tolerância {tolerancia:.0%}:")
+    for categoria, funcoes in atual["resultados"].items():
+        for nome, medida in funcoes.items():
+            antes = anterior.get("resultados", {}).get(categoria, {}).get(nome)
+            if not antes:
+                continue
+            variacao = (medida["melhor_us"] - antes["melhor_us"]) / antes["melhor_us"]
+            if abs(variacao) <= tolerancia:
+                continue
+            marca = "REGRESSÃO" if variacao > 0 else "melhora"
+            regressao = regressao or variacao > 0
+            print(f"  {categoria:<26}{nome:<24}{antes['melhor_us']:>12.1f}{medida['melhor_us']:>12.1f}{variacao:>+9.1%}  {marca}")
+    return regressao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--categorias", default=",".join(CSVDownloader.DOWNLOAD_URLS))
+    parser.add_argument("--funcoes", default=",".join(FUNCOES))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default=os.path.join(os.path.dirname(__file__), "resultados"))
+    parser.add_argument("--comparar", help="Arquivo JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.15)
+    args = parser.parse_args()
+
+    categorias: List[str] = [c.strip() for c in args.categorias.split(",") if c.strip()]
+    funcoes: List[str] = [f.strip() for f in args.funcoes.split(",") if f.strip()]
+    invalidas = [c for c in categorias if c not in CSVDownloader.DOWNLOAD_URLS] + [f for f in funcoes if f not in FUNCOES]
+    if invalidas:
+        parser.error(f"Categorias/funções inválidas: {', '.join(invalidas)}")
+
+    diretorio = tempfile.mkdtemp(prefix="bench_hot_paths_")
+    downloader = CSVDownloader(data_dir=diretorio)
+    caminhos = escrever_fixtures(diretorio, categorias)
+
+    resultado = {"data": datetime.now().isoformat(timespec="seconds"), "commit": _commit(), "resultados": {}}
+    print(f"{'categoria':<26}{'função':<24}{'melhor (us)':>12}{'mediana (us)':>14}")
+    for categoria in categorias:
+        chamadas = casos(categoria, caminhos[categoria], downloader)
+        resultado["resultados"][categoria] = {}
+        for nome in funcoes:
+            medida = medir(chamadas[nome], args.repeticoes)
+            resultado["resultados"][categoria][nome] = medida
+            print(f"{categoria:<26}{nome:<24}{medida['melhor_us']:>12.1f}{medida['mediana_us']:>14.1f}")
+
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"hot_paths_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {caminho}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            if comparar(resultado, json.load(arquivo), args.tolerancia):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
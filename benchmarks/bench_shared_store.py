@@ -0,0 +1,157 @@
+"""
+Benchmark: memória por worker no modo compartilhado (DATA_STORE_MODE=shared).
+
+Uso:
+    python -m benchmarks.bench_shared_store [--workers 4] [--verificar]
+
+Publica os CSVs sintéticos de todas as categorias num diretório de
+snapshots, como o processo carregador, e sobe 1 e depois N workers que
+anexam todas as categorias e servem uma vez o dataset completo de cada
+uma. Com todos os workers vivos, lê `/proc/<pid>/smaps_rollup` de cada um
+e reporta, em relação ao próprio worker antes de anexar os snapshots:
+
+- privada: memória anônima do worker (registros, índices e textos montados
+  no processo), que não é compartilhada qualquer que seja o número de workers
+- pss: memória do worker com as páginas compartilhadas (arquivos mapeados)
+  divididas entre os processos que as usam
+
+Com --verificar, o código de saída é 1 se a memória privada por worker
+passar de --limite vezes o tamanho dos snapshots, isto é, se os workers
+voltarem a manter cópias próprias dos dados.
+"""
+import os
+
+# Antes de importar a aplicação: sem agendador e com logs discretos
+os.environ.setdefault("REFRESH_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import argparse
+import gc
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from benchmarks.fixtures import escrever_fixtures
+
+CAMPOS = ("Rss", "Pss", "Anonymous")
+
+
+def _smaps(pid: int) -> Dict[str, int]:
+    """
+    Campos de memória do processo, em bytes.
+    """
+    campos = {}
+    with open(f"/proc/{pid}/smaps_rollup") as arquivo:
+        for linha in arquivo:
+            nome, _, resto = linha.partition(":")
+            if nome in CAMPOS:
+                campos[nome] = int(resto.split()[0]) * 1024
+    return {"rss": campos["Rss"], "pss": campos["Pss"], "privada": campos["Anonymous"]}
+
+
+def _tamanho(diretorio: str) -> int:
+    return sum(os.path.getsize(os.path.join(raiz, nome)) for raiz, _, nomes in os.walk(diretorio) for nome in nomes)
+
+
+def publicar(snapshots: str):
+    """
+    Publica os snapshots de todas as categorias a partir dos CSVs sintéticos.
+    """
+    from src.utils.csv_downloader import CSVDownloader
+    from src.utils.shared_store import SnapshotStore
+
+    # Sem os avisos da primeira publicação (nenhum snapshot anterior a anexar)
+    logging.getLogger("src").setLevel(logging.ERROR)
+    dados = tempfile.mkdtemp(prefix="bench_shared_dados_")
+    escrever_fixtures(dados, list(CSVDownloader.DOWNLOAD_URLS))
+    carregador = CSVDownloader(data_dir=dados, modo="loader")
+    carregador._store = SnapshotStore(snapshots)
+    for categoria in carregador.DOWNLOAD_URLS:
+        assert carregador.load_local(categoria), categoria
+
+
+def worker(snapshots: str):
+    """
+    Processo worker: anexa e serve todas as categorias e espera o fim da medição.
+    """
+    from src.utils.csv_downloader import CSVDownloader
+    from src.utils.shared_store import SnapshotStore
+
+    downloader = CSVDownloader(data_dir=tempfile.mkdtemp(prefix="bench_shared_worker_"), modo="shared")
+    downloader._store = SnapshotStore(snapshots)
+    gc.collect()
+    print(json.dumps({"evento": "importado"}), flush=True)
+    sys.stdin.readline()
+    for categoria in downloader.DOWNLOAD_URLS:
+        dados = downloader.get_data(categoria)
+        assert dados and dados["data"], categoria
+        # Serializa como a resposta JSON de um endpoint
+        json.dumps(dados, default=str)
+        del dados
+    gc.collect()
+    print(json.dumps({"evento": "pronto"}), flush=True)
+    sys.stdin.readline()
+
+
+def medir(snapshots: str, workers: int) -> List[Dict[str, int]]:
+    """
+    Sobe os workers e retorna a memória de cada um após servir todas as categorias.
+    """
+    comando = [sys.executable, "-m", "benchmarks.bench_shared_store", "--worker", snapshots]
+    processos = [subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+    try:
+        for processo in processos:
+            processo.stdout.readline()
+        antes = [_smaps(processo.pid) for processo in processos]
+        for processo in processos:
+            processo.stdin.write("\n")
+            processo.stdin.flush()
+        for processo in processos:
+            processo.stdout.readline()
+        # Todos vivos ao mesmo tempo: o PSS divide as páginas compartilhadas entre eles
+        depois = [_smaps(processo.pid) for processo in processos]
+    finally:
+        for processo in processos:
+            processo.stdin.close()
+            processo.wait()
+    return [{campo: d[campo] - a[campo] for campo in d} for a, d in zip(antes, depois)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--verificar", action="store_true")
+    parser.add_argument("--limite", type=float, default=1.0,
+                        help="Memória privada por worker aceita, em frações do tamanho dos snapshots")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.worker)
+        return
+
+    snapshots = tempfile.mkdtemp(prefix="bench_shared_snapshots_")
+    publicar(snapshots)
+    tamanho = _tamanho(snapshots)
+    print(f"snapshots: {tamanho / 2 ** 20:.1f} MB")
+    print(f"{'workers':<9}{'privada/worker MB':>19}{'pss/worker MB':>15}{'pss total MB':>14}")
+    medidas = {}
+    for n in sorted({1, args.workers}):
+        deltas = medidas[n] = medir(snapshots, n)
+        privada = sum(d["privada"] for d in deltas) / n
+        pss = sum(d["pss"] for d in deltas)
+        print(f"{n:<9}{privada / 2 ** 20:>19.1f}{pss / n / 2 ** 20:>15.1f}{pss / 2 ** 20:>14.1f}")
+
+    if args.verificar:
+        privada = max(d["privada"] for deltas in medidas.values() for d in deltas)
+        if privada > args.limite * tamanho:
+            print(f"\nMemória privada por worker ({privada / 2 ** 20:.1f} MB) acima de "
+                  f"{args.limite:.0%} dos snapshots ({tamanho / 2 ** 20:.1f} MB)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: consultas de série temporal sobre a lista de registros vs. YearMatrix.
+
+Uso:
+    python -m benchmarks.bench_year_matrix [--repeticoes N]
+
+Compara, para categorias representativas, o caminho atual (percorrer
+`dados["data"]`, uma lista de dicionários) com o fatiamento da matriz
+densa entidade x ano:
+
+- série de uma entidade
+- soma de todas as entidades (sem dupla contagem de categorias)
+- corte de um ano para todas as entidades
+"""
+import argparse
+import tempfile
+import timeit
+
+from benchmarks.fixtures import carregar_dataframe
+from src.utils.csv_downloader import CSVDownloader
+from src.utils.hierarchy import classificar
+from src.utils.long_format import coluna_entidade
+
+CATEGORIAS = ["producao", "processamento_viniferas", "exportacao_vinho"]
+
+
+def _registros_serie(data, col, alvo, colunas_ano):
+    alvo = alvo.lower()
+    serie = [0.0] * len(colunas_ano)
+    for item in data:
+        if str(item[col]).lower() == alvo:
+            for j, ano in enumerate(colunas_ano):
+                serie[j] += item[ano]
+    return serie
+
+
+def _registros_soma(data, col, colunas_ano):
+    # Sem o índice, é preciso classificar as linhas para não contar as categorias duas vezes
+    niveis, pais = [2] * len(data), []
+    if data and "control" in data[0]:
+        niveis, pais = classificar([str(item["control"]) for item in data],
+                                   [str(item[col]).strip() for item in data])
+    pais_com_filhos = set(filter(None, pais))
+    serie = [0.0] * len(colunas_ano)
+    for nivel, item in zip(niveis, data):
+        if nivel == 1 and str(item[col]).strip() in pais_com_filhos:
+            continue
+        for j, ano in enumerate(colunas_ano):
+            serie[j] += item[ano]
+    return serie
+
+
+def _registros_ano(data, col, ano):
+    return {item[col]: item[ano] for item in data}
+
+
+def medir(funcao, repeticoes):
+    vezes = timeit.repeat(funcao, number=1, repeat=repeticoes)
+    return min(vezes) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    downloader = CSVDownloader(data_dir=tempfile.mkdtemp())
+    print(f"{'categoria':<26}{'consulta':<12}{'registros (us)':>16}{'matriz (us)':>14}{'ganho':>9}")
+    for categoria in CATEGORIAS:
+        carga = downloader._process_dataframe(carregar_dataframe(categoria), "", "")
+        data, matriz, df = carga["result"]["data"], carga["matriz"], carga["df"]
+        col = coluna_entidade(df)
+        colunas_ano = [str(ano) for ano in matriz.anos]
+        alvo = str(data[len(data) // 2][col])
+
+        casos = [
+            ("entidade", lambda: _registros_serie(data, col, alvo, colunas_ano), lambda: matriz.serie(alvo)),
+            ("soma", lambda: _registros_soma(data, col, colunas_ano), lambda: matriz.soma()),
+            ("ano", lambda: _registros_ano(data, col, "2019"), lambda: matriz.ano(2019)),
+        ]
+        for nome, registros, fatia in casos:
+            t_registros = medir(registros, args.repeticoes)
+            t_matriz = medir(fatia, args.repeticoes)
+            print(f"{categoria:<26}{nome:<12}{t_registros:>16.1f}{t_matriz:>14.1f}{t_registros / t_matriz:>8.1f}x")
+        print(f"{'':<26}{'memória':<12}{'':>16}{matriz.nbytes:>14}")
+
+
+if __name__ == "__main__":
+    main()
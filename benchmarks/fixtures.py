@@ -0,0 +1,172 @@
+"""
+Geração de CSVs sintéticos no formato dos arquivos da Embrapa.
+
+Os arquivos seguem o layout dos originais (separador, colunas `control`,
+anos duplicados quantidade/valor nos arquivos de comércio exterior) e têm
+tamanho próximo ao real, para que os benchmarks rodem sem acesso à rede e
+de forma reprodutível (semente fixa).
+"""
+import io
+import os
+import random
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+ANOS = list(range(1970, 2024))
+
+# Arquivos de processamento usam tabulação; os demais, ponto e vírgula
+SEPARADORES = {
+    "processamento_viniferas": "\t",
+    "processamento_americanas": "\t",
+    "processamento_mesa": "\t",
+}
+
+CATEGORIAS_PRODUTO = {
+    "VINHO DE MESA": ("vm", ["Tinto", "Branco", "Rosado"]),
+    "VINHO FINO DE MESA (VINIFERA)": ("vv", ["Tinto", "Branco", "Rosado"]),
+    "SUCO": ("su", ["Suco de uva integral", "Suco de uva concentrado", "Suco de uva adoçado"]),
+    "DERIVADOS": ("de", ["Espumante", "Espumante moscatel", "Base espumante", "Bagaceira", "Vinagre",
+                         "Filtrado", "Mosto simples", "Mosto concentrado", "Licoroso", "Jeropiga",
+                         "Brandy", "Cooler", "Destilado", "Vinho composto", "Polpa de uva"]),
+    "SUCO DE UVAS CONCENTRADO": ("sc", []),
+}
+
+CATEGORIAS_CULTIVAR = {
+    "TINTAS": ("ti", [f"Tinta {i:03d}" for i in range(1, 71)]),
+    "BRANCAS E ROSADAS": ("br", [f"Branca {i:03d}" for i in range(1, 71)]),
+    "SEM CLASSIFICAÇÃO": ("sc", ["Sem classificação"]),
+}
+
+PAISES = [
+    "Alemanha", "Alemanha, República Democrática", "Angola", "Argentina", "Austrália", "Áustria",
+    "Bélgica", "Bolívia", "Canadá", "Chile", "China", "Colômbia", "Coreia do Sul", "Cuba",
+    "Dinamarca", "Emirados Árabes Unidos", "Equador", "Espanha", "Estados Unidos",
+    "Estados Unidos da América", "Finlândia", "França", "Grécia", "Holanda", "Hong Kong",
+    "Hungria", "Índia", "Irlanda", "Israel", "Itália", "Japão", "Líbano", "México",
+    "Moçambique", "Noruega", "Nova Zelândia", "Panamá", "Paraguai", "Peru", "Polônia",
+    "Portugal", "Reino Unido", "República Dominicana", "Rússia", "Singapura", "Suécia",
+    "Suíça", "Taiwan (Formosa)", "Uruguai", "Venezuela",
+] + [f"País {i:03d}" for i in range(1, 91)]
+
+
+def _categorias(categoria: str) -> Dict[str, Tuple[str, List[str]]]:
+    if categoria.startswith("processamento"):
+        return CATEGORIAS_CULTIVAR
+    if categoria == "comercializacao":
+        return dict(CATEGORIAS_PRODUTO, **{"OUTROS PRODUTOS COMERCIALIZADOS": ("ot", ["Vinho Frizante", "Vinho orgânico"])})
+    return CATEGORIAS_PRODUTO
+
+
+def gerar_csv(categoria: str, semente: int = 42) -> str:
+    """
+    Gera o conteúdo CSV sintético de uma categoria.
+
+    Args:
+        categoria: Chave da categoria (ver CSVDownloader.DOWNLOAD_URLS)
+        semente: Semente do gerador aleatório
+
+    Returns:
+        Conteúdo do CSV
+    """
+    rnd = random.Random(f"{semente}-{categoria}")
+    sep = SEPARADORES.get(categoria, ";")
+    linhas = []
+
+    if categoria.startswith(("importacao", "exportacao")):
+        linhas.append(sep.join(["Id", "País"] + [str(ano) for ano in ANOS for _ in (0, 1)]))
+        for i, pais in enumerate(PAISES, 1):
+            row = [str(i), pais]
+            for _ in ANOS:
+                qtd = rnd.choice([0, 0, rnd.randint(1, 500000)])
+                row += [str(qtd), str(int(qtd * rnd.uniform(0.5, 8)))]
+            linhas.append(sep.join(row))
+    else:
+        col = "cultivar" if categoria.startswith("processamento") else ("Produto" if categoria == "comercializacao" else "produto")
+        linhas.append(sep.join(["id", "control", col] + [str(ano) for ano in ANOS]))
+        i = 1
+        for nome, (prefixo, filhos) in _categorias(categoria).items():
+            valores = [[rnd.randint(0, 5000000) for _ in ANOS] for _ in filhos]
+            if filhos:
+                total = [sum(v[j] for v in valores) for j in range(len(ANOS))]
+            else:
+                total = [rnd.randint(0, 5000000) for _ in ANOS]
+            linhas.append(sep.join([str(i), nome, nome] + [str(x) for x in total]))
+            i += 1
+            for filho, v in zip(filhos, valores):
+                linhas.append(sep.join([str(i), f"{prefixo}_{filho}", filho] + [str(x) for x in v]))
+                i += 1
+    return "\n".join(linhas) + "\n"
+
+
+def carregar_dataframe(categoria: str) -> pd.DataFrame:
+    """
+    Lê o CSV sintético da categoria como o CSVDownloader leria o original.
+    """
+    return pd.read_csv(io.StringIO(gerar_csv(categoria)), sep=SEPARADORES.get(categoria, ";"))
+
+
+def escrever_fixtures(diretorio: str, categorias: List[str]) -> Dict[str, str]:
+    """
+    Escreve um CSV por categoria em `diretorio/<categoria>/<categoria>.csv`,
+    o layout usado pelo fallback local do CSVDownloader.
+
+    Returns:
+        Mapeamento categoria -> caminho do arquivo
+    """
+    caminhos = {}
+    for categoria in categorias:
+        pasta = os.path.join(diretorio, categoria)
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f"{categoria}.csv")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(gerar_csv(categoria))
+        caminhos[categoria] = caminho
+    return caminhos
+
+
+def _numero_br(valor) -> str:
+    """
+    Formata um número como no site da Embrapa (milhar com ponto, '-' para zero).
+    """
+    valor = int(valor)
+    return f"{valor:,}".replace(",", ".") if valor else "-"
+
+
+def gerar_html(categoria: str, ano: int = ANOS[-1]) -> str:
+    """
+    Gera a página HTML de consulta de uma categoria (index.php?opcao=...),
+    com a tabela de um ano no layout lido pelos scrapers.
+
+    Args:
+        categoria: Chave da categoria
+        ano: Ano exibido na tabela
+
+    Returns:
+        Conteúdo HTML
+    """
+    df = carregar_dataframe(categoria)
+    comercio = categoria.startswith(("importacao", "exportacao"))
+    entidade = df.columns[1] if comercio else df.columns[2]
+    if comercio:
+        cabecalho = ["Países", "Quantidade (Kg)", "Valor (US$)"]
+        qtd, valor = df.columns[2:][2 * ANOS.index(ano)], df.columns[2:][2 * ANOS.index(ano) + 1]
+        linhas = [("tb_item", [row[entidade], _numero_br(row[qtd]), _numero_br(row[valor])]) for _, row in df.iterrows()]
+    else:
+        cabecalho = [str(entidade).capitalize(), "Quantidade (L.)"]
+        linhas = []
+        for _, row in df.iterrows():
+            # Linhas de categoria e de produto têm classes diferentes na página original
+            classe = "tb_subitem" if row["control"] != row[entidade] else "tb_item"
+            linhas.append((classe, [row[entidade], _numero_br(row[str(ano)])]))
+
+    html = [
+        "<html><head><meta charset='utf-8'><title>Banco de dados de uva, vinho e derivados</title></head><body>",
+        f"<div id='titulo'>{categoria.replace('_', ' ').title()} [{ano}]</div>",
+        "<table class='tabela tb_base tb_dados'>",
+        "<tr class='cab_tabela'>" + "".join(f"<th>{c}</th>" for c in cabecalho) + "</tr>",
+    ]
+    for classe, celulas in linhas:
+        html.append(f"<tr><td class='{classe}'>" + f"</td><td class='{classe}'>".join(map(str, celulas)) + "</td></tr>")
+    html.append("</table></body></html>")
+    return "\n".join(html)
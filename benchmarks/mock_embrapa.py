@@ -0,0 +1,154 @@
+"""
+Servidor local que imita o site da Embrapa para benchmarks.
+
+Serve os CSVs sintéticos de `benchmarks.fixtures` em /download/<arquivo>.csv,
+com os mesmos nomes de arquivo de CSVDownloader.DOWNLOAD_URLS, e as páginas
+de consulta em /index.php?opcao=opt_0N&subopcao=subopt_0M, com latência
+configurável (fixa mais jitter uniforme) por resposta.
+
+Uso isolado:
+    python -m benchmarks.mock_embrapa [--porta 8765] [--latencia 0.2] [--jitter 0.1]
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit, parse_qs
+
+from benchmarks.fixtures import gerar_csv, gerar_html
+from src.utils.csv_downloader import CSVDownloader
+
+# Arquivo de download -> categoria
+ARQUIVOS = {os.path.basename(url): categoria for categoria, url in CSVDownloader.DOWNLOAD_URLS.items()}
+
+# (opcao, subopcao) das páginas de consulta -> categoria, seguindo as URLs
+# usadas pelos scrapers (ver src/utils/config.py); sem subopcao, vale subopt_01
+OPCOES = {
+    ("opt_01", None): "producao",
+    ("opt_02", "subopt_01"): "processamento_viniferas",
+    ("opt_02", "subopt_02"): "processamento_americanas",
+    ("opt_02", "subopt_03"): "processamento_mesa",
+    ("opt_03", None): "comercializacao",
+    ("opt_04", "subopt_01"): "importacao_vinho",
+    ("opt_04", "subopt_02"): "importacao_espumante",
+    ("opt_04", "subopt_03"): "importacao_frescas",
+    ("opt_04", "subopt_04"): "importacao_passas",
+    ("opt_04", "subopt_05"): "importacao_suco",
+    ("opt_05", "subopt_01"): "exportacao_vinho",
+    ("opt_05", "subopt_02"): "exportacao_espumante",
+    ("opt_05", "subopt_03"): "exportacao_frescas",
+    ("opt_05", "subopt_04"): "exportacao_suco",
+}
+
+
+class MockEmbrapa:
+    """
+    Servidor HTTP em thread, com conteúdo gerado uma vez por categoria.
+    """
+
+    def __init__(self, latencia: float = 0.0, jitter: float = 0.0, porta: int = 0):
+        """
+        Args:
+            latencia: Atraso fixo de cada resposta, em segundos
+            jitter: Atraso adicional aleatório (uniforme entre 0 e jitter)
+            porta: Porta local (0 escolhe uma porta livre)
+        """
+        self.latencia = latencia
+        self.jitter = jitter
+        self.requisicoes = 0
+        self._conteudo: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), self._handler())
+        self._servidor.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def urls_download(self) -> Dict[str, str]:
+        """
+        DOWNLOAD_URLS equivalente apontando para este servidor.
+        """
+        return {categoria: f"{self.url}/download/{arquivo}" for arquivo, categoria in ARQUIVOS.items()}
+
+    def start(self) -> "MockEmbrapa":
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="mock-embrapa", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def _obter(self, chave: str, gerar) -> bytes:
+        with self._lock:
+            if chave not in self._conteudo:
+                self._conteudo[chave] = gerar().encode("utf-8")
+            return self._conteudo[chave]
+
+    def _resposta(self, caminho: str, consulta: Dict[str, list]) -> Optional[tuple]:
+        if caminho.startswith("/download/"):
+            categoria = ARQUIVOS.get(caminho.rsplit("/", 1)[-1])
+            if categoria is None:
+                return None
+            return "text/csv; charset=utf-8", self._obter(f"csv:{categoria}", lambda: gerar_csv(categoria))
+        if caminho == "/index.php":
+            opcao = consulta.get("opcao", [None])[0]
+            subopcao = consulta.get("subopcao", [None])[0]
+            categoria = OPCOES.get((opcao, subopcao)) or OPCOES.get((opcao, None)) or OPCOES.get((opcao, "subopt_01"))
+            if categoria is None:
+                return None
+            return "text/html; charset=utf-8", self._obter(f"html:{categoria}", lambda: gerar_html(categoria))
+        if caminho == "/":
+            return "text/plain", b"ok"
+        return None
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with mock._lock:
+                    mock.requisicoes += 1
+                atraso = mock.latencia + random.uniform(0, mock.jitter)
+                if atraso:
+                    time.sleep(atraso)
+                partes = urlsplit(self.path)
+                resposta = mock._resposta(partes.path, parse_qs(partes.query))
+                if resposta is None:
+                    self.send_error(404)
+                    return
+                tipo, corpo = resposta
+                self.send_response(200)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita o site da Embrapa")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+    mock = MockEmbrapa(args.latencia, args.jitter, args.porta).start()
+    print(f"Mock da Embrapa em {mock.url} (Ctrl+C para encerrar)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,17 @@
 Módulo de inicialização para endpoints.
 """
 from fastapi import APIRouter
-from src.api.endpoints import producao, processamento, comercializacao, importacao, exportacao, subcategorias
+from src.api.endpoints import producao, processamento, comercializacao, importacao, exportacao, subcategorias, consulta, batch, series, metricas, search, export, sql, events
 
 # Criação do router principal
 router = APIRouter(prefix="/api/v1")
 
+# Séries temporais (/{modulo}/{tipo}/series) e métricas (/{modulo}/{tipo}/metricas) vêm
+# antes dos routers de cada módulo, para que /producao/producao/series não seja
+# capturado por /producao/producao/{tipo}
+router.include_router(series.router)
+router.include_router(metricas.router)
+
 # Inclusão dos routers de cada endpoint
 router.include_router(producao.router, prefix="/producao")
 router.include_router(processamento.router, prefix="/processamento")
@@ -14,5 +20,11 @@ router.include_router(comercializacao.router, prefix="/comercializacao")
 router.include_router(importacao.router, prefix="/importacao")
 router.include_router(exportacao.router, prefix="/exportacao")
 router.include_router(subcategorias.router, prefix="/subcategorias")
+router.include_router(consulta.router)
+router.include_router(batch.router)
+router.include_router(search.router)
+router.include_router(export.router)
+router.include_router(sql.router)
+router.include_router(events.router)
 
 __all__ = ['router']
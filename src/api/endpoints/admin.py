@@ -0,0 +1,42 @@
+"""
+Endpoints administrativos, protegidos pelo token ADMIN_TOKEN.
+"""
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query
+from typing import Dict, Any, List, Optional
+from src.utils.config import ADMIN_TOKEN
+from src.utils.profiling import profiler
+
+def exigir_admin(x_admin_token: Optional[str] = Header(None, description="Token administrativo (ADMIN_TOKEN)")):
+    """
+    Dependência que exige o cabeçalho X-Admin-Token igual a ADMIN_TOKEN.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints administrativos desativados: defina ADMIN_TOKEN.")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Token administrativo inválido.")
+
+router = APIRouter(prefix="/admin", tags=["Administração"], dependencies=[Depends(exigir_admin)])
+
+@router.get("/profiles")
+async def listar_perfis() -> List[Dict[str, Any]]:
+    """
+    Lista os perfis de requisições lentas ou amostradas (ver PROFILING_ENABLED).
+    """
+    return profiler.listar()
+
+@router.get("/profiles/{perfil_id}")
+async def obter_perfil(
+    perfil_id: str = Path(..., description="Identificador do perfil"),
+    ordenar: str = Query("cumulative", description="Ordenação do cProfile: cumulative, tottime, calls"),
+    limite: int = Query(40, ge=1, le=500, description="Número de funções listadas no cProfile")
+) -> Dict[str, Any]:
+    """
+    Retorna a linha do tempo das etapas e, se capturado, o relatório do cProfile.
+    """
+    if ordenar not in ("cumulative", "tottime", "calls", "ncalls", "time"):
+        raise HTTPException(status_code=400, detail="Ordenação inválida. Use cumulative, tottime ou calls.")
+    perfil = profiler.obter(perfil_id, ordenar, limite)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail=f"Perfil não encontrado: {perfil_id}")
+    return perfil
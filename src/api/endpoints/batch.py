@@ -0,0 +1,99 @@
+"""
+Endpoint para consultas em lote de várias categorias em uma única requisição.
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, Any, Optional, List
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.utils.admission import admissao, Saturado
+from src.utils.csv_downloader import csv_downloader, resolve_categoria
+from src.utils.filter_parser import parse_filters, apply_filters
+
+router = APIRouter(prefix="/batch", tags=["Lote"])
+
+logger = logging.getLogger(__name__)
+
+# Limite de consultas por lote
+MAX_CONSULTAS = 20
+
+class ConsultaLote(BaseModel):
+    modulo: str = Field(..., description="producao, processamento, comercializacao, importacao ou exportacao")
+    tipo: str = Field(..., description="Tipo dentro do módulo, ex.: vinho")
+    filtros: Optional[str] = Field(None, description="Filtros no formato 'chave1=valor1,chave2=valor2'")
+    fields: Optional[List[str]] = Field(None, description="Colunas a retornar; todas se omitido")
+
+class RequisicaoLote(BaseModel):
+    consultas: List[ConsultaLote]
+    stream: bool = Field(False, description="Se True, retorna NDJSON à medida que cada consulta termina")
+
+def _resolver(indice: int, consulta: ConsultaLote) -> Dict[str, Any]:
+    """
+    Resolve uma consulta do lote contra o cache compartilhado.
+    """
+    base = {"indice": indice, "modulo": consulta.modulo, "tipo": consulta.tipo}
+    chave = resolve_categoria(consulta.modulo, consulta.tipo)
+    if chave is None:
+        return {**base, "status": 400, "erro": "Módulo/tipo inválido."}
+    try:
+        dados = csv_downloader.get_data(chave)
+        if not dados:
+            return {**base, "status": 500, "erro": "Não foi possível obter dados."}
+        registros = apply_filters(dados["data"], parse_filters(consulta.filtros))
+        subcategorias = dados["subcategorias"]
+        if consulta.fields:
+            registros = [{campo: item.get(campo) for campo in consulta.fields} for item in registros]
+            subcategorias = {k: v for k, v in subcategorias.items() if k in consulta.fields}
+        dados["data"] = registros
+        dados["subcategorias"] = subcategorias
+        return {**base, "status": 200, **dados}
+    except Exception as e:
+        logger.error(f"Erro ao processar consulta {indice} do lote: {str(e)}")
+        return {**base, "status": 500, "erro": f"Erro ao processar dados: {str(e)}"}
+
+async def _admitida(indice: int, consulta: ConsultaLote) -> Dict[str, Any]:
+    """
+    Resolve uma consulta do lote numa thread, com a vaga da sua categoria ocupada.
+
+    Sem vaga, só esta consulta é recusada (status 503); as demais seguem.
+    """
+    chave = resolve_categoria(consulta.modulo, consulta.tipo)
+    try:
+        async with admissao.categorias([chave] if chave else []):
+            return await run_in_threadpool(_resolver, indice, consulta)
+    except Saturado as e:
+        return {
+            "indice": indice, "modulo": consulta.modulo, "tipo": consulta.tipo, "status": 503,
+            "erro": f"Serviço sobrecarregado, tente novamente em instantes ({e.compartimento}).",
+        }
+
+@router.post("")
+async def post_batch(requisicao: RequisicaoLote):
+    """
+    Executa várias consultas concorrentemente contra o cache compartilhado.
+
+    Cada resultado traz o índice da consulta e seu próprio status, de modo que
+    a falha de uma categoria não invalida o lote inteiro.
+    """
+    consultas = requisicao.consultas
+    if not consultas or len(consultas) > MAX_CONSULTAS:
+        raise HTTPException(status_code=400, detail=f"Informe entre 1 e {MAX_CONSULTAS} consultas.")
+    logger.debug("Recebendo lote com %d consultas", len(consultas))
+
+    tarefas = [_admitida(i, c) for i, c in enumerate(consultas)]
+
+    if requisicao.stream:
+        async def gerar():
+            for tarefa in asyncio.as_completed(tarefas):
+                resultado = await tarefa
+                yield json.dumps(jsonable_encoder(resultado), ensure_ascii=False) + "\n"
+        return StreamingResponse(gerar(), media_type="application/x-ndjson")
+
+    resultados = await asyncio.gather(*tarefas)
+    return {"resultados": resultados}
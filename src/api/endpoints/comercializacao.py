@@ -1,48 +1,71 @@
 """
 Endpoint para dados de comercialização.
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any
-from src.utils.csv_downloader import CSVDownloader
-from src.utils.filter_parser import parse_filters
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, Any, Optional
+from src.utils.csv_downloader import csv_downloader
+from src.utils.filter_parser import parse_filters, apply_filters
+from src.utils.profiling import span
+from src.api.endpoints.export import Formato, exigir_pyarrow, resposta_colunar
 import os
 import logging
 
 router = APIRouter(prefix="/comercializacao", tags=["Comercialização"])
 
-# Inicializa o downloader de CSV
-data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
-# Instanciar o CSVDownloader com o diretório /tmp
-csv_downloader = CSVDownloader(data_dir="/tmp")
-
 logger = logging.getLogger(__name__)
 
 @router.get("/")
 async def get_comercializacao(
-    filtros: Dict[str, Any] = Depends(parse_filters)
+    filtros: Dict[str, Any] = Depends(parse_filters),
+    nivel: Optional[int] = Query(None, ge=1, le=2, description="1 para categorias, 2 para produtos"),
+    pai: Optional[str] = Query(None, description="Retorna apenas os produtos da categoria informada"),
+    formato: Formato = Query(Formato.json, alias="format", description="json (padrão), arrow (IPC stream) ou parquet")
 ) -> Dict[str, Any]:
     """
     Retorna dados de comercialização sem tipos específicos.
     """
     chave = "comercializacao"
-    logger.info("Recebendo requisição para comercialização")
+    logger.debug("Recebendo requisição para comercialização")
+    exigir_pyarrow(formato)
     try:
-        dados = csv_downloader.get_data(chave)
+        with span("cache"):
+            dados = csv_downloader.get_data(chave)
         if not dados:
             logger.error("Dados não encontrados.")
             raise HTTPException(status_code=500, detail="Não foi possível obter dados.")
+        # Seleciona por nível/pai usando o índice hierárquico
+        if nivel is not None or pai is not None:
+            hierarquia = csv_downloader.get_hierarchy(chave)
+            if hierarquia is None:
+                raise HTTPException(status_code=400, detail="Hierarquia indisponível para esta categoria.")
+            registros = dados["data"]
+            with span("hierarquia"):
+                dados["data"] = [registros[pos] for pos in hierarquia.linhas(nivel, pai)]
         if filtros:
-            dados_filtrados = []
-            for item in dados["data"]:
-                match = True
-                for key, value in filtros.items():
-                    if key in item and str(item[key]).lower() != str(value).lower():
-                        match = False
-                        break
-                if match:
-                    dados_filtrados.append(item)
-            dados["data"] = dados_filtrados
+            with span("filtros"):
+                dados["data"] = apply_filters(dados["data"], filtros)
+        if formato != Formato.json:
+            return resposta_colunar(chave, dados["data"], formato)
         return dados
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao processar dados: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao processar dados: {str(e)}")
+
+@router.get("/totais")
+async def get_comercializacao_totais(
+    pai: Optional[str] = Query(None, description="Categoria cuja subárvore será somada")
+) -> Dict[str, Any]:
+    """
+    Retorna os totais anuais por categoria, sem dupla contagem de subprodutos.
+    """
+    hierarquia = csv_downloader.get_hierarchy("comercializacao")
+    if hierarquia is None:
+        raise HTTPException(status_code=500, detail="Não foi possível obter dados.")
+    if pai is not None:
+        totais = hierarquia.soma_subarvore(pai)
+        if totais is None:
+            raise HTTPException(status_code=404, detail=f"Categoria não encontrada: {pai}")
+        return {"pai": pai, "totais": totais}
+    return {"totais": hierarquia.totais(), "categorias": hierarquia.resumo()}
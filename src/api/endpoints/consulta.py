@@ -0,0 +1,138 @@
+"""
+Endpoint de consulta cruzada entre categorias.
+"""
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
+from src.utils.admission import admissao, Saturado
+from src.utils.csv_downloader import csv_downloader, CSVDownloader
+from enum import Enum
+import logging
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+router = APIRouter(prefix="/consulta", tags=["Consulta"])
+
+logger = logging.getLogger(__name__)
+
+# Limite de séries por consulta, para manter a resposta pequena
+MAX_SERIES = 6
+
+class Medida(str, Enum):
+    quantidade = "quantidade"
+    valor = "valor"
+
+class Operacao(str, Enum):
+    razao = "razao"
+    diferenca = "diferenca"
+    soma = "soma"
+
+def _serie(categoria: str, medida: str, por_entidade: bool, entidade: Optional[str]) -> "pd.Series":
+    """
+    Agrega a medida da categoria por ano (e entidade, se solicitado).
+
+    Apenas as linhas folha são somadas, evitando a dupla contagem das
+    linhas de categoria em producao/comercializacao.
+    """
+    longo = csv_downloader.get_long_data(categoria)
+    if longo is None:
+        raise HTTPException(status_code=500, detail=f"Não foi possível obter dados de {categoria}.")
+    mascara = longo["folha"].to_numpy(dtype=bool)
+    if entidade:
+        alvo = entidade.strip().lower()
+        mascara &= (
+            longo["entidade"].str.lower().eq(alvo)
+            | longo["pai"].fillna("").astype(str).str.lower().eq(alvo)
+        ).to_numpy()
+    chaves = ["ano", "entidade"] if por_entidade else ["ano"]
+    return longo.loc[mascara].groupby(chaves)[medida].sum(min_count=1).rename(categoria)
+
+def _combinar(categorias: List[str], medida: str, operacao: Optional[Operacao], por_entidade: bool,
+              entidade: Optional[str], ano_inicio: Optional[int], ano_fim: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Agrega as séries das categorias, junta-as por ano (e entidade) e aplica a operação.
+
+    Returns:
+        Linhas da junção, com None no lugar dos valores ausentes
+    """
+    import pandas as pd
+
+    combinado = pd.concat(
+        [_serie(c, medida, por_entidade, entidade) for c in categorias],
+        axis=1,
+        join="outer",
+    ).sort_index()
+    anos = combinado.index.get_level_values("ano")
+    if ano_inicio is not None:
+        combinado = combinado[anos >= ano_inicio]
+        anos = combinado.index.get_level_values("ano")
+    if ano_fim is not None:
+        combinado = combinado[anos <= ano_fim]
+
+    if operacao == Operacao.razao:
+        combinado["resultado"] = combinado[categorias[0]] / combinado[categorias[1]].replace(0, np.nan)
+    elif operacao == Operacao.diferenca:
+        combinado["resultado"] = combinado[categorias[0]] - combinado[categorias[1]]
+    elif operacao == Operacao.soma:
+        combinado["resultado"] = combinado[categorias].sum(axis=1, min_count=1)
+
+    combinado = combinado.reset_index()
+    combinado = combinado.astype(object).where(combinado.notna(), None)
+    return combinado.to_dict('records')
+
+@router.get("")
+async def get_consulta(
+    series: str = Query(..., description="Categorias separadas por vírgula, ex.: producao,exportacao_vinho"),
+    medida: Medida = Query(Medida.quantidade, description="Medida agregada: quantidade ou valor (US$)"),
+    operacao: Optional[Operacao] = Query(None, description="razao/diferenca entre as duas primeiras séries ou soma de todas"),
+    por_entidade: bool = Query(False, description="Junta também por entidade (país/produto), além do ano"),
+    entidade: Optional[str] = Query(None, description="Restringe a uma entidade ou categoria pai"),
+    ano_inicio: Optional[int] = Query(None, description="Primeiro ano da série"),
+    ano_fim: Optional[int] = Query(None, description="Último ano da série")
+) -> Dict[str, Any]:
+    """
+    Junta séries de várias categorias por ano e retorna apenas a série calculada.
+
+    Exemplo: exportação de vinho como fração da produção, por ano:
+    `/api/v1/consulta?series=exportacao_vinho,producao&operacao=razao`
+    """
+    categorias: List[str] = [s.strip() for s in series.split(',') if s.strip()]
+    invalidas = [c for c in categorias if c not in CSVDownloader.DOWNLOAD_URLS]
+    if invalidas:
+        raise HTTPException(status_code=400, detail=f"Categorias inválidas: {', '.join(invalidas)}.")
+    repetidas = sorted({c for c in categorias if categorias.count(c) > 1})
+    if repetidas:
+        raise HTTPException(status_code=400, detail=f"Categorias repetidas: {', '.join(repetidas)}.")
+    if not categorias or len(categorias) > MAX_SERIES:
+        raise HTTPException(status_code=400, detail=f"Informe entre 1 e {MAX_SERIES} categorias.")
+    if operacao in (Operacao.razao, Operacao.diferenca) and len(categorias) < 2:
+        raise HTTPException(status_code=400, detail="A operação exige ao menos duas séries.")
+    logger.debug(f"Recebendo consulta cruzada: {categorias}")
+
+    try:
+        # Vagas das categorias consultadas, como nas rotas de cada dataset (ver src/utils/admission.py)
+        async with admissao.categorias(categorias):
+            for categoria in categorias:
+                if not csv_downloader.em_cache(categoria):
+                    await run_in_threadpool(csv_downloader.preparar, categoria)
+            # Agregações do pandas numa thread, fora do event loop (como em batch.py)
+            dados = await run_in_threadpool(
+                _combinar, categorias, medida.value, operacao, por_entidade, entidade, ano_inicio, ano_fim
+            )
+        return {
+            "series": categorias,
+            "medida": medida.value,
+            "operacao": operacao.value if operacao else None,
+            "chave": ["ano", "entidade"] if por_entidade else ["ano"],
+            "data": dados,
+        }
+    except Saturado as e:
+        raise admissao.recusa(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao processar consulta: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao processar consulta: {str(e)}")
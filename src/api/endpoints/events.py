@@ -0,0 +1,78 @@
+"""
+Stream (Server-Sent Events) das novas versões publicadas dos datasets.
+"""
+from fastapi import APIRouter, Query, HTTPException, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, Set
+from src.utils.csv_downloader import csv_downloader
+from src.utils.events import eventos
+from src.utils.config import EVENTS_HEARTBEAT
+import asyncio
+import json
+import logging
+
+router = APIRouter(prefix="/events", tags=["Eventos"])
+
+logger = logging.getLogger(__name__)
+
+# Espera sugerida ao cliente antes de reconectar, em milissegundos
+RETRY_MS = 3000
+
+def _formatar(evento) -> str:
+    dados = json.dumps(evento["dados"], ensure_ascii=False)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {dados}\n\n"
+
+async def _stream(request: Request, categorias: Optional[Set[str]], desde: Optional[int]):
+    assinatura = eventos.assinar(desde)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while not assinatura.atrasada:
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                # Comentário SSE: mantém a conexão aberta em proxies com timeout de inatividade
+                yield ": ping\n\n"
+                continue
+            if categorias is None or evento["dados"].get("categoria") in categorias:
+                yield _formatar(evento)
+        if assinatura.atrasada:
+            logger.warning("Assinante de eventos atrasado; encerrando o stream para reconexão")
+    finally:
+        eventos.cancelar(assinatura)
+
+@router.get("")
+async def stream_eventos(
+    request: Request,
+    categorias: Optional[str] = Query(None, description="Categorias separadas por vírgula, ex.: producao,exportacao_vinho"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+) -> StreamingResponse:
+    """
+    Stream `text/event-stream` com um evento `versao` a cada nova versão de um dataset:
+
+    `{"categoria": "producao", "versao": 3, "versao_anterior": 2, "linhas": 95,
+    "alteracoes": {"adicionadas": 0, "removidas": 0, "alteradas": 4}, ...}`
+
+    `alteracoes` é null quando a versão anterior não estava em memória. Ao
+    reconectar, o cabeçalho `Last-Event-ID` (enviado automaticamente pelo
+    EventSource) reenvia os eventos recentes que o cliente perdeu.
+    """
+    filtro = None
+    if categorias:
+        filtro = {c.strip() for c in categorias.split(",") if c.strip()}
+        invalidas = sorted(filtro - set(csv_downloader.DOWNLOAD_URLS))
+        if invalidas:
+            raise HTTPException(status_code=400, detail=f"Categorias inválidas: {', '.join(invalidas)}.")
+    desde = None
+    if last_event_id:
+        try:
+            desde = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID inválido.")
+    logger.debug("Recebendo assinatura de eventos: %s", categorias)
+    return StreamingResponse(
+        _stream(request, filtro, desde),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
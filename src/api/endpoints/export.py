@@ -0,0 +1,68 @@
+"""
+Exportação colunar (Arrow e Parquet) dos datasets e do catálogo completo.
+"""
+from fastapi import APIRouter, Query, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, List
+from src.utils import columnar
+from src.utils.csv_downloader import csv_downloader
+from enum import Enum
+import logging
+
+router = APIRouter(prefix="/export", tags=["Exportação colunar"])
+
+logger = logging.getLogger(__name__)
+
+class Formato(str, Enum):
+    json = "json"
+    arrow = "arrow"
+    parquet = "parquet"
+
+class FormatoColunar(str, Enum):
+    arrow = "arrow"
+    parquet = "parquet"
+
+# Catálogo completo, refeito quando algum dataset muda de versão
+catalogo = columnar.CatalogExport(csv_downloader)
+
+def exigir_pyarrow(formato: str):
+    """
+    Falha com 501 se o formato colunar foi pedido e o pyarrow não está instalado.
+    """
+    if formato != Formato.json and not columnar.disponivel():
+        raise HTTPException(status_code=501, detail="Formato indisponível: instale o pyarrow (requirements-colunar.txt).")
+
+def _resposta(conteudo: bytes, formato: str, nome: str) -> Response:
+    tipo, extensao = columnar.FORMATOS[formato]
+    return Response(
+        content=conteudo,
+        media_type=tipo,
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{extensao}"'},
+    )
+
+def resposta_colunar(categoria: str, registros: List[Dict[str, Any]], formato: Formato) -> Response:
+    """
+    Resposta Arrow ou Parquet com os registros selecionados da categoria.
+
+    Args:
+        categoria: Nome da categoria
+        registros: Registros já filtrados pelo endpoint (ver columnar.exportar)
+        formato: Formato colunar pedido
+    """
+    conteudo = columnar.exportar(csv_downloader, categoria, registros, formato.value)
+    if conteudo is None:
+        raise HTTPException(status_code=500, detail="Não foi possível obter dados.")
+    return _resposta(conteudo, formato.value, categoria)
+
+@router.get("/catalogo")
+async def exportar_catalogo(
+    formato: FormatoColunar = Query(FormatoColunar.parquet, alias="format", description="parquet ou arrow (IPC stream)")
+) -> Response:
+    """
+    Exporta todas as categorias em uma única tabela no formato longo:
+    categoria, entidade, pai, folha, ano, quantidade e valor.
+    """
+    exigir_pyarrow(formato)
+    logger.debug("Exportando catálogo em %s", formato.value)
+    conteudo = await run_in_threadpool(catalogo.exportar, formato.value)
+    return _resposta(conteudo, formato.value, "vitibrasil")
@@ -3,19 +3,16 @@ Endpoint para dados de exportação.
 """
 from fastapi import APIRouter, Depends, Query, HTTPException, Path
 from typing import Dict, Any, Optional
-from src.utils.csv_downloader import CSVDownloader
-from src.utils.filter_parser import parse_filters
+from src.utils.csv_downloader import csv_downloader
+from src.utils.filter_parser import parse_filters, apply_filters
+from src.utils.profiling import span
+from src.api.endpoints.export import Formato, exigir_pyarrow, resposta_colunar
 import os
 from enum import Enum
 import logging
 
 router = APIRouter(prefix="/exportacao", tags=["Exportação"])
 
-# Inicializa o downloader de CSV
-data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
-# Instanciar o CSVDownloader com o diretório /tmp
-csv_downloader = CSVDownloader(data_dir="/tmp")
-
 class ExportacaoTipo(str, Enum):
     vinho = "vinho"
     espumante = "espumante"
@@ -27,7 +24,8 @@ logger = logging.getLogger(__name__)
 @router.get("/{tipo}")
 async def get_tipo(
     tipo: str = Path(..., description="Tipo de dado. Valores válidos: vinho, espumante, frescas, suco"),
-    filtros: Dict[str, Any] = Depends(parse_filters)
+    filtros: Dict[str, Any] = Depends(parse_filters),
+    formato: Formato = Query(Formato.json, alias="format", description="json (padrão), arrow (IPC stream) ou parquet")
 ) -> Dict[str, Any]:
     """
     Retorna dados de acordo com o tipo especificado.
@@ -36,23 +34,19 @@ async def get_tipo(
     chave = f"exportacao_{tipo}"
     if tipo not in tipos_validos:
         raise HTTPException(status_code=400, detail="Tipo inválido. Tipos válidos: vinho, espumante, frescas, suco.")
-    logger.info(f"Recebendo requisição para tipo: {tipo}")
+    logger.debug("Recebendo requisição para tipo: %s", tipo)
+    exigir_pyarrow(formato)
     try:
-        dados = csv_downloader.get_data(chave)
+        with span("cache"):
+            dados = csv_downloader.get_data(chave)
         if not dados:
             logger.error("Dados não encontrados.")
             raise HTTPException(status_code=500, detail="Não foi possível obter dados.")
         if filtros:
-            dados_filtrados = []
-            for item in dados["data"]:
-                match = True
-                for key, value in filtros.items():
-                    if key in item and str(item[key]).lower() != str(value).lower():
-                        match = False
-                        break
-                if match:
-                    dados_filtrados.append(item)
-            dados["data"] = dados_filtrados
+            with span("filtros"):
+                dados["data"] = apply_filters(dados["data"], filtros)
+        if formato != Formato.json:
+            return resposta_colunar(chave, dados["data"], formato)
         return dados
     except Exception as e:
         logger.error(f"Erro ao processar dados: {str(e)}")
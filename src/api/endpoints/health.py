@@ -0,0 +1,46 @@
+"""
+Endpoints de saúde e prontidão para balanceadores de carga.
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from typing import Dict, Any
+from src.utils.csv_downloader import csv_downloader
+from src.utils.warmup import WarmUp
+from src.utils.circuit_breaker import breakers_status
+from src.utils.upstream import upstream
+from src.utils.admission import admissao
+
+router = APIRouter(tags=["Saúde"])
+
+# Aquecimento dos datasets, iniciado no lifespan da aplicação (src/main.py)
+warmup = WarmUp(csv_downloader)
+
+@router.get("/healthz")
+async def healthz() -> Dict[str, Any]:
+    """
+    Liveness: o processo está de pé. Inclui o estado de carga de cada categoria.
+    """
+    return {
+        "status": "ok",
+        **warmup.status(),
+        "upstream": {"circuitos": breakers_status(), **upstream.metrics()},
+        "admissao": admissao.status(),
+    }
+
+@router.get("/readyz")
+async def readyz():
+    """
+    Readiness: 200 apenas quando todas as categorias estão em cache; 503 caso contrário.
+
+    Com dados de mais de CACHE_TTL segundos em alguma categoria (CSV local
+    antigo e Embrapa indisponível), a instância segue pronta, com o status
+    "pronto_desatualizado" e as categorias em "desatualizadas".
+    """
+    pronto = warmup.ready()
+    status = "aquecendo"
+    if pronto:
+        status = "pronto_desatualizado" if warmup.desatualizadas() else "pronto"
+    return JSONResponse(
+        status_code=200 if pronto else 503,
+        content={"status": status, **warmup.status()},
+    )
@@ -0,0 +1,65 @@
+"""
+Endpoint de métricas derivadas dos dados de comércio exterior: preço
+unitário, participação no total e saldo comercial por país e ano.
+"""
+from fastapi import APIRouter, Depends, Query, HTTPException, Path
+from typing import Dict, Any, Optional
+from src.utils.csv_downloader import csv_downloader, resolve_categoria
+from src.utils.filter_parser import parse_filters, apply_filters
+from src.utils.trade_metrics import TradeBalance, CONTRAPARTES, registros
+from src.utils.profiling import span
+import logging
+
+router = APIRouter(tags=["Métricas"])
+
+logger = logging.getLogger(__name__)
+
+# Saldos compartilhados, refeitos quando a categoria ou a contraparte muda de versão
+saldos = TradeBalance(csv_downloader)
+
+@router.get("/{modulo}/{tipo}/metricas")
+async def get_metricas(
+    modulo: str = Path(..., description="Módulo: importacao ou exportacao"),
+    tipo: str = Path(..., description="Tipo dentro do módulo, ex.: vinho"),
+    filtros: Dict[str, Any] = Depends(parse_filters),
+    ano_inicio: Optional[int] = Query(None, description="Primeiro ano"),
+    ano_fim: Optional[int] = Query(None, description="Último ano")
+) -> Dict[str, Any]:
+    """
+    Retorna um registro por país e ano com o preço unitário (US$/kg), a
+    participação do país no total do ano (em quantidade e em valor) e, quando
+    há arquivo correspondente, o saldo comercial (exportação − importação).
+
+    Aceita os mesmos filtros dos endpoints de dados, inclusive por ano:
+    `/api/v1/exportacao/vinho/metricas?q=País=Chile,ano=2019`
+    """
+    chave = resolve_categoria(modulo, tipo)
+    if chave is None:
+        raise HTTPException(status_code=400, detail="Módulo/tipo inválido.")
+    metricas = csv_downloader.get_trade_metrics(chave)
+    matriz = csv_downloader.get_year_matrix(chave)
+    if matriz is None:
+        raise HTTPException(status_code=500, detail="Não foi possível obter dados.")
+    if metricas is None:
+        raise HTTPException(status_code=400, detail=f"Métricas disponíveis apenas para importação e exportação: {chave}.")
+    logger.debug("Recebendo métricas: %s", chave)
+
+    coluna = metricas["coluna"] or "entidade"
+    fatia = matriz.intervalo_anos(ano_inicio, ano_fim)
+    linhas = range(len(matriz.entidades))
+    anos = range(*fatia.indices(len(matriz.anos)))
+    with span("filtros"):
+        # Entidade e ano restringem as linhas e colunas da matriz antes de montar os registros
+        if filtros and coluna in filtros:
+            alvo = str(filtros[coluna]).lower()
+            linhas = [pos for pos in linhas if str(matriz.entidades[pos]).lower() == alvo]
+        if filtros and "ano" in filtros:
+            alvo = str(filtros["ano"]).lower()
+            anos = [j for j in anos if str(int(matriz.anos[j])) == alvo]
+        dados = registros(matriz, metricas, saldos.saldo(chave), list(linhas), list(anos))
+        dados = apply_filters(dados, filtros)
+    return {
+        "categoria": chave,
+        "contraparte": CONTRAPARTES.get(chave),
+        "data": dados,
+    }
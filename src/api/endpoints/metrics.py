@@ -0,0 +1,122 @@
+"""
+Endpoint de métricas no formato do Prometheus.
+"""
+import os
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.utils.csv_downloader import csv_downloader
+from src.utils.circuit_breaker import breakers_status, CircuitBreaker
+from src.utils.upstream import upstream
+from src.utils.events import eventos
+from src.utils.admission import admissao
+from src.utils.metrics import registry, CACHE_LOOKUPS
+
+router = APIRouter(tags=["Observabilidade"])
+
+# Contadores do cliente upstream expostos como counters do Prometheus
+CONTADORES_UPSTREAM = {
+    "requisicoes": ("vitibrasil_upstream_requests_total", "Chamadas ao site da Embrapa"),
+    "tentativas": ("vitibrasil_upstream_attempts_total", "Requisições HTTP feitas, incluindo retentativas e hedges"),
+    "retentativas": ("vitibrasil_upstream_retries_total", "Retentativas após falha"),
+    "hedges": ("vitibrasil_upstream_hedges_total", "Requisições de hedge disparadas"),
+    "hedges_vencedores": ("vitibrasil_upstream_hedges_won_total", "Hedges que responderam primeiro"),
+    "falhas": ("vitibrasil_upstream_errors_total", "Chamadas que falharam após todas as tentativas"),
+    "recusadas_circuito": ("vitibrasil_upstream_circuit_rejected_total", "Chamadas recusadas com o circuito aberto"),
+    "bytes": ("vitibrasil_upstream_bytes_total", "Bytes recebidos da Embrapa"),
+}
+
+ESTADOS_CIRCUITO = {CircuitBreaker.FECHADO: 0, CircuitBreaker.MEIO_ABERTO: 1, CircuitBreaker.ABERTO: 2}
+
+@registry.collector
+def coletar_upstream():
+    """
+    Contadores do cliente upstream e estado dos circuit breakers.
+    """
+    contadores = upstream.metrics()
+    for chave, (nome, ajuda) in CONTADORES_UPSTREAM.items():
+        yield nome, "counter", ajuda, [(nome, {}, contadores[chave])]
+    yield (
+        "vitibrasil_upstream_circuit_state",
+        "gauge",
+        "Estado do circuit breaker por host (0 fechado, 1 meio-aberto, 2 aberto)",
+        [("vitibrasil_upstream_circuit_state", {"host": host}, ESTADOS_CIRCUITO[estado["estado"]])
+         for host, estado in breakers_status().items()],
+    )
+
+@registry.collector
+def coletar_datasets():
+    """
+    Linhas, memória, versão e idade de cada dataset em cache, e uso total frente ao orçamento.
+    """
+    linhas, memoria, versao, idade = [], [], [], []
+    for categoria, estado in csv_downloader.status().items():
+        if not estado["carregado"]:
+            continue
+        rotulos = {"categoria": categoria}
+        linhas.append(("vitibrasil_dataset_rows", rotulos, estado["linhas"]))
+        for estrutura, valor in estado["bytes"].items():
+            memoria.append(("vitibrasil_dataset_memory_bytes", {**rotulos, "estrutura": estrutura}, valor))
+        versao.append(("vitibrasil_dataset_version", rotulos, estado["versao"]))
+        idade.append(("vitibrasil_dataset_age_seconds", rotulos, estado["idade"]))
+    yield "vitibrasil_dataset_rows", "gauge", "Linhas de cada dataset em cache", linhas
+    yield "vitibrasil_dataset_memory_bytes", "gauge", "Memória ocupada por dataset e estrutura", memoria
+    yield "vitibrasil_dataset_version", "gauge", "Versão do dataset em cache", versao
+    yield "vitibrasil_dataset_age_seconds", "gauge", "Segundos desde a última carga do dataset", idade
+
+    orcamento = csv_downloader.memory_budget()
+    yield "vitibrasil_cache_memory_bytes", "gauge", "Memória ocupada por todo o cache de datasets", [
+        ("vitibrasil_cache_memory_bytes", {}, orcamento["bytes"])
+    ]
+    yield "vitibrasil_cache_budget_bytes", "gauge", "Orçamento de memória do cache (CACHE_MAX_BYTES; 0 = ilimitado)", [
+        ("vitibrasil_cache_budget_bytes", {}, orcamento["orcamento"])
+    ]
+
+    consultas = {}
+    for _, rotulos, valor in CACHE_LOOKUPS.amostras():
+        consultas.setdefault(rotulos["categoria"], {})[rotulos["resultado"]] = valor
+    yield "vitibrasil_cache_hit_ratio", "gauge", "Fração das consultas ao cache atendidas sem recarga", [
+        ("vitibrasil_cache_hit_ratio", {"categoria": categoria}, valores.get("hit", 0) / sum(valores.values()))
+        for categoria, valores in consultas.items()
+    ]
+
+@registry.collector
+def coletar_eventos():
+    """
+    Clientes conectados ao stream de eventos.
+    """
+    yield "vitibrasil_events_subscribers", "gauge", "Clientes conectados ao stream /api/v1/events", [
+        ("vitibrasil_events_subscribers", {}, eventos.assinantes())
+    ]
+
+@registry.collector
+def coletar_admissao():
+    """
+    Vagas ocupadas e fila de cada compartimento do controle de admissão.
+    """
+    ativos, esperando = [], []
+    for nome, estado in admissao.status()["compartimentos"].items():
+        ativos.append(("vitibrasil_admission_in_flight", {"compartimento": nome}, estado["ativos"]))
+        esperando.append(("vitibrasil_admission_queued", {"compartimento": nome}, estado["esperando"]))
+    yield "vitibrasil_admission_in_flight", "gauge", "Requisições em andamento por compartimento", ativos
+    yield "vitibrasil_admission_queued", "gauge", "Requisições aguardando vaga por compartimento", esperando
+
+@registry.collector
+def coletar_processo():
+    """
+    Memória residente do processo (Linux).
+    """
+    try:
+        with open("/proc/self/statm") as arquivo:
+            residente = int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return
+    yield "process_resident_memory_bytes", "gauge", "Memória residente do processo", [
+        ("process_resident_memory_bytes", {}, residente)
+    ]
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Métricas da API e do pipeline de dados no formato de texto do Prometheus.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -3,25 +3,25 @@ Endpoint para dados de produção.
 """
 from fastapi import APIRouter, Depends, Query, HTTPException, Path
 from typing import Dict, Any, Optional
-from src.utils.csv_downloader import CSVDownloader
-from src.utils.filter_parser import parse_filters
+from src.utils.csv_downloader import csv_downloader
+from src.utils.filter_parser import parse_filters, apply_filters
+from src.utils.profiling import span
+from src.api.endpoints.export import Formato, exigir_pyarrow, resposta_colunar
 import os
 from enum import Enum
 
 router = APIRouter(prefix="/producao", tags=["Produção"])
 
-# Inicializa o downloader de CSV
-data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
-# Instanciar o CSVDownloader com o diretório /tmp
-csv_downloader = CSVDownloader(data_dir="/tmp")
-
 class ProducaoTipo(str, Enum):
     producao = "producao"
 
 @router.get("/{tipo}")
 async def get_producao_tipo(
     tipo: ProducaoTipo = Path(..., description="Tipo de produção. Valores válidos: producao"),
-    filtros: Dict[str, Any] = Depends(parse_filters)
+    filtros: Dict[str, Any] = Depends(parse_filters),
+    nivel: Optional[int] = Query(None, ge=1, le=2, description="1 para categorias, 2 para produtos"),
+    pai: Optional[str] = Query(None, description="Retorna apenas os produtos da categoria informada"),
+    formato: Formato = Query(Formato.json, alias="format", description="json (padrão), arrow (IPC stream) ou parquet")
 ) -> Dict[str, Any]:
     """
     Retorna dados de produção de acordo com o tipo especificado.
@@ -31,22 +31,46 @@ async def get_producao_tipo(
     ]
     if tipo not in tipos_validos:
         raise HTTPException(status_code=400, detail="Tipo de produção inválido. Tipos válidos: producao.")
+    exigir_pyarrow(formato)
     try:
-        dados = csv_downloader.get_data(tipo)
+        with span("cache"):
+            dados = csv_downloader.get_data(tipo)
         if not dados:
             raise HTTPException(status_code=500, detail="Não foi possível obter dados de produção.")
+        # Seleciona por nível/pai usando o índice hierárquico
+        if nivel is not None or pai is not None:
+            hierarquia = csv_downloader.get_hierarchy(tipo)
+            if hierarquia is None:
+                raise HTTPException(status_code=400, detail="Hierarquia indisponível para este tipo.")
+            registros = dados["data"]
+            with span("hierarquia"):
+                dados["data"] = [registros[pos] for pos in hierarquia.linhas(nivel, pai)]
         # Aplica filtros se fornecidos
         if filtros:
-            dados_filtrados = []
-            for item in dados["data"]:
-                match = True
-                for key, value in filtros.items():
-                    if key in item and str(item[key]).lower() != str(value).lower():
-                        match = False
-                        break
-                if match:
-                    dados_filtrados.append(item)
-            dados["data"] = dados_filtrados
+            with span("filtros"):
+                dados["data"] = apply_filters(dados["data"], filtros)
+        if formato != Formato.json:
+            return resposta_colunar(tipo.value, dados["data"], formato)
         return dados
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao processar dados de produção: {str(e)}")
+
+@router.get("/{tipo}/totais")
+async def get_producao_totais(
+    tipo: ProducaoTipo = Path(..., description="Tipo de produção. Valores válidos: producao"),
+    pai: Optional[str] = Query(None, description="Categoria cuja subárvore será somada")
+) -> Dict[str, Any]:
+    """
+    Retorna os totais anuais por categoria, sem dupla contagem de subprodutos.
+    """
+    hierarquia = csv_downloader.get_hierarchy(tipo)
+    if hierarquia is None:
+        raise HTTPException(status_code=500, detail="Não foi possível obter dados de produção.")
+    if pai is not None:
+        totais = hierarquia.soma_subarvore(pai)
+        if totais is None:
+            raise HTTPException(status_code=404, detail=f"Categoria não encontrada: {pai}")
+        return {"pai": pai, "totais": totais}
+    return {"totais": hierarquia.totais(), "categorias": hierarquia.resumo()}
@@ -0,0 +1,46 @@
+"""
+Endpoint de busca de produtos, cultivares e países em todas as categorias.
+"""
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional
+from src.utils.admission import admissao, Saturado
+from src.utils.csv_downloader import csv_downloader, CSVDownloader
+from src.utils.search_index import CatalogSearch
+import logging
+
+router = APIRouter(prefix="/search", tags=["Busca"])
+
+logger = logging.getLogger(__name__)
+
+# Índice compartilhado, reconstruído quando algum dataset muda de versão
+catalogo = CatalogSearch(csv_downloader)
+
+@router.get("")
+async def buscar(
+    q: str = Query(..., min_length=2, description="Texto buscado, com ou sem acentos, ex.: estados unidos"),
+    categorias: Optional[str] = Query(None, description="Restringe às categorias informadas, separadas por vírgula"),
+    limite: int = Query(10, ge=1, le=100, description="Número máximo de resultados")
+) -> Dict[str, Any]:
+    """
+    Busca entidades (produtos, cultivares e países) pelo nome, sem diferenciar
+    acentos nem maiúsculas e tolerando erros de digitação.
+
+    Cada resultado traz o nome como aparece nos dados e as categorias em que
+    ocorre, com a categoria pai, prontos para filtrar o endpoint do dataset.
+    Exemplo: `/api/v1/search?q=alemanha republica`
+    """
+    filtro = None
+    if categorias:
+        filtro = {c.strip() for c in categorias.split(',') if c.strip()}
+        invalidas = filtro - set(CSVDownloader.DOWNLOAD_URLS)
+        if invalidas:
+            raise HTTPException(status_code=400, detail=f"Categorias inválidas: {', '.join(sorted(invalidas))}.")
+    logger.debug("Recebendo busca: %s", q)
+    # Construir o índice pode exigir carregar datasets: fora do event loop, com as vagas dessas categorias
+    try:
+        async with admissao.categorias(catalogo.pendentes()):
+            indice = await run_in_threadpool(catalogo.indice)
+    except Saturado as e:
+        raise admissao.recusa(e)
+    return {"consulta": q, "resultados": indice.buscar(q, limite, filtro)}
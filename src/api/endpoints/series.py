@@ -0,0 +1,137 @@
+"""
+Endpoint de séries temporais servidas a partir da matriz densa entidade x ano.
+"""
+from fastapi import APIRouter, Query, HTTPException, Path
+from typing import Dict, Any, Optional
+from src.utils.csv_downloader import csv_downloader, resolve_categoria
+from src.utils import series_analytics
+from enum import Enum
+import logging
+
+import numpy as np
+
+router = APIRouter(tags=["Séries"])
+
+logger = logging.getLogger(__name__)
+
+class Medida(str, Enum):
+    quantidade = "quantidade"
+    valor = "valor"
+
+def _lista(valores: np.ndarray) -> list:
+    """
+    Converte o array em lista JSON, trocando NaN por None.
+    """
+    return [None if np.isnan(v) else float(v) for v in valores.tolist()]
+
+def _valor(valor: float) -> Optional[float]:
+    """
+    Converte um escalar em valor JSON, trocando NaN por None.
+    """
+    return None if np.isnan(valor) else round(float(valor), 6)
+
+@router.get("/{modulo}/{tipo}/series")
+async def get_series(
+    modulo: str = Path(..., description="Módulo, ex.: exportacao"),
+    tipo: str = Path(..., description="Tipo dentro do módulo, ex.: vinho"),
+    entidade: Optional[str] = Query(None, description="País/produto; se omitido, soma todas as entidades"),
+    ano: Optional[int] = Query(None, description="Retorna o valor de cada entidade neste ano (com entidade, apenas o dela)"),
+    medida: Medida = Query(Medida.quantidade, description="quantidade ou valor (US$)"),
+    ano_inicio: Optional[int] = Query(None, description="Primeiro ano da série"),
+    ano_fim: Optional[int] = Query(None, description="Último ano da série")
+) -> Dict[str, Any]:
+    """
+    Retorna uma série temporal por fatiamento da matriz entidade x ano:
+    de uma entidade, a soma de todas as entidades ou o corte de um ano.
+    """
+    chave = resolve_categoria(modulo, tipo)
+    if chave is None:
+        raise HTTPException(status_code=400, detail="Módulo/tipo inválido.")
+    matriz = csv_downloader.get_year_matrix(chave)
+    if matriz is None:
+        raise HTTPException(status_code=500, detail="Não foi possível obter dados.")
+    if medida.value not in matriz.medidas:
+        raise HTTPException(status_code=400, detail=f"Medida indisponível para {chave}: {medida.value}.")
+
+    resposta = {"categoria": chave, "medida": medida.value}
+    if ano is not None:
+        valores = matriz.ano(ano, medida.value)
+        if valores is None:
+            raise HTTPException(status_code=404, detail=f"Ano não encontrado: {ano}")
+        if entidade is None:
+            return {**resposta, "ano": ano, "entidades": matriz.entidades.tolist(), "valores": _lista(valores)}
+        # Com entidade, a série dela fica restrita ao ano
+        anos = matriz.intervalo_anos(ano, ano)
+    else:
+        anos = matriz.intervalo_anos(ano_inicio, ano_fim)
+    if entidade is not None:
+        valores = matriz.serie(entidade, medida.value, anos)
+        if valores is None:
+            raise HTTPException(status_code=404, detail=f"Entidade não encontrada: {entidade}")
+    else:
+        valores = matriz.soma(medida.value, anos)
+    return {
+        **resposta,
+        "entidade": entidade,
+        "anos": matriz.anos[anos].tolist(),
+        "valores": _lista(valores),
+    }
+
+@router.get("/{modulo}/{tipo}/series/analytics")
+async def get_series_analytics(
+    modulo: str = Path(..., description="Módulo, ex.: exportacao"),
+    tipo: str = Path(..., description="Tipo dentro do módulo, ex.: vinho"),
+    medida: Medida = Query(Medida.quantidade, description="quantidade ou valor (US$)"),
+    entidade: Optional[str] = Query(None, description="País/produto; se omitido, todas as entidades"),
+    ano_inicio: Optional[int] = Query(None, description="Primeiro ano considerado"),
+    ano_fim: Optional[int] = Query(None, description="Último ano considerado"),
+    janela: int = Query(3, ge=2, le=20, description="Anos da média móvel"),
+    alfa: float = Query(0.5, gt=0, le=1, description="Fator da suavização exponencial"),
+    horizonte: int = Query(3, ge=1, le=10, description="Anos previstos após o último ano")
+) -> Dict[str, Any]:
+    """
+    Calcula, para cada entidade da categoria, a taxa de crescimento anual
+    composta (CAGR), a volatilidade das taxas de crescimento, a média móvel
+    e a previsão por suavização exponencial simples.
+    """
+    chave = resolve_categoria(modulo, tipo)
+    if chave is None:
+        raise HTTPException(status_code=400, detail="Módulo/tipo inválido.")
+    matriz = csv_downloader.get_year_matrix(chave)
+    if matriz is None:
+        raise HTTPException(status_code=500, detail="Não foi possível obter dados.")
+    if medida.value not in matriz.medidas:
+        raise HTTPException(status_code=400, detail=f"Medida indisponível para {chave}: {medida.value}.")
+    logger.debug("Recebendo análise de séries: %s", chave)
+
+    if entidade is not None:
+        linhas = matriz.linhas(entidade)
+        if not linhas:
+            raise HTTPException(status_code=404, detail=f"Entidade não encontrada: {entidade}")
+    else:
+        linhas = list(range(len(matriz.entidades)))
+    # Somas acumuladas calculadas uma vez por versão do dataset
+    base = csv_downloader.get_derived(chave, "analitica", series_analytics.bases)[medida.value]
+    analise = series_analytics.analisar(
+        base, matriz.anos, matriz.intervalo_anos(ano_inicio, ano_fim), linhas, janela, alfa, horizonte
+    )
+    hierarquia = csv_downloader.get_hierarchy(chave)
+    return {
+        "categoria": chave,
+        "medida": medida.value,
+        "janela": janela,
+        "alfa": alfa,
+        "anos": analise["anos"].tolist(),
+        "anos_previsao": analise["anos_previsao"],
+        "entidades": [
+            {
+                "entidade": str(matriz.entidades[pos]),
+                "pai": hierarquia.pais[pos] if hierarquia is not None else None,
+                "cagr": _valor(analise["cagr"][i]),
+                "volatilidade": _valor(analise["volatilidade"][i]),
+                "media_movel": _lista(analise["media_movel"][i]),
+                "previsao": _lista(analise["previsao"][i]),
+            }
+            for i, pos in enumerate(linhas)
+        ],
+    }
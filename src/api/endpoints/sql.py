@@ -0,0 +1,46 @@
+"""
+Endpoint de consultas SQL somente leitura sobre o espelho SQLite dos datasets.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Dict, Any
+from src.api.endpoints.admin import exigir_admin
+from src.utils.admission import admissao, Saturado
+from src.utils.config import SQL_MAX_ROWS, ADMIN_TOKEN
+from src.utils.csv_downloader import csv_downloader
+from src.utils.sql_mirror import SQLMirror, ConsultaInvalida
+import logging
+
+router = APIRouter(prefix="/sql", tags=["SQL"], dependencies=[Depends(exigir_admin)])
+
+logger = logging.getLogger(__name__)
+
+# Espelho compartilhado, remontado a cada nova versão instalada; sem ADMIN_TOKEN o endpoint
+# fica desativado e o espelho não é montado
+espelho = SQLMirror(csv_downloader, acompanhar=bool(ADMIN_TOKEN))
+
+class ConsultaSQL(BaseModel):
+    sql: str = Field(..., description="Uma instrução SELECT, ex.: SELECT ano, SUM(valor) FROM exportacao_vinho GROUP BY ano")
+    limite: int = Field(SQL_MAX_ROWS, ge=1, le=SQL_MAX_ROWS, description="Número máximo de linhas retornadas")
+
+@router.post("")
+async def post_sql(consulta: ConsultaSQL) -> Dict[str, Any]:
+    """
+    Executa uma consulta somente leitura sobre a tabela `dados` (categoria,
+    entidade, pai, folha, ano, quantidade, valor), as visões por categoria e a
+    tabela `categorias`.
+
+    Exige o cabeçalho X-Admin-Token. A consulta é interrompida após
+    SQL_TIMEOUT segundos e o resultado, limitado a `limite` linhas
+    (`truncado` indica que havia mais).
+    """
+    logger.debug("Recebendo consulta SQL: %s", consulta.sql)
+    try:
+        # Só a primeira consulta monta o espelho e pode carregar datasets: com as vagas dessas categorias
+        async with admissao.categorias([] if espelho.pronto() else espelho.pendentes()):
+            return await run_in_threadpool(espelho.consultar, consulta.sql, consulta.limite)
+    except Saturado as e:
+        raise admissao.recusa(e)
+    except ConsultaInvalida as e:
+        raise HTTPException(status_code=400, detail=f"Consulta inválida: {str(e)}")
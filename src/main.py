@@ -2,11 +2,47 @@
 Aplicação principal da API de Vitivinicultura da Embrapa.
 """
 import os
-from fastapi import FastAPI, HTTPException
+import time
+import asyncio
+from contextlib import asynccontextmanager, AsyncExitStack
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.openapi.utils import get_openapi
 from src.api.endpoints import router
-from src.utils.config import API_TITLE, API_DESCRIPTION, API_VERSION
+from src.api.endpoints import health
+from src.api.endpoints import metrics
+from src.api.endpoints import admin
+from src.utils.config import API_TITLE, API_DESCRIPTION, API_VERSION, REFRESH_ENABLED, PROFILING_ENABLED
+from src.utils.csv_downloader import csv_downloader
+from src.utils.scheduler import RefreshScheduler
+from src.utils.metrics import REQUEST_LATENCY
+from src.utils.profiling import profiler
+from src.utils.admission import admissao, categoria_da_rota, Saturado, ISENTAS
+from src.utils.logger import configure_logging
+
+# Logging estruturado, escrito por uma thread fora do caminho das requisições
+configure_logging()
+
+# Agendador de atualização dos datasets em segundo plano
+scheduler = RefreshScheduler(csv_downloader)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicia e encerra as tarefas de segundo plano junto com a aplicação.
+    """
+    # No modo "shared" quem atualiza os dados é o processo carregador
+    ativo = REFRESH_ENABLED and csv_downloader.modo != "shared"
+    # Aquecimento: dados locais primeiro; da Embrapa, pelo agendador ou pelo próprio aquecimento
+    aquecimento = asyncio.create_task(health.warmup.run(upstream=not ativo))
+    if ativo:
+        scheduler.start()
+    yield
+    aquecimento.cancel()
+    if ativo:
+        await scheduler.stop()
 
 # Criação da aplicação FastAPI
 app = FastAPI(
@@ -15,6 +51,7 @@ app = FastAPI(
     version=API_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Configuração de CORS para permitir acesso de diferentes origens
@@ -26,8 +63,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def _liberar_ao_fim(corpo, vaga: AsyncExitStack):
+    """
+    Repassa o corpo da resposta e libera a vaga quando o envio termina ou é interrompido.
+    """
+    try:
+        # Primeiro passo, consumido pelo middleware: com o gerador iniciado, o
+        # `finally` roda mesmo que o corpo nunca seja lido (cliente desconectado)
+        yield b""
+        async for parte in corpo:
+            yield parte
+    finally:
+        await vaga.aclose()
+
+@app.middleware("http")
+async def controlar_admissao(request: Request, call_next):
+    """
+    Limita as requisições simultâneas por categoria e no total (ver src/utils/admission.py).
+    
+    Sem vaga, responde 503 com Retry-After. Uma categoria fora do cache é
+    carregada numa thread, com a vaga ocupada, para que a carga não bloqueie
+    o event loop e as requisições das demais categorias. A vaga só é
+    devolvida depois do envio do corpo: respostas em streaming (lote com
+    stream=true) continuam trabalhando depois que `call_next` retorna.
+    """
+    caminho = request.url.path
+    if not caminho.startswith("/api/") or caminho.startswith(ISENTAS):
+        return await call_next(request)
+    categoria = categoria_da_rota(caminho)
+    vaga = AsyncExitStack()
+    try:
+        await vaga.enter_async_context(admissao.admitir(categoria))
+    except Saturado as e:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Serviço sobrecarregado, tente novamente em instantes ({e.compartimento})."},
+            headers={"Retry-After": str(admissao.retry_after)},
+        )
+    try:
+        if categoria and not csv_downloader.em_cache(categoria):
+            await run_in_threadpool(csv_downloader.preparar, categoria)
+        response = await call_next(request)
+    except BaseException:
+        await vaga.aclose()
+        raise
+    corpo = _liberar_ao_fim(response.body_iterator, vaga)
+    await corpo.__anext__()
+    response.body_iterator = corpo
+    return response
+
+@app.middleware("http")
+async def medir_latencia(request: Request, call_next):
+    """
+    Registra a latência de cada requisição por rota (o template, não o caminho).
+    """
+    inicio = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        rota = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - inicio,
+            metodo=request.method,
+            rota=rota.path if rota else "desconhecida",
+            status=status,
+        )
+
+# Perfilamento opcional das etapas de cada requisição (ver src/utils/profiling.py)
+if PROFILING_ENABLED:
+    app.middleware("http")(profiler)
+
 # Inclusão das rotas
 app.include_router(router)
+app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
 # Rota raiz
 @app.get("/", tags=["root"])
@@ -47,6 +160,15 @@ async def root():
             "/api/v1/importacao",
             "/api/v1/exportacao",
             "/api/v1/subcategorias",
+            "/api/v1/consulta",
+            "/api/v1/batch",
+            "/api/v1/search",
+            "/api/v1/export/catalogo",
+            "/api/v1/sql",
+            "/api/v1/events",
+            "/healthz",
+            "/readyz",
+            "/metrics",
         ]
     }
 
@@ -5,10 +5,10 @@ import os
 import json
 import logging
 from typing import Dict, Any, Optional, List
-import requests
 from bs4 import BeautifulSoup
 from src.utils.config import DATA_DIR, REQUEST_TIMEOUT
 from src.utils.logger import setup_logger
+from src.utils.upstream import upstream
 
 # Configuração do logger
 logger = setup_logger(__name__)
@@ -38,7 +38,7 @@ class BaseScraper:
         """
         try:
             logger.info(f"Obtendo página: {self.url}")
-            response = requests.get(self.url, timeout=REQUEST_TIMEOUT)
+            response = upstream.get(self.url, deadline=REQUEST_TIMEOUT)
             response.raise_for_status()
             
             return BeautifulSoup(response.text, 'html.parser')
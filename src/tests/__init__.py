@@ -0,0 +1,3 @@
+"""
+Testes automatizados da API (pytest).
+"""
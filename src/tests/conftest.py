@@ -0,0 +1,66 @@
+"""
+Fixtures compartilhadas dos testes.
+
+Os datasets vêm dos CSVs sintéticos de `benchmarks.fixtures`, gravados num
+diretório temporário e carregados no downloader compartilhado pelo fallback
+local. O cliente upstream fica em modo replay sobre um diretório vazio: um
+teste que tente acessar a Embrapa falha imediatamente, sem rede.
+"""
+import os
+
+# Antes de importar a aplicação: sem agendador e com logs discretos
+os.environ.setdefault("REFRESH_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import pytest
+
+from benchmarks.fixtures import escrever_fixtures
+from src.utils.cassette import Cassette
+from src.utils.csv_downloader import csv_downloader, CSVDownloader
+from src.utils.upstream import upstream
+
+
+@pytest.fixture(scope="session", autouse=True)
+def sem_rede(tmp_path_factory):
+    """
+    Nenhuma chamada à Embrapa durante os testes.
+    """
+    anterior = upstream.cassete
+    upstream.cassete = Cassette(str(tmp_path_factory.mktemp("cassetes")), "replay")
+    yield
+    upstream.cassete = anterior
+
+
+@pytest.fixture(scope="session")
+def dados_dir(tmp_path_factory) -> str:
+    """
+    Diretório com um CSV sintético por categoria.
+    """
+    diretorio = str(tmp_path_factory.mktemp("dados"))
+    escrever_fixtures(diretorio, list(CSVDownloader.DOWNLOAD_URLS))
+    return diretorio
+
+
+@pytest.fixture(scope="session")
+def downloader(dados_dir) -> CSVDownloader:
+    """
+    Downloader compartilhado da aplicação, com todas as categorias carregadas dos CSVs sintéticos.
+    """
+    csv_downloader.data_dir = dados_dir
+    csv_downloader._cache.clear()
+    csv_downloader._despejadas.clear()
+    csv_downloader._perfis.clear()
+    for categoria in csv_downloader.DOWNLOAD_URLS:
+        assert csv_downloader.load_local(categoria), categoria
+    return csv_downloader
+
+
+@pytest.fixture(scope="session")
+def client(downloader):
+    """
+    Cliente HTTP da aplicação, sem o lifespan (aquecimento e agendador).
+    """
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    return TestClient(app)
@@ -0,0 +1,136 @@
+"""
+Testes do controle de admissão: compartimentos por categoria nas rotas
+que acessam várias categorias e vaga do middleware mantida até o fim do
+envio do corpo.
+"""
+import asyncio
+
+import pytest
+
+from src.api.endpoints import batch, consulta
+from src.utils.admission import AdmissionControl, Saturado
+
+
+@pytest.fixture()
+def admissao(monkeypatch):
+    controle = AdmissionControl(limite_global=0, limite_categoria=0, limites={"producao": 1}, espera=0.05)
+    monkeypatch.setattr(batch, "admissao", controle)
+    monkeypatch.setattr(consulta, "admissao", controle)
+    return controle
+
+
+def test_categorias_ocupa_e_libera_as_vagas():
+    controle = AdmissionControl(limite_global=1, limite_categoria=1, espera=0.05)
+
+    async def executar():
+        async with controle.categorias(["producao", "comercializacao", "producao"]):
+            assert controle.status()["compartimentos"]["producao"]["ativos"] == 1
+            assert controle.status()["compartimentos"]["comercializacao"]["ativos"] == 1
+            # A vaga global fica com o middleware
+            assert controle.global_.ativos == 0
+            with pytest.raises(Saturado):
+                async with controle.categorias(["producao"]):
+                    pass
+        assert all(c["ativos"] == 0 for c in controle.status()["compartimentos"].values())
+
+    asyncio.run(executar())
+
+
+def test_lote_respeita_o_compartimento_da_categoria(admissao, downloader):
+    consultas = [batch.ConsultaLote(modulo="producao", tipo="producao"),
+                 batch.ConsultaLote(modulo="exportacao", tipo="vinho")]
+
+    async def executar():
+        async with admissao.categorias(["producao"]):
+            return await asyncio.gather(*(batch._admitida(i, c) for i, c in enumerate(consultas)))
+
+    producao, exportacao = asyncio.run(executar())
+    assert producao["status"] == 503
+    assert exportacao["status"] == 200
+
+
+def test_consulta_cruzada_recusada_sem_vaga(admissao, client):
+    # Vaga de producao ocupada por outra requisição
+    admissao._compartimento("producao").ocupar()
+    try:
+        resposta = client.get("/api/v1/consulta", params={"series": "producao,exportacao_vinho"})
+    finally:
+        admissao._compartimento("producao").liberar()
+    assert resposta.status_code == 503
+    assert resposta.headers["Retry-After"] == str(admissao.retry_after)
+    assert client.get("/api/v1/consulta", params={"series": "producao,exportacao_vinho"}).status_code == 200
+
+
+@pytest.fixture()
+def controle_http(monkeypatch):
+    from src import main
+
+    controle = AdmissionControl(limite_global=1, limite_categoria=0, espera=0.05)
+    monkeypatch.setattr(main, "admissao", controle)
+    return controle
+
+
+def _requisicao(caminho, corpo=b""):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": caminho, "raw_path": caminho.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"teste")],
+        "client": ("127.0.0.1", 1), "server": ("teste", 80),
+    }
+    mensagens = [{"type": "http.request", "body": corpo, "more_body": False}]
+
+    async def receive():
+        if mensagens:
+            return mensagens.pop(0)
+        await asyncio.Event().wait()
+
+    return scope, receive
+
+
+def test_vaga_ocupada_ate_o_fim_do_stream(controle_http, downloader):
+    from src.main import app
+
+    scope, receive = _requisicao(
+        "/api/v1/batch",
+        b'{"stream": true, "consultas": [{"modulo": "producao", "tipo": "producao"},'
+        b' {"modulo": "exportacao", "tipo": "vinho"}]}',
+    )
+    durante, linhas = [], []
+
+    async def send(mensagem):
+        if mensagem["type"] == "http.response.body" and mensagem["body"]:
+            durante.append(controle_http.global_.ativos)
+            linhas.append(mensagem["body"])
+
+    asyncio.run(app(scope, receive, send))
+    assert len(b"".join(linhas).splitlines()) == 2
+    # A vaga global segue ocupada enquanto o lote envia os resultados
+    assert durante and all(ativos == 1 for ativos in durante)
+    assert controle_http.global_.ativos == 0
+
+
+def test_vaga_liberada_sem_leitura_do_corpo(controle_http):
+    import gc
+
+    from starlette.requests import Request
+    from starlette.responses import StreamingResponse
+    from src.main import controlar_admissao
+
+    async def corpo():
+        yield b"nunca lido"
+
+    async def call_next(request):
+        return StreamingResponse(corpo())
+
+    async def executar():
+        scope, receive = _requisicao("/api/v1/batch")
+        resposta = await controlar_admissao(Request(scope, receive), call_next)
+        assert controle_http.global_.ativos == 1
+        # Cliente desconectado antes do corpo: a resposta é descartada sem ser enviada
+        del resposta
+        gc.collect()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return controle_http.global_.ativos
+
+    assert asyncio.run(executar()) == 0
@@ -0,0 +1,44 @@
+"""
+Testes do endpoint de consultas em lote (/api/v1/batch).
+"""
+import json
+
+URL = "/api/v1/batch"
+
+
+def test_status_por_consulta(client, downloader):
+    resposta = client.post(URL, json={"consultas": [
+        {"modulo": "producao", "tipo": "producao", "filtros": "control=VINHO DE MESA"},
+        {"modulo": "importacao", "tipo": "inexistente"},
+        {"modulo": "exportacao", "tipo": "vinho", "fields": ["id", "País"]},
+    ]})
+    assert resposta.status_code == 200
+    producao, invalida, exportacao = resposta.json()["resultados"]
+
+    assert [r["indice"] for r in (producao, invalida, exportacao)] == [0, 1, 2]
+    assert producao["status"] == 200
+    assert producao["data"]
+    assert all(linha["control"] == "VINHO DE MESA" for linha in producao["data"])
+
+    assert invalida["status"] == 400
+    assert "data" not in invalida
+
+    assert exportacao["status"] == 200
+    assert len(exportacao["data"]) == len(downloader.get_data("exportacao_vinho")["data"])
+    assert all(set(linha) == {"id", "País"} for linha in exportacao["data"])
+
+
+def test_stream_ndjson(client, downloader):
+    consultas = [{"modulo": "importacao", "tipo": tipo} for tipo in ("vinho", "espumante", "frescas")]
+    resposta = client.post(URL, json={"consultas": consultas, "stream": True})
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+    resultados = [json.loads(linha) for linha in resposta.text.splitlines() if linha]
+    assert sorted(r["indice"] for r in resultados) == [0, 1, 2]
+    assert all(r["status"] == 200 for r in resultados)
+
+
+def test_limite_de_consultas(client, downloader):
+    assert client.post(URL, json={"consultas": []}).status_code == 400
+    consultas = [{"modulo": "producao", "tipo": "producao"}] * 21
+    assert client.post(URL, json={"consultas": consultas}).status_code == 400
@@ -0,0 +1,81 @@
+"""
+Testes da máquina de estados do circuit breaker.
+"""
+import threading
+import time
+
+from src.utils.circuit_breaker import CircuitBreaker
+
+
+def _aguardar(condicao, limite: float = 2.0) -> bool:
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.01)
+    return condicao()
+
+
+def test_abre_apos_limite_de_falhas_seguidas():
+    breaker = CircuitBreaker("teste", lambda: False, limite_falhas=3, tempo_abertura=60)
+    for _ in range(2):
+        breaker.registrar_falha()
+    assert breaker.estado == CircuitBreaker.FECHADO
+    assert breaker.permitir()
+
+    breaker.registrar_falha()
+    assert breaker.estado == CircuitBreaker.ABERTO
+    assert not breaker.permitir()
+    assert breaker.status()["aberto_em"] is not None
+
+
+def test_sucesso_zera_as_falhas():
+    breaker = CircuitBreaker("teste", lambda: False, limite_falhas=3, tempo_abertura=60)
+    breaker.registrar_falha()
+    breaker.registrar_falha()
+    breaker.registrar_sucesso()
+    breaker.registrar_falha()
+    breaker.registrar_falha()
+    assert breaker.estado == CircuitBreaker.FECHADO
+    assert breaker.falhas == 2
+
+
+def test_sonda_fecha_o_circuito_quando_o_host_volta():
+    respostas = iter([False, False, True])
+    sondagens = []
+
+    def sonda():
+        sondagens.append(breaker.estado)
+        return next(respostas)
+
+    breaker = CircuitBreaker("teste", sonda, limite_falhas=1, tempo_abertura=0.02)
+    breaker.registrar_falha()
+    assert not breaker.permitir()
+
+    assert _aguardar(lambda: breaker.estado == CircuitBreaker.FECHADO)
+    # Cada sondagem acontece no estado meio-aberto; entre elas o circuito volta a abrir
+    assert sondagens == [CircuitBreaker.MEIO_ABERTO] * 3
+    assert breaker.falhas == 0
+    assert breaker.permitir()
+
+
+def test_sonda_com_erro_mantem_o_circuito_aberto():
+    chamadas = threading.Event()
+
+    def sonda():
+        chamadas.set()
+        raise OSError("host fora do ar")
+
+    breaker = CircuitBreaker("teste", sonda, limite_falhas=1, tempo_abertura=0.02)
+    breaker.registrar_falha()
+    assert chamadas.wait(2)
+    assert _aguardar(lambda: breaker.estado == CircuitBreaker.ABERTO)
+    assert not breaker.permitir()
+
+
+def test_uma_unica_thread_de_sondagem():
+    breaker = CircuitBreaker("teste", lambda: False, limite_falhas=1, tempo_abertura=60)
+    antes = threading.active_count()
+    for _ in range(5):
+        breaker.registrar_falha()
+    assert threading.active_count() - antes == 1
@@ -0,0 +1,134 @@
+"""
+Testes da exportação colunar (Arrow e Parquet): tipos das colunas, seleção
+de linhas sobre a tabela em cache, versões e orçamento de memória.
+"""
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+from benchmarks.fixtures import ANOS, carregar_dataframe
+from src.utils import columnar
+from src.utils import csv_downloader as modulo_downloader
+from src.utils.csv_downloader import CSVDownloader
+
+URL = "/api/v1/producao/producao/producao"
+CATEGORIAS = ("producao", "exportacao_vinho")
+
+
+def _ler_arrow(conteudo: bytes) -> "pa.Table":
+    return pa.ipc.open_stream(conteudo).read_all()
+
+
+def _nova_versao(downloader, categoria):
+    df = downloader._cache[categoria]["df"].copy()
+    df[str(ANOS[-1])] += 1
+    carga = downloader._process_dataframe(df, "teste", str(ANOS[-1]))
+    with downloader._locks[categoria]:
+        downloader._install(categoria, carga)
+
+
+@pytest.fixture()
+def proprio(dados_dir) -> CSVDownloader:
+    # Downloader próprio com duas categorias: os testes instalam versões e despejam categorias
+    d = CSVDownloader(data_dir=dados_dir)
+    d.DOWNLOAD_URLS = {categoria: CSVDownloader.DOWNLOAD_URLS[categoria] for categoria in CATEGORIAS}
+    for categoria in CATEGORIAS:
+        assert d.load_local(categoria)
+    return d
+
+
+def test_dataset_completo_com_os_tipos_do_csv(client):
+    resposta = client.get(URL, params={"format": "arrow"})
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    lida = _ler_arrow(resposta.content)
+    esperada = carregar_dataframe("producao")
+    assert lida.column_names == list(esperada.columns)
+    assert lida.num_rows == len(esperada)
+    assert pa.types.is_integer(lida.schema.field(str(ANOS[-1])).type)
+    assert lida.column(str(ANOS[-1])).to_pylist() == esperada[str(ANOS[-1])].tolist()
+
+
+def test_filtro_e_um_take_da_tabela_em_cache(client, downloader):
+    completa = _ler_arrow(client.get(URL, params={"format": "arrow"}).content)
+    resposta = client.get(URL, params={"format": "parquet", "nivel": 2})
+    assert resposta.status_code == 200, resposta.text
+    lida = pq.read_table(pa.BufferReader(resposta.content))
+    posicoes = downloader.get_hierarchy("producao").linhas(2, None)
+    assert lida.schema == completa.schema
+    assert lida.to_pylist() == completa.take(posicoes).to_pylist()
+
+
+def test_registros_avulsos_mantem_o_esquema(downloader):
+    colunar = downloader.get_derived("producao", "colunar", columnar._colunar)
+    # Cópias, como os registros montados a cada requisição no modo "shared"
+    copias = [dict(item) for item in downloader.get_data("producao")["data"][:3]]
+    lida = _ler_arrow(columnar.exportar(downloader, "producao", copias, "arrow"))
+    assert lida.schema == colunar["tabela"].schema
+    assert lida.to_pylist() == copias
+
+
+def test_id_reutilizado_nao_seleciona_outra_linha(downloader):
+    colunar = downloader.get_derived("producao", "colunar", columnar._colunar)
+    outro = dict(downloader.get_data("producao")["data"][5])
+    # Simula um objeto novo no endereço de um registro liberado: o id aponta para a linha 0
+    colunar["posicoes"][id(outro)] = 0
+    try:
+        lida = _ler_arrow(columnar.exportar(downloader, "producao", [outro], "arrow"))
+    finally:
+        del colunar["posicoes"][id(outro)]
+    assert lida.to_pylist() == [outro]
+
+
+def test_registros_de_versao_substituida(proprio):
+    antigos = proprio.get_data("producao")["data"]
+    anterior = proprio.get_derived("producao", "colunar", columnar._colunar)
+    _nova_versao(proprio, "producao")
+
+    novo = proprio.get_derived("producao", "colunar", columnar._colunar)
+    assert novo is not anterior
+    assert columnar._posicoes(novo, antigos[:2]) is None
+    lida = _ler_arrow(columnar.exportar(proprio, "producao", antigos[:2], "arrow"))
+    assert lida.schema == novo["tabela"].schema
+    assert lida.to_pylist() == antigos[:2]
+    assert lida.column(str(ANOS[-1])).to_pylist() != [item[str(ANOS[-1])] for item in novo["registros"][:2]]
+
+
+def test_catalogo_conta_no_orcamento_sem_trazer_despejadas(proprio, monkeypatch):
+    monkeypatch.setattr(modulo_downloader, "CACHE_MAX_BYTES", 1)
+    proprio._aplicar_orcamento("exportacao_vinho")
+    assert list(proprio._cache) == ["exportacao_vinho"]
+
+    catalogo = columnar.CatalogExport(proprio)
+    lida = pq.read_table(pa.BufferReader(catalogo.exportar("parquet")))
+    assert lida.num_rows == sum(len(carregar_dataframe(categoria)) * len(ANOS) for categoria in CATEGORIAS)
+    assert sorted(set(lida.column("categoria").to_pylist())) == sorted(CATEGORIAS)
+
+    orcamento = proprio.memory_budget()
+    assert orcamento["externas"]["catalogo_colunar"] == catalogo.memoria() > 0
+    # producao foi lida do disco só para a montagem; exportacao_vinho saiu para dar lugar ao catálogo
+    assert not proprio._cache
+    assert sorted(orcamento["despejadas"]) == sorted(CATEGORIAS)
+
+
+def test_catalogo_refeito_na_nova_versao(proprio):
+    catalogo = columnar.CatalogExport(proprio)
+    primeiro = catalogo.exportar("arrow")
+    assert catalogo.exportar("arrow") is primeiro
+    tabela_vinho = catalogo._tabelas["exportacao_vinho"]
+
+    _nova_versao(proprio, "producao")
+    segundo = catalogo.exportar("arrow")
+    assert segundo != primeiro
+    # Só a categoria com nova versão foi refeita
+    assert catalogo._tabelas["exportacao_vinho"] is tabela_vinho
+    assert catalogo._versoes["producao"] == 2
+
+
+def test_endpoint_do_catalogo(client):
+    resposta = client.get("/api/v1/export/catalogo", params={"format": "arrow"})
+    assert resposta.status_code == 200, resposta.text
+    assert 'filename="vitibrasil.arrow"' in resposta.headers["content-disposition"]
+    lida = _ler_arrow(resposta.content)
+    assert lida.column_names == ["categoria", "entidade", "pai", "folha", "ano", "quantidade", "valor"]
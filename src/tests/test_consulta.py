@@ -0,0 +1,86 @@
+"""
+Testes do endpoint de consulta cruzada (/api/v1/consulta).
+"""
+import asyncio
+import math
+
+import pytest
+
+from src.api.endpoints import consulta
+
+URL = "/api/v1/consulta"
+
+
+def _por_ano(downloader, categoria, medida="quantidade"):
+    longo = downloader.get_long_data(categoria)
+    return longo[longo["folha"]].groupby("ano")[medida].sum(min_count=1).to_dict()
+
+
+def _resultado(resposta):
+    assert resposta.status_code == 200, resposta.text
+    return {linha["ano"]: linha["resultado"] for linha in resposta.json()["data"]}
+
+
+def _proximos(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return math.isclose(a, b, rel_tol=1e-9)
+
+
+def test_soma_confere_com_o_calculo_manual(client, downloader):
+    resultado = _resultado(client.get(URL, params={"series": "producao,comercializacao", "operacao": "soma"}))
+    producao = _por_ano(downloader, "producao")
+    comercializacao = _por_ano(downloader, "comercializacao")
+    for ano in producao.keys() | comercializacao.keys():
+        partes = [v for v in (producao.get(ano), comercializacao.get(ano)) if v is not None and not math.isnan(v)]
+        assert _proximos(resultado[ano], sum(partes) if partes else None), ano
+
+
+def test_razao_confere_com_o_calculo_manual(client, downloader):
+    resposta = client.get(URL, params={"series": "exportacao_vinho,producao", "operacao": "razao",
+                                       "ano_inicio": 2000, "ano_fim": 2010})
+    resultado = _resultado(resposta)
+    assert set(resultado) <= set(range(2000, 2011))
+    exportacao = _por_ano(downloader, "exportacao_vinho")
+    producao = _por_ano(downloader, "producao")
+    for ano, valor in resultado.items():
+        esperado = exportacao[ano] / producao[ano] if producao.get(ano) else None
+        assert _proximos(valor, esperado), ano
+
+
+@pytest.mark.parametrize("params", [
+    {"series": "producao,inexistente"},
+    {"series": ",".join(["producao", "processamento_viniferas", "processamento_americanas",
+                          "processamento_mesa", "comercializacao", "exportacao_vinho", "importacao_vinho"])},
+    {"series": "producao", "operacao": "razao"},
+    {"series": "producao,producao", "operacao": "razao"},
+    {"series": "producao,producao", "operacao": "diferenca"},
+    {"series": "producao,comercializacao,producao", "operacao": "soma"},
+])
+def test_parametros_invalidos(client, downloader, params):
+    assert client.get(URL, params=params).status_code == 400
+
+
+def test_ate_max_series_categorias(client, downloader):
+    categorias = ["producao", "processamento_viniferas", "processamento_americanas",
+                  "processamento_mesa", "comercializacao", "exportacao_vinho"]
+    assert len(categorias) == consulta.MAX_SERIES
+    resposta = client.get(URL, params={"series": ",".join(categorias), "operacao": "soma"})
+    assert resposta.status_code == 200, resposta.text
+
+
+def test_agregacao_fora_do_event_loop(client, downloader, monkeypatch):
+    no_loop = []
+    original = consulta._serie
+
+    def _serie(*args):
+        try:
+            asyncio.get_running_loop()
+            no_loop.append(True)
+        except RuntimeError:
+            no_loop.append(False)
+        return original(*args)
+
+    monkeypatch.setattr(consulta, "_serie", _serie)
+    _resultado(client.get(URL, params={"series": "producao,comercializacao", "operacao": "soma"}))
+    assert no_loop == [False, False]
@@ -0,0 +1,114 @@
+"""
+Testes da detecção do formato dos CSVs (codificação, separador e cabeçalho)
+e do perfil salvo por categoria no CSVDownloader.
+"""
+import json
+import os
+
+import pytest
+
+from src.utils import csv_dialect
+from src.utils.csv_downloader import CSVDownloader
+
+CATEGORIA = "processamento_viniferas"
+
+LINHAS = [
+    ["id", "control", "cultivar", "2021", "2022"],
+    ["1", "TINTAS", "TINTAS", "300", "330"],
+    ["2", "ti_Cabernet", "Cabernet Sauvignon", "100", "110"],
+    ["3", "ti_Moscato", "Moscato Giallo", "200", "220"],
+    ["4", "BRANCAS", "BRANCAS", "50", "55"],
+    ["5", "br_Vinifera", "Viníferas - Gewürztraminer", "50", "55"],
+]
+
+
+def _csv(sep: str = ";", encoding: str = "utf-8", titulo=()) -> bytes:
+    texto = "\n".join([*titulo, *(sep.join(linha) for linha in LINHAS)]) + "\n"
+    return texto.encode(encoding)
+
+
+@pytest.fixture(params=["pandas", "stdlib"])
+def downloader(request, tmp_path) -> CSVDownloader:
+    d = CSVDownloader(data_dir=str(tmp_path))
+    d.leitor = request.param
+    return d
+
+
+def _formato_salvo(downloader) -> dict:
+    with open(os.path.join(downloader.data_dir, CATEGORIA, "formato.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _registros(carga) -> list:
+    return carga["result"]["data"]
+
+
+def test_codificacao():
+    assert csv_dialect.codificacao("Viníferas".encode("utf-8")) == "utf-8-sig"
+    assert csv_dialect.codificacao("Viníferas".encode("cp1252")) == "cp1252"
+    # 0x81 não existe em cp1252: só o latin-1 decodifica
+    assert csv_dialect.codificacao(b"\x81abc") == "latin-1"
+
+
+@pytest.mark.parametrize("sep", [";", "\t", ","])
+def test_detecta_o_separador(sep):
+    assert csv_dialect.detectar(_csv(sep)) == {"encoding": "utf-8-sig", "sep": sep, "cabecalho": 0}
+
+
+def test_detecta_cp1252_e_linhas_de_titulo():
+    conteudo = _csv("\t", "cp1252", titulo=["Processamento de uvas viníferas", "", "Quantidade (kg)"])
+    assert csv_dialect.detectar(conteudo) == {"encoding": "cp1252", "sep": "\t", "cabecalho": 3}
+
+
+def test_conteudo_vazio_usa_o_padrao():
+    assert csv_dialect.detectar(b"\n\n") == csv_dialect.PADRAO
+
+
+def test_arquivo_com_tabulacao(downloader):
+    carga = downloader._parse_csv(_csv("\t"), "teste", "2022", CATEGORIA)
+    assert [linha["cultivar"] for linha in _registros(carga)] == [linha[2] for linha in LINHAS[1:]]
+    assert _registros(carga)[1]["2022"] == 110
+    assert _formato_salvo(downloader) == {"encoding": "utf-8-sig", "sep": "\t", "cabecalho": 0}
+
+
+def test_arquivo_cp1252_com_titulo(downloader):
+    conteudo = _csv(";", "cp1252", titulo=["Processamento de uvas viníferas", ""])
+    carga = downloader._parse_csv(conteudo, "teste", "2022", CATEGORIA)
+    assert _registros(carga)[-1]["cultivar"] == "Viníferas - Gewürztraminer"
+    assert list(_registros(carga)[0]) == LINHAS[0]
+    assert _formato_salvo(downloader) == {"encoding": "cp1252", "sep": ";", "cabecalho": 2}
+
+
+def test_perfil_salvo_e_reutilizado(downloader, monkeypatch):
+    downloader._parse_csv(_csv("\t"), "teste", "2022", CATEGORIA)
+    # Outro processo (ou um reinício) lê o formato do disco, sem detectar de novo
+    outro = CSVDownloader(data_dir=downloader.data_dir)
+    outro.leitor = downloader.leitor
+
+    def detectar(conteudo):
+        raise AssertionError("formato detectado de novo")
+
+    monkeypatch.setattr(csv_dialect, "detectar", detectar)
+    carga = outro._parse_csv(_csv("\t"), "teste", "2022", CATEGORIA)
+    assert len(_registros(carga)) == len(LINHAS) - 1
+
+
+def test_perfil_salvo_que_nao_serve_mais_e_detectado_de_novo(downloader):
+    os.makedirs(os.path.join(downloader.data_dir, CATEGORIA), exist_ok=True)
+    # A Embrapa trocou o separador: o perfil salvo lê uma única coluna
+    downloader._salvar_perfil(CATEGORIA, {"encoding": "utf-8-sig", "sep": ";", "cabecalho": 0})
+    downloader._perfis.clear()
+    carga = downloader._parse_csv(_csv("\t"), "teste", "2022", CATEGORIA)
+    assert list(_registros(carga)[0]) == LINHAS[0]
+    assert _formato_salvo(downloader)["sep"] == "\t"
+    assert downloader._perfis[CATEGORIA]["sep"] == "\t"
+
+
+def test_perfil_salvo_invalido_e_ignorado(downloader):
+    os.makedirs(os.path.join(downloader.data_dir, CATEGORIA), exist_ok=True)
+    with open(os.path.join(downloader.data_dir, CATEGORIA, "formato.json"), "w", encoding="utf-8") as f:
+        f.write('{"sep": ";"')
+    assert downloader._perfil_csv(CATEGORIA) is None
+    carga = downloader._parse_csv(_csv("\t"), "teste", "2022", CATEGORIA)
+    assert len(_registros(carga)) == len(LINHAS) - 1
+    assert _formato_salvo(downloader) == {"encoding": "utf-8-sig", "sep": "\t", "cabecalho": 0}
@@ -0,0 +1,65 @@
+"""
+Testes do stream de eventos: histórico por Last-Event-ID e filtro por categoria.
+"""
+import asyncio
+
+from src.api.endpoints import events as endpoint
+from src.utils.events import EventBus, diferencas
+
+
+class RequisicaoFalsa:
+    async def is_disconnected(self):
+        return False
+
+
+def _coletar(bus, monkeypatch, quantidade, categorias=None, desde=None, publicar=()):
+    """
+    Lê os primeiros `quantidade` blocos do stream SSE, publicando `publicar` depois de assinar.
+    """
+    monkeypatch.setattr(endpoint, "eventos", bus)
+
+    async def executar():
+        stream = endpoint._stream(RequisicaoFalsa(), categorias, desde)
+        blocos = [await stream.__anext__()]
+        for categoria in publicar:
+            bus.publicar("versao", {"categoria": categoria})
+        while len(blocos) < quantidade:
+            blocos.append(await asyncio.wait_for(stream.__anext__(), 1))
+        await stream.aclose()
+        return blocos
+
+    return asyncio.run(executar())
+
+
+def test_reconexao_recebe_os_eventos_perdidos(monkeypatch):
+    bus = EventBus(historico=10)
+    for categoria in ("producao", "comercializacao", "exportacao_vinho"):
+        bus.publicar("versao", {"categoria": categoria})
+
+    blocos = _coletar(bus, monkeypatch, 3, desde=1)
+    assert blocos[0] == f"retry: {endpoint.RETRY_MS}\n\n"
+    assert blocos[1].startswith("id: 2\nevent: versao\n")
+    assert blocos[2].startswith("id: 3\n")
+    assert '"exportacao_vinho"' in blocos[2]
+    assert bus.assinantes() == 0
+
+
+def test_sem_last_event_id_recebe_apenas_os_novos(monkeypatch):
+    bus = EventBus()
+    bus.publicar("versao", {"categoria": "producao"})
+    blocos = _coletar(bus, monkeypatch, 2, publicar=["comercializacao"])
+    assert blocos[1].startswith("id: 2\n")
+
+
+def test_filtro_por_categoria(monkeypatch):
+    bus = EventBus()
+    blocos = _coletar(bus, monkeypatch, 2, categorias={"exportacao_vinho"},
+                      publicar=["producao", "comercializacao", "exportacao_vinho"])
+    assert blocos[1].startswith("id: 3\n")
+
+
+def test_diferencas_por_id():
+    anteriores = [{"id": 1, "v": 1.0}, {"id": 2, "v": float("nan")}, {"id": 3, "v": 3.0}]
+    novos = [{"id": 1, "v": 1.0}, {"id": 2, "v": float("nan")}, {"id": 3, "v": 4.0}, {"id": 4, "v": 5.0}]
+    assert diferencas(anteriores, novos) == {"adicionadas": 1, "removidas": 0, "alteradas": 1}
+    assert diferencas(None, novos) is None
@@ -0,0 +1,56 @@
+"""
+Testes do orçamento de memória do cache: despejo e restauração do disco.
+"""
+import pytest
+
+from src.utils import csv_downloader as modulo
+from src.utils.csv_downloader import CSVDownloader
+
+CATEGORIAS = ("producao", "comercializacao", "exportacao_vinho")
+
+
+@pytest.fixture()
+def downloader(dados_dir):
+    d = CSVDownloader(data_dir=dados_dir)
+    d.DOWNLOAD_URLS = {categoria: CSVDownloader.DOWNLOAD_URLS[categoria] for categoria in CATEGORIAS}
+    return d
+
+
+def _bytes(d, categoria):
+    return sum(d._memory_usage(d._cache[categoria]).values())
+
+
+def test_despeja_e_restaura_a_mesma_versao(downloader, monkeypatch):
+    for categoria in CATEGORIAS:
+        assert downloader.load_local(categoria)
+    registros = downloader.get_data("producao")["data"]
+    versao = downloader.status()["producao"]["versao"]
+    # Orçamento para a maior categoria: as demais são despejadas na próxima carga
+    monkeypatch.setattr(modulo, "CACHE_MAX_BYTES", max(_bytes(downloader, c) for c in CATEGORIAS))
+    downloader._cache["producao"]["acessado_em"] = 0
+    downloader._aplicar_orcamento("exportacao_vinho")
+
+    assert "producao" in downloader.memory_budget()["despejadas"]
+    assert "producao" not in downloader._cache
+    assert downloader.status()["producao"]["versao"] == versao
+
+    restaurada = downloader.get_data("producao")
+    assert restaurada["data"] == registros
+    assert downloader.status()["producao"]["versao"] == versao
+    assert "producao" not in downloader._despejadas
+    # A categoria restaurada fica protegida; outra saiu em seu lugar
+    assert downloader._despejadas
+
+
+def test_libera_derivados_antes_das_entradas(downloader, monkeypatch):
+    for categoria in CATEGORIAS:
+        assert downloader.load_local(categoria)
+    downloader.get_long_data("producao")
+    assert downloader._cache["producao"]["derivados"]
+    total = sum(_bytes(downloader, c) for c in CATEGORIAS)
+    derivados = downloader._memory_usage(downloader._cache["producao"])["derivados"]
+    monkeypatch.setattr(modulo, "CACHE_MAX_BYTES", total - derivados)
+    downloader._aplicar_orcamento("exportacao_vinho")
+
+    assert not downloader._despejadas
+    assert not downloader._cache["producao"]["derivados"]
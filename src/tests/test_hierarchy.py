@@ -0,0 +1,26 @@
+"""
+Testes do índice hierárquico (nível/pai) de produção e comercialização.
+"""
+from benchmarks.fixtures import carregar_dataframe
+
+URL = "/api/v1/producao/producao/producao"
+
+
+def test_registros_mantem_as_colunas_do_csv(client, downloader):
+    colunas = list(carregar_dataframe("producao").columns)
+    dados = client.get(URL).json()
+    assert set(dados["data"][0]) == set(colunas)
+    assert "nivel" not in dados["subcategorias"] and "pai" not in dados["subcategorias"]
+    assert "nivel" not in downloader._cache["producao"]["df"].columns
+
+
+def test_filtros_por_nivel_e_pai_usam_o_indice(client, downloader):
+    hierarquia = downloader.get_hierarchy("producao")
+    categorias = client.get(URL, params={"nivel": 1}).json()["data"]
+    produtos = client.get(URL, params={"nivel": 2}).json()["data"]
+    assert len(categorias) == len(hierarquia.por_nivel[1])
+    assert len(produtos) == len(hierarquia.por_nivel[2])
+
+    pai = next(nome for nome, filhos in hierarquia.filhos.items() if filhos)
+    filhos = client.get(URL, params={"pai": pai}).json()["data"]
+    assert len(filhos) == len(hierarquia.filhos[pai])
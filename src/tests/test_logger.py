@@ -0,0 +1,87 @@
+"""
+Testes do logging estruturado: instalação única da fila e da thread de
+escrita e registros em JSON.
+"""
+import json
+import logging
+import time
+
+import pytest
+
+from src.utils import logger as modulo_logger
+from src.utils.logger import configure_logging, setup_logger
+
+NOME = "src.teste_logger"
+
+
+@pytest.fixture()
+def arquivo(tmp_path):
+    """
+    Arquivo de log do logger de teste, retirado da thread de escrita ao final.
+    """
+    caminho = str(tmp_path / "teste.log")
+    yield caminho
+    handler = modulo_logger._arquivos.pop(caminho, None)
+    if handler is not None:
+        modulo_logger._listener.handlers = tuple(h for h in modulo_logger._listener.handlers if h is not handler)
+        handler.close()
+
+
+def _linhas(caminho: str, quantidade: int, prazo: float = 2.0):
+    # A escrita acontece na thread do QueueListener
+    fim = time.monotonic() + prazo
+    while time.monotonic() < fim:
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                linhas = f.read().splitlines()
+        except OSError:
+            linhas = []
+        if len(linhas) >= quantidade:
+            return linhas
+        time.sleep(0.01)
+    raise AssertionError(f"{quantidade} linhas não escritas em {caminho}")
+
+
+def test_configuracao_instalada_uma_vez():
+    configure_logging()
+    listener = modulo_logger._listener
+    configure_logging()
+    assert modulo_logger._listener is listener
+    assert listener._thread is not None and listener._thread.is_alive()
+
+    raiz = logging.getLogger(modulo_logger.LOGGER_RAIZ)
+    filas = [h for h in raiz.handlers if isinstance(h, modulo_logger._FilaHandler)]
+    assert len(filas) == 1 and filas == raiz.handlers
+    assert not raiz.propagate
+    # Um único destino padrão (stderr) na thread de escrita
+    saidas = [h for h in listener.handlers if type(h) is logging.StreamHandler]
+    assert len(saidas) == 1
+
+
+def test_registro_em_json(arquivo):
+    logger = setup_logger(NOME, log_file=arquivo, level=logging.INFO)
+    # Chamadas repetidas não duplicam handlers nem destinos
+    assert setup_logger(NOME, log_file=arquivo) is logger
+    assert logger.handlers == []
+    assert sum(1 for h in modulo_logger._listener.handlers if h is modulo_logger._arquivos[arquivo]) == 1
+
+    logger.info("Carregado %s em %.1fs", "producao", 1.25, extra={"categoria": "producao", "linhas": 10})
+    try:
+        raise ValueError("CSV inválido")
+    except ValueError:
+        logger.exception("Falha ao ler %s", "comercializacao")
+    # Outros loggers da aplicação não vão para o arquivo deste
+    logging.getLogger("src.outro").error("fora do arquivo")
+
+    info, erro = (json.loads(linha) for linha in _linhas(arquivo, 2))
+    assert set(info) == {"ts", "nivel", "logger", "mensagem", "modulo", "linha", "thread", "categoria", "linhas"}
+    assert info["nivel"] == "INFO" and info["logger"] == NOME
+    assert info["mensagem"] == "Carregado producao em 1.2s"
+    assert info["modulo"] == "test_logger" and isinstance(info["linha"], int)
+    assert info["thread"] == "MainThread"
+    assert info["categoria"] == "producao" and info["linhas"] == 10
+    assert info["ts"].endswith("+00:00")
+
+    assert erro["nivel"] == "ERROR" and erro["mensagem"] == "Falha ao ler comercializacao"
+    assert "ValueError: CSV inválido" in erro["excecao"]
+    assert len(_linhas(arquivo, 2)) == 2
@@ -0,0 +1,115 @@
+"""
+Testes das métricas no formato de texto do Prometheus: linhas HELP/TYPE,
+séries do histograma, escape dos rótulos e o endpoint /metrics.
+"""
+import re
+from enum import Enum
+
+from src.utils.metrics import Registry
+
+# Amostra no formato de exposição 0.0.4: nome, rótulos opcionais e valor
+AMOSTRA = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\.)*",?)*\})? (\S+)$')
+
+
+class Tipo(str, Enum):
+    vinho = "vinho"
+
+
+def _familias(texto: str):
+    """
+    Valida o texto de exposição e retorna {família: (tipo, ajuda, [(amostra, rótulos, valor)])}.
+    """
+    assert texto.endswith("\n")
+    familias, atual = {}, None
+    for linha in texto.splitlines():
+        if linha.startswith("# HELP "):
+            nome, _, ajuda = linha[7:].partition(" ")
+            assert nome not in familias, f"família repetida: {nome}"
+            atual = familias[nome] = [None, ajuda, []]
+        elif linha.startswith("# TYPE "):
+            nome, _, tipo = linha[7:].partition(" ")
+            assert atual is familias.get(nome) and tipo in ("counter", "gauge", "histogram"), linha
+            atual[0] = tipo
+        else:
+            encontrada = AMOSTRA.match(linha)
+            assert encontrada, f"linha inválida: {linha!r}"
+            nome, rotulos, valor = encontrada.groups()
+            float(valor)
+            familia = next(f for f in familias if nome == f or nome.rsplit("_", 1)[0] == f)
+            assert familias[familia] is atual, f"amostra fora da família: {linha}"
+            atual[2].append((nome, rotulos or "", valor))
+    return {nome: tuple(familia) for nome, familia in familias.items()}
+
+
+def test_contador_com_help_type_e_rotulos():
+    registro = Registry()
+    contador = registro.counter("teste_total", "Contador de teste", ("categoria", "tipo"))
+    contador.inc(categoria="producao", tipo=Tipo.vinho)
+    contador.inc(2, categoria="producao", tipo=Tipo.vinho)
+    texto = registro.render()
+    assert texto.startswith("# HELP teste_total Contador de teste\n# TYPE teste_total counter\n")
+    assert _familias(texto)["teste_total"][2] == [("teste_total", '{categoria="producao",tipo="vinho"}', "3")]
+
+
+def test_histograma_com_buckets_cumulativos_soma_e_contagem():
+    registro = Registry()
+    histograma = registro.histogram("teste_segundos", "Latência", ("rota",), buckets=(1.0, 0.01, 0.5))
+    for valor in (0.003, 0.3, 0.5, 100):
+        histograma.observe(valor, rota="/a")
+    tipo, _, amostras = _familias(registro.render())["teste_segundos"]
+    assert tipo == "histogram"
+    assert amostras == [
+        ("teste_segundos_bucket", '{rota="/a",le="0.01"}', "1"),
+        ("teste_segundos_bucket", '{rota="/a",le="0.5"}', "3"),
+        ("teste_segundos_bucket", '{rota="/a",le="1"}', "3"),
+        ("teste_segundos_bucket", '{rota="/a",le="+Inf"}', "4"),
+        ("teste_segundos_sum", '{rota="/a"}', "100.803"),
+        ("teste_segundos_count", '{rota="/a"}', "4"),
+    ]
+
+
+def test_escape_dos_rotulos_e_da_ajuda():
+    registro = Registry()
+    contador = registro.counter("teste_total", "Linha 1\nbarra \\ final", ("entidade",))
+    contador.inc(entidade='Vinho "fino"\nde mesa \\ tinto')
+    texto = registro.render()
+    assert "# HELP teste_total Linha 1\\nbarra \\\\ final\n" in texto
+    assert 'teste_total{entidade="Vinho \\"fino\\"\\nde mesa \\\\ tinto"} 1\n' in texto
+    _familias(texto)
+
+
+def test_coletores_e_valores_especiais():
+    registro = Registry()
+
+    @registro.collector
+    def coletar():
+        yield "teste_gauge", "gauge", "Medida coletada", [
+            ("teste_gauge", {"a": "1"}, float("inf")),
+            ("teste_gauge", {"a": "2"}, 0.25),
+            ("teste_gauge", {}, 7.0),
+        ]
+
+    familias = _familias(registro.render())
+    assert familias["teste_gauge"] == ("gauge", "Medida coletada", [
+        ("teste_gauge", '{a="1"}', "+Inf"),
+        ("teste_gauge", '{a="2"}', "0.25"),
+        ("teste_gauge", "", "7"),
+    ])
+
+
+def test_endpoint_metrics(client, downloader):
+    assert client.get("/api/v1/producao/producao/producao").status_code == 200
+    resposta = client.get("/metrics")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    familias = _familias(resposta.text)
+
+    tipo, _, amostras = familias["vitibrasil_http_request_duration_seconds"]
+    assert tipo == "histogram"
+    rotulos = '{metodo="GET",rota="/api/v1/producao/producao/{tipo}",status="200"'
+    assert any(nome.endswith("_count") and r.startswith(rotulos) for nome, r, _ in amostras), amostras
+
+    linhas = {r: int(v) for _, r, v in familias["vitibrasil_dataset_rows"][2]}
+    assert linhas['{categoria="producao"}'] == len(downloader.get_data("producao")["data"])
+    assert familias["vitibrasil_upstream_requests_total"][0] == "counter"
+    assert familias["vitibrasil_cache_memory_bytes"][0] == "gauge"
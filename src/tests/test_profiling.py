@@ -0,0 +1,128 @@
+"""
+Testes do perfilamento (etapas, Server-Timing, cProfile amostrado) e da
+proteção dos endpoints administrativos por ADMIN_TOKEN.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.endpoints import admin
+from src.utils.profiling import Profiler, span
+
+TOKEN = "segredo"
+
+
+def _app(profiler: Profiler) -> FastAPI:
+    app = FastAPI()
+    app.middleware("http")(profiler)
+
+    @app.get("/etapas")
+    async def etapas():
+        with span("cache"):
+            with span("read_csv"):
+                pass
+        with span("filtros"):
+            pass
+        return {"ok": True}
+
+    @app.get("/espera")
+    async def espera():
+        await app.state.evento.wait()
+        return {"ok": True}
+
+    return app
+
+
+@pytest.fixture()
+def profiler(monkeypatch) -> Profiler:
+    profiler = Profiler(taxa=0, lento_ms=10 ** 9, manter=3)
+    monkeypatch.setattr(admin, "profiler", profiler)
+    return profiler
+
+
+@pytest.fixture()
+def com_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", TOKEN)
+
+
+def test_server_timing_com_as_etapas_de_primeiro_nivel(profiler):
+    resposta = TestClient(_app(profiler)).get("/etapas")
+    assert resposta.status_code == 200
+    nomes = [parte.split(";")[0] for parte in resposta.headers["Server-Timing"].split(", ")]
+    assert nomes == ["cache", "filtros"]
+    # Nem lenta nem amostrada: nada é guardado
+    assert profiler.listar() == []
+
+
+def test_requisicao_lenta_guarda_a_linha_do_tempo(profiler):
+    profiler.lento_ms = 0
+    cliente = TestClient(_app(profiler))
+    for _ in range(5):
+        cliente.get("/etapas")
+    perfis = profiler.listar()
+    assert len(perfis) == 3
+    assert {p["motivo"] for p in perfis} == {"lenta"}
+    assert not any(p["cprofile"] for p in perfis)
+    assert all(p["sobrepostas"] is None for p in perfis)
+    detalhe = profiler.obter(perfis[0]["id"])
+    assert [(s["nome"], s["nivel"]) for s in detalhe["spans"]] == [("cache", 0), ("read_csv", 1), ("filtros", 0)]
+    assert "cprofile" not in detalhe
+
+
+def test_cprofile_forcado_pelo_cabecalho(profiler):
+    TestClient(_app(profiler)).get("/etapas", headers={"X-Profile": "1"})
+    (perfil,) = profiler.listar()
+    assert perfil["motivo"] == "forcado" and perfil["cprofile"]
+    assert perfil["rota"] == "/etapas" and perfil["sobrepostas"] == 0
+    assert "etapas" in profiler.obter(perfil["id"], "tottime", 200)["cprofile"]
+
+
+def test_cprofile_conta_as_requisicoes_sobrepostas(profiler):
+    app = _app(profiler)
+
+    async def executar():
+        app.state.evento = asyncio.Event()
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            # A primeira já está em andamento quando a amostrada começa; a última começa durante o perfil
+            antes = asyncio.create_task(cliente.get("/espera"))
+            await asyncio.sleep(0.05)
+            amostrada = asyncio.create_task(cliente.get("/espera", headers={"X-Profile": "1"}))
+            await asyncio.sleep(0.05)
+            await cliente.get("/etapas")
+            app.state.evento.set()
+            await asyncio.gather(antes, amostrada)
+
+    asyncio.run(executar())
+    (perfil,) = [p for p in profiler.listar() if p["cprofile"]]
+    assert perfil["caminho"] == "/espera"
+    assert perfil["sobrepostas"] == 2
+
+
+@pytest.mark.parametrize("token_configurado, cabecalhos, status", [
+    ("", {}, 403),
+    ("", {"X-Admin-Token": ""}, 403),
+    ("", {"X-Admin-Token": TOKEN}, 403),
+    (TOKEN, {}, 401),
+    (TOKEN, {"X-Admin-Token": "errado"}, 401),
+    (TOKEN, {"X-Admin-Token": TOKEN + " "}, 401),
+    (TOKEN, {"X-Admin-Token": TOKEN}, 200),
+])
+def test_exigir_admin(client, profiler, monkeypatch, token_configurado, cabecalhos, status):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", token_configurado)
+    assert client.get("/admin/profiles", headers=cabecalhos).status_code == status
+    inexistente = client.get("/admin/profiles/inexistente", headers=cabecalhos)
+    assert inexistente.status_code == (404 if status == 200 else status)
+
+
+def test_endpoints_de_perfis(client, profiler, com_token):
+    TestClient(_app(profiler)).get("/etapas", headers={"X-Profile": "1"})
+    cabecalhos = {"X-Admin-Token": TOKEN}
+    (perfil,) = client.get("/admin/profiles", headers=cabecalhos).json()
+    detalhe = client.get(f"/admin/profiles/{perfil['id']}", headers=cabecalhos, params={"ordenar": "calls", "limite": 500}).json()
+    assert detalhe["id"] == perfil["id"] and "etapas" in detalhe["cprofile"]
+    resposta = client.get(f"/admin/profiles/{perfil['id']}", headers=cabecalhos, params={"ordenar": "x"})
+    assert resposta.status_code == 400
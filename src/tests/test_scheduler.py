@@ -0,0 +1,141 @@
+"""
+Testes do agendador de atualização com relógio falso: intervalos, backoff
+após falhas e encerramento pelo lifespan da aplicação.
+"""
+import asyncio
+
+import pytest
+
+from src.utils import scheduler as modulo_scheduler
+from src.utils.scheduler import RefreshScheduler
+
+
+class RelogioFalso:
+    """
+    Relógio que avança só nas esperas do agendador; após `limite` esperas, a próxima fica pendente.
+    """
+
+    def __init__(self, limite: int):
+        self.agora = 1000.0
+        self.limite = limite
+        self.esperas = []
+        self.esgotado = asyncio.Event()
+
+    def time(self) -> float:
+        return self.agora
+
+    async def sleep(self, segundos: float):
+        if len(self.esperas) >= self.limite:
+            self.esgotado.set()
+            # Pendente até o cancelamento pelo stop()
+            await asyncio.Event().wait()
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+
+class DownloaderFalso:
+    """
+    Substitui o CSVDownloader: cada refresh consome o próximo resultado do roteiro.
+    """
+
+    DOWNLOAD_URLS = {"producao": "", "comercializacao": ""}
+
+    def __init__(self, roteiro):
+        self.roteiro = list(roteiro)
+        self.chamadas = 0
+        self.background_refresh = False
+
+    def refresh(self, categoria: str) -> bool:
+        passo = self.roteiro[min(self.chamadas, len(self.roteiro) - 1)]
+        self.chamadas += 1
+        if isinstance(passo, Exception):
+            raise passo
+        return passo
+
+
+@pytest.fixture(autouse=True)
+def sem_jitter(monkeypatch):
+    monkeypatch.setattr(modulo_scheduler, "REFRESH_JITTER", 0)
+
+
+def _executar(roteiro, esperas: int):
+    """
+    Roda o job de producao até `esperas` esperas e retorna o agendador, o downloader e o relógio.
+    """
+    downloader = DownloaderFalso(roteiro)
+    vistos = {}
+
+    async def executar():
+        relogio = RelogioFalso(esperas)
+        agendador = RefreshScheduler(downloader, ["producao"], relogio=relogio.time, dormir=relogio.sleep)
+        agendador.start()
+        await asyncio.wait_for(relogio.esgotado.wait(), 5)
+        vistos["ativo"] = downloader.background_refresh
+        await agendador.stop()
+        return agendador, relogio
+
+    agendador, relogio = asyncio.run(executar())
+    return agendador, downloader, relogio, vistos
+
+
+def test_atualizacao_com_sucesso_segue_o_intervalo():
+    agendador, downloader, relogio, vistos = _executar([True], esperas=3)
+    intervalo = agendador.estado["producao"]["intervalo"]
+    # Primeira execução sem atraso (primeira categoria) e depois a cada intervalo
+    assert relogio.esperas == [0, intervalo, intervalo]
+    assert downloader.chamadas == 3
+    estado = agendador.status()["producao"]
+    assert estado["falhas_consecutivas"] == 0
+    assert estado["ultimo_sucesso"] == estado["ultima_execucao"] == 1000.0 + 2 * intervalo
+    assert estado["proxima_execucao"] == relogio.agora + intervalo
+    assert vistos["ativo"] and not downloader.background_refresh
+
+
+def test_falhas_aumentam_a_espera_com_backoff(monkeypatch):
+    monkeypatch.setattr(modulo_scheduler, "REFRESH_BACKOFF_MAX", 100.0)
+    roteiro = [False, RuntimeError("Embrapa fora do ar"), False, False, True]
+    agendador, downloader, relogio, _ = _executar(roteiro, esperas=6)
+    base = modulo_scheduler.REFRESH_BACKOFF_BASE
+    intervalo = agendador.estado["producao"]["intervalo"]
+    # Backoff dobra a cada falha, limitado ao máximo; o sucesso volta ao intervalo normal
+    assert relogio.esperas == [0, base, 2 * base, min(4 * base, 100.0), min(8 * base, 100.0), intervalo]
+    estado = agendador.status()["producao"]
+    assert estado["falhas_consecutivas"] == 0
+    assert estado["ultimo_sucesso"] == 1000.0 + sum(relogio.esperas)
+
+
+def test_falhas_seguidas_ficam_no_estado():
+    agendador, _, relogio, _ = _executar([False], esperas=3)
+    estado = agendador.status()["producao"]
+    assert estado["falhas_consecutivas"] == 3
+    assert estado["ultimo_sucesso"] is None
+    assert relogio.esperas[1:] == [modulo_scheduler.REFRESH_BACKOFF_BASE, 2 * modulo_scheduler.REFRESH_BACKOFF_BASE]
+
+
+def test_lifespan_inicia_e_encerra_o_agendador(monkeypatch):
+    from src import main
+    from src.api.endpoints import health
+
+    async def aquecer(upstream=True):
+        return None
+
+    downloader = DownloaderFalso([True])
+    relogio = RelogioFalso(limite=1)
+    agendador = RefreshScheduler(downloader, relogio=relogio.time, dormir=relogio.sleep)
+    monkeypatch.setattr(main, "REFRESH_ENABLED", True)
+    monkeypatch.setattr(main, "scheduler", agendador)
+    monkeypatch.setattr(health.warmup, "run", aquecer)
+
+    async def executar():
+        async with main.lifespan(main.app):
+            await asyncio.wait_for(relogio.esgotado.wait(), 5)
+            tarefas = list(agendador._tarefas)
+            assert len(tarefas) == len(DownloaderFalso.DOWNLOAD_URLS)
+            assert downloader.background_refresh
+        return tarefas
+
+    tarefas = asyncio.run(executar())
+    # Ao sair do lifespan, todos os jobs foram cancelados e aguardados
+    assert all(tarefa.done() for tarefa in tarefas)
+    assert agendador._tarefas == []
+    assert not downloader.background_refresh
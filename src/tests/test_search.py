@@ -0,0 +1,53 @@
+"""
+Testes da busca: índice montado na carga, a partir dos registros.
+"""
+import os
+import subprocess
+import sys
+
+from src.utils.csv_downloader import CSVDownloader
+from src.utils.search_index import CatalogSearch
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _nomes(resultados):
+    return [resultado["entidade"] for resultado in resultados]
+
+
+def test_indice_montado_e_atualizado_na_carga(dados_dir):
+    d = CSVDownloader(data_dir=dados_dir)
+    catalogo = CatalogSearch(d)
+    for categoria in d.DOWNLOAD_URLS:
+        assert d.load_local(categoria)
+    # A carga já montou o índice: a busca não lê nenhuma categoria
+    assert catalogo.pendentes() == []
+    assert "Estados Unidos" in _nomes(catalogo.indice().buscar("estados unidos"))
+
+    entrada = d._cache["exportacao_vinho"]
+    df = entrada["df"].copy()
+    df.loc[df["País"] == "Chile", "País"] = "Chilena do Sul"
+    carga = d._process_dataframe(df, "teste", "2023")
+    with d._locks["exportacao_vinho"]:
+        d._install("exportacao_vinho", carga)
+    assert catalogo.pendentes() == []
+    resultados = catalogo.indice().buscar("chilena do sul")
+    assert resultados[0]["entidade"] == "Chilena do Sul"
+    assert [o["categoria"] for o in resultados[0]["categorias"]] == ["exportacao_vinho"]
+
+
+def test_indice_sem_pandas_no_leitor_leve(dados_dir):
+    codigo = (
+        "import sys\n"
+        "from src.utils.csv_downloader import CSVDownloader\n"
+        "from src.utils.search_index import CatalogSearch\n"
+        f"d = CSVDownloader(data_dir={dados_dir!r})\n"
+        "catalogo = CatalogSearch(d)\n"
+        "assert all(d.load_local(c) for c in d.DOWNLOAD_URLS)\n"
+        "resultados = catalogo.indice().buscar('tinto')\n"
+        "assert resultados and resultados[0]['categorias'][0]['pai'], resultados\n"
+        "assert 'pandas' not in sys.modules\n"
+    )
+    ambiente = {**os.environ, "CSV_LOADER": "stdlib", "DATA_STORE_MODE": "local", "PYTHONPATH": RAIZ}
+    processo = subprocess.run([sys.executable, "-c", codigo], env=ambiente, capture_output=True, text=True)
+    assert processo.returncode == 0, processo.stderr
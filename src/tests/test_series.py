@@ -0,0 +1,76 @@
+"""
+Testes do endpoint de séries temporais (/api/v1/{modulo}/{tipo}/series).
+"""
+import numpy as np
+
+from src.utils.year_matrix import YearMatrix
+
+URL = "/api/v1/producao/producao/series"
+
+
+def _folhas(registros):
+    # Linhas de categoria têm control igual ao nome; são folhas apenas se não tiverem filhos
+    folhas = []
+    for i, linha in enumerate(registros):
+        proxima = registros[i + 1] if i + 1 < len(registros) else None
+        tem_filhos = proxima is not None and proxima["control"] != proxima["produto"]
+        if linha["control"] != linha["produto"] or not tem_filhos:
+            folhas.append(linha)
+    return folhas
+
+
+def _json(resposta):
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def test_serie_de_entidade_soma_os_nomes_repetidos(client, downloader):
+    registros = downloader.get_data("producao")["data"]
+    dados = _json(client.get(URL, params={"entidade": "tinto", "ano_inicio": 2000, "ano_fim": 2010}))
+    assert dados["anos"] == list(range(2000, 2011))
+    tintos = [linha for linha in registros if linha["produto"] == "Tinto"]
+    assert len(tintos) == 2
+    assert dados["valores"] == [sum(linha[str(ano)] for linha in tintos) for ano in dados["anos"]]
+
+
+def test_soma_das_entidades_folha(client, downloader):
+    registros = downloader.get_data("producao")["data"]
+    dados = _json(client.get(URL))
+    assert dados["entidade"] is None
+    folhas = _folhas(registros)
+    assert dados["valores"] == [sum(linha[str(ano)] for linha in folhas) for ano in dados["anos"]]
+
+
+def test_corte_de_um_ano(client, downloader):
+    registros = downloader.get_data("producao")["data"]
+    dados = _json(client.get(URL, params={"ano": 2019}))
+    assert dados["entidades"] == [linha["produto"] for linha in registros]
+    # A matriz é float32: totais de categoria acima de 2**24 perdem as unidades
+    assert dados["valores"] == [float(np.float32(linha["2019"])) for linha in registros]
+
+
+def test_ano_com_entidade_restringe_a_serie(client, downloader):
+    registros = downloader.get_data("producao")["data"]
+    dados = _json(client.get(URL, params={"entidade": "Branco", "ano": 2019, "ano_inicio": 1990}))
+    assert dados["entidade"] == "Branco"
+    assert dados["anos"] == [2019]
+    assert dados["valores"] == [sum(linha["2019"] for linha in registros if linha["produto"] == "Branco")]
+    assert client.get(URL, params={"entidade": "Branco", "ano": 1900}).status_code == 404
+
+
+def test_anos_sem_nenhum_valor_vem_como_null(client, downloader, monkeypatch):
+    valores = np.array([[1, np.nan, np.nan], [2, 3, np.nan]])[:, :, None]
+    matriz = YearMatrix(valores, np.array(["Tinto", "Tinto"]), np.array([2000, 2001, 2002]), ("quantidade",))
+    np.testing.assert_array_equal(matriz.serie("tinto"), [3, 3, np.nan])
+    np.testing.assert_array_equal(matriz.soma(), [3, 3, np.nan])
+
+    monkeypatch.setattr(downloader, "get_year_matrix", lambda categoria: matriz)
+    assert _json(client.get(URL, params={"entidade": "Tinto"}))["valores"] == [3, 3, None]
+    assert _json(client.get(URL))["valores"] == [3, 3, None]
+
+
+def test_erros(client, downloader):
+    assert client.get(URL, params={"entidade": "Inexistente"}).status_code == 404
+    assert client.get(URL, params={"ano": 1900}).status_code == 404
+    assert client.get(URL, params={"medida": "valor"}).status_code == 400
+    assert client.get("/api/v1/producao/inexistente/series").status_code == 400
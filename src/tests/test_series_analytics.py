@@ -0,0 +1,126 @@
+"""
+Testes dos indicadores de séries (CAGR, volatilidade, média móvel e
+suavização exponencial) contra um cálculo ingênuo, entidade a entidade.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from src.utils import series_analytics
+from src.utils.year_matrix import YearMatrix
+
+URL = "/api/v1/exportacao/vinho/series/analytics"
+
+
+def _cagr(valores, anos):
+    positivos = [j for j, v in enumerate(valores) if v > 0]
+    if not positivos or anos[positivos[-1]] == anos[positivos[0]]:
+        return math.nan
+    primeiro, ultimo = positivos[0], positivos[-1]
+    return (valores[ultimo] / valores[primeiro]) ** (1 / (anos[ultimo] - anos[primeiro])) - 1
+
+
+def _volatilidade(valores):
+    taxas = [math.log(b / a) for a, b in zip(valores, valores[1:]) if a > 0 and b > 0]
+    return float(np.std(taxas, ddof=1)) if len(taxas) >= 2 else math.nan
+
+
+def _media_movel(valores, janela):
+    medias = []
+    for j in range(len(valores)):
+        presentes = [v for v in valores[max(j - janela + 1, 0):j + 1] if not math.isnan(v)]
+        medias.append(sum(presentes) / len(presentes) if j >= janela - 1 and presentes else math.nan)
+    return medias
+
+
+def _suavizacao(valores, alfa):
+    nivel = math.nan
+    for v in valores:
+        if math.isnan(nivel):
+            nivel = v
+        elif not math.isnan(v):
+            nivel = alfa * v + (1 - alfa) * nivel
+    return nivel
+
+
+def _iguais(a, b, tolerancia=1e-9):
+    if a is None or b is None or math.isnan(a) or math.isnan(b):
+        return (a is None or math.isnan(a)) and (b is None or math.isnan(b))
+    return math.isclose(a, b, rel_tol=tolerancia, abs_tol=tolerancia)
+
+
+@pytest.fixture(scope="module")
+def matriz(downloader) -> YearMatrix:
+    """
+    Matriz da exportação de vinho com anos ausentes em algumas entidades.
+    """
+    original = downloader.get_year_matrix("exportacao_vinho")
+    valores = original.valores.copy()
+    valores[0, :5] = np.nan
+    valores[1, 10:20] = np.nan
+    valores[2, -3:] = np.nan
+    valores[3] = np.nan
+    return YearMatrix(valores, original.entidades, original.anos, original.medidas, original.folha)
+
+
+@pytest.mark.parametrize("ano_inicio, ano_fim", [(None, None), (1980, 1995), (2019, None), (None, 1971)])
+@pytest.mark.parametrize("janela", [2, 5])
+def test_indicadores_conferem_com_o_calculo_por_entidade(matriz, ano_inicio, ano_fim, janela):
+    base = series_analytics.bases({"matriz": matriz})["valor"]
+    fatia = matriz.intervalo_anos(ano_inicio, ano_fim)
+    linhas = list(range(len(matriz.entidades)))
+    analise = series_analytics.analisar(base, matriz.anos, fatia, linhas, janela, 0.3, 4)
+
+    anos = matriz.anos[fatia].tolist()
+    assert analise["anos"].tolist() == anos
+    assert analise["anos_previsao"] == list(range(anos[-1] + 1, anos[-1] + 5))
+    assert analise["previsao"].shape == (len(linhas), 4)
+    for i in linhas:
+        valores = base["valores"][i, fatia].tolist()
+        assert _iguais(analise["cagr"][i], _cagr(valores, anos)), i
+        assert _iguais(analise["volatilidade"][i], _volatilidade(valores), 1e-6), i
+        np.testing.assert_allclose(analise["media_movel"][i], _media_movel(valores, janela), rtol=1e-9)
+        assert all(_iguais(p, _suavizacao(valores, 0.3)) for p in analise["previsao"][i]), i
+
+
+def test_lacunas_nao_geram_taxas_nem_mudam_o_nivel():
+    valores = np.array([[1, 2, np.nan, 4, 8]])[:, :, None]
+    matriz = YearMatrix(valores, np.array(["A"]), np.arange(2000, 2005), ("quantidade",))
+    base = series_analytics.bases({"matriz": matriz})["quantidade"]
+    analise = series_analytics.analisar(base, matriz.anos, slice(0, 5), [0], 2, 0.5, 2)
+    assert analise["cagr"][0] == pytest.approx(8 ** (1 / 4) - 1)
+    # Só 2000→2001 e 2003→2004 têm os dois anos: duas taxas iguais
+    assert analise["volatilidade"][0] == pytest.approx(0)
+    np.testing.assert_allclose(analise["media_movel"][0], [np.nan, 1.5, 2, 4, 6])
+    # Nível: 1, 1.5, 1.5 (ano ausente), 2.75, 5.375
+    assert analise["anos_previsao"] == [2005, 2006]
+    assert analise["previsao"][0].tolist() == [5.375, 5.375]
+
+
+def test_endpoint_confere_com_o_calculo_por_entidade(client, downloader):
+    resposta = client.get(URL, params={"medida": "valor", "ano_inicio": 2000, "janela": 4,
+                                       "alfa": 0.5, "horizonte": 2})
+    assert resposta.status_code == 200, resposta.text
+    dados = resposta.json()
+    matriz = downloader.get_year_matrix("exportacao_vinho")
+    fatia = matriz.intervalo_anos(2000, None)
+    anos = matriz.anos[fatia].tolist()
+    assert dados["anos"] == anos
+    assert dados["anos_previsao"] == [anos[-1] + 1, anos[-1] + 2]
+    assert len(dados["entidades"]) == len(matriz.entidades)
+    for pos, entidade in enumerate(dados["entidades"]):
+        valores = matriz.valores[pos, fatia, 1].astype(np.float64).tolist()
+        assert entidade["entidade"] == matriz.entidades[pos]
+        # CAGR e volatilidade vêm arredondados a 6 casas
+        assert _iguais(entidade["cagr"], _cagr(valores, anos), 1e-6)
+        assert _iguais(entidade["volatilidade"], _volatilidade(valores), 1e-6)
+        assert all(_iguais(a, b) for a, b in zip(entidade["media_movel"], _media_movel(valores, 4)))
+        assert entidade["previsao"] == [_suavizacao(valores, 0.5)] * 2
+
+
+def test_endpoint_filtra_a_entidade(client, downloader):
+    dados = client.get(URL, params={"entidade": "chile"}).json()
+    assert [e["entidade"] for e in dados["entidades"]] == ["Chile"]
+    assert client.get(URL, params={"entidade": "Atlântida"}).status_code == 404
+    assert client.get(URL, params={"janela": 1}).status_code == 422
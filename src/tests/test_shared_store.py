@@ -0,0 +1,95 @@
+"""
+Testes do modo compartilhado: snapshots publicados pelo carregador e anexados pelos workers.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.utils.csv_downloader import CSVDownloader
+from src.utils.shared_store import SnapshotStore
+from src.utils.sizing import _mapeado
+
+CATEGORIAS = ["producao", "comercializacao", "importacao_vinho"]
+
+
+@pytest.fixture(scope="module")
+def snapshots(dados_dir, tmp_path_factory) -> str:
+    """
+    Diretório de snapshots publicado por um carregador a partir dos CSVs sintéticos.
+    """
+    diretorio = str(tmp_path_factory.mktemp("snapshots"))
+    carregador = CSVDownloader(data_dir=dados_dir, modo="loader")
+    carregador._store = SnapshotStore(diretorio)
+    for categoria in CATEGORIAS:
+        assert carregador.load_local(categoria), categoria
+    return diretorio
+
+
+@pytest.fixture
+def worker(snapshots, tmp_path) -> CSVDownloader:
+    worker = CSVDownloader(data_dir=str(tmp_path), modo="shared")
+    worker._store = SnapshotStore(snapshots)
+    return worker
+
+
+@pytest.mark.parametrize("categoria", CATEGORIAS)
+def test_resposta_igual_a_do_modo_local(worker, downloader, categoria):
+    esperado = downloader.get_data(categoria)
+    dados = worker.get_data(categoria)
+    assert list(dados) == list(esperado)
+    assert dados["data"] == esperado["data"]
+    assert dados["subcategorias"] == esperado["subcategorias"]
+
+
+@pytest.mark.parametrize("categoria", CATEGORIAS)
+def test_worker_nao_guarda_copias_dos_dados(worker, categoria):
+    worker.get_data(categoria)
+    entrada = worker._cache[categoria]
+    # Registros e subcategorias são montados a cada requisição; DataFrame e índice só no primeiro uso
+    assert "data" not in entrada["result"] and "subcategorias" not in entrada["result"]
+    assert entrada["df"] is None and entrada["hierarquia"] is None
+    assert all(_mapeado(coluna) for coluna in entrada["tabela"].dados.values())
+    assert _mapeado(worker.get_year_matrix(categoria).valores)
+    assert entrada["df"] is None
+
+
+def test_matriz_e_metricas_mapeadas_do_snapshot(worker, downloader):
+    metricas = worker.get_trade_metrics("importacao_vinho")
+    esperadas = downloader.get_trade_metrics("importacao_vinho")
+    assert metricas["coluna"] == esperadas["coluna"]
+    assert metricas["matriz"].valores.dtype == np.float64
+    for nome in ("preco_unitario", "participacao_quantidade", "participacao_valor"):
+        assert _mapeado(metricas[nome])
+        np.testing.assert_array_equal(metricas[nome], esperadas[nome])
+    np.testing.assert_array_equal(worker.get_year_matrix("producao").folha, downloader.get_year_matrix("producao").folha)
+
+
+def test_hierarquia_montada_no_primeiro_uso(worker, downloader):
+    hierarquia = worker.get_hierarchy("producao")
+    esperada = downloader.get_hierarchy("producao")
+    assert hierarquia.niveis == esperada.niveis and hierarquia.pais == esperada.pais
+    assert hierarquia.totais() == esperada.totais()
+    # O DataFrame montado mantém as colunas numéricas mapeadas e a resposta continua vindo da tabela
+    assert _mapeado(worker._cache["producao"]["df"]["2020"].to_numpy())
+    assert worker.get_data("producao")["data"] == downloader.get_data("producao")["data"]
+
+
+def test_snapshot_de_outro_formato_e_republicado(dados_dir, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    carregador = CSVDownloader(data_dir=dados_dir, modo="loader")
+    carga = carregador._read_csv_file(os.path.join(dados_dir, "producao", "producao.csv"), "producao")
+    carga["hash"] = carregador._hash_carga(carga)
+    store.publish("producao", carga)
+    # Mesmo conteúdo e mesmo formato: nada é publicado
+    assert store.publish("producao", dict(carga)) is None
+
+    meta = os.path.join(str(tmp_path), "producao", "v1", "meta.json")
+    with open(meta, encoding="utf-8") as f:
+        conteudo = json.load(f)
+    conteudo["formato"] = 1
+    with open(meta, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f)
+    assert store.publish("producao", dict(carga)) is not None
+    assert store.versao_atual("producao") == 2
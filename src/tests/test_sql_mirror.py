@@ -0,0 +1,205 @@
+"""
+Testes do espelho SQLite: resultados, autorizador somente leitura, prazo,
+atualização por versão e orçamento de memória.
+"""
+import math
+import threading
+import time
+
+import pytest
+
+from benchmarks.fixtures import ANOS, carregar_dataframe
+from src.utils import csv_downloader as modulo_downloader
+from src.utils.csv_downloader import CSVDownloader
+from src.utils.sql_mirror import SQLMirror, ConsultaInvalida
+
+CATEGORIAS = ("producao", "exportacao_vinho")
+
+
+@pytest.fixture()
+def downloader(dados_dir):
+    # Downloader próprio com duas categorias: os testes instalam novas versões
+    d = CSVDownloader(data_dir=dados_dir)
+    d.DOWNLOAD_URLS = {categoria: CSVDownloader.DOWNLOAD_URLS[categoria] for categoria in CATEGORIAS}
+    for categoria in CATEGORIAS:
+        assert d.load_local(categoria)
+    return d
+
+
+@pytest.fixture()
+def espelho(downloader):
+    return SQLMirror(downloader)
+
+
+def test_agregacao_confere_com_o_formato_longo(downloader, espelho):
+    resultado = espelho.consultar(
+        "SELECT ano, SUM(valor) FROM exportacao_vinho WHERE folha = 1 GROUP BY ano ORDER BY ano"
+    )
+    assert resultado["colunas"] == ["ano", "SUM(valor)"]
+    longo = downloader.get_long_data("exportacao_vinho")
+    esperado = longo[longo["folha"]].groupby("ano")["valor"].sum()
+    assert [linha[0] for linha in resultado["linhas"]] == esperado.index.tolist()
+    for (_, total), valor in zip(resultado["linhas"], esperado.tolist()):
+        assert math.isclose(total, valor, rel_tol=1e-9)
+
+
+def test_tabela_de_categorias(downloader, espelho):
+    linhas = espelho.consultar("SELECT categoria, versao, linhas FROM categorias ORDER BY categoria")["linhas"]
+    assert linhas == [
+        [categoria, downloader.versao(categoria), len(downloader.get_long_data(categoria))]
+        for categoria in sorted(CATEGORIAS)
+    ]
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM dados",
+    "UPDATE dados SET valor = 0",
+    "INSERT INTO categorias VALUES ('x', 1, 1)",
+    "CREATE TABLE x (a)",
+    "DROP VIEW producao",
+    "ATTACH DATABASE ':memory:' AS outro",
+    "PRAGMA query_only = OFF",
+    "SELECT 1; DELETE FROM dados",
+    "SELECT * FROM tabela_inexistente",
+    "SELECT randomblob(10)",
+    "SELECT length(zeroblob(1000000000))",
+    "SELECT load_extension('x')",
+    "SELECT random()",
+])
+def test_rejeita_o_que_nao_e_leitura(espelho, sql):
+    with pytest.raises(ConsultaInvalida):
+        espelho.consultar(sql)
+    # Nada foi alterado
+    assert espelho.consultar("SELECT COUNT(*) FROM dados")["linhas"][0][0] > 0
+
+
+def test_funcoes_permitidas(espelho):
+    resultado = espelho.consultar(
+        "SELECT UPPER(entidade), COUNT(*), ROUND(AVG(quantidade), 2), COALESCE(MAX(valor), 0), "
+        "ROW_NUMBER() OVER (ORDER BY SUM(quantidade) DESC), strftime('%Y', 'now') "
+        "FROM producao WHERE entidade LIKE 'tin%' GROUP BY entidade"
+    )
+    assert resultado["linhas"][0][0] == "TINTO"
+
+
+def test_interrompe_consulta_apos_o_prazo(espelho):
+    infinita = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT MAX(i) FROM n"
+    with pytest.raises(ConsultaInvalida, match="interrompida"):
+        espelho.consultar(infinita, prazo=0.2)
+
+
+def test_limite_de_linhas(espelho):
+    resultado = espelho.consultar("SELECT * FROM dados", limite=10)
+    assert len(resultado["linhas"]) == 10
+    assert resultado["truncado"]
+
+
+def _instalar_versao(downloader, categoria, incremento=1):
+    """
+    Instala uma nova versão da categoria somando `incremento` às folhas do último ano.
+
+    Returns:
+        Número de folhas alteradas
+    """
+    entrada = downloader._cache[categoria]
+    df = entrada["df"].copy()
+    ultimo_ano = [coluna for coluna in df.columns if str(coluna).isdigit()][-1]
+    folhas = entrada["hierarquia"].folha
+    df.loc[folhas, ultimo_ano] = df.loc[folhas, ultimo_ano].fillna(0) + incremento
+    carga = downloader._process_dataframe(df, "teste", "2023")
+    with downloader._locks[categoria]:
+        downloader._install(categoria, carga)
+    return int(folhas.sum())
+
+
+def _aguardar_montagem(espelho, prazo=10):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        thread = espelho._thread
+        if thread is None and not espelho.pendentes():
+            return
+        if thread is not None:
+            thread.join(0.05)
+    raise AssertionError("espelho não foi remontado")
+
+
+def test_nova_versao_remonta_em_segundo_plano(downloader, espelho):
+    consulta = "SELECT SUM(quantidade) FROM producao WHERE folha = 1"
+    antes = espelho.consultar(consulta)["linhas"][0][0]
+    uri = espelho._uri
+
+    folhas = _instalar_versao(downloader, "producao")
+    _aguardar_montagem(espelho)
+    assert espelho._uri != uri
+
+    chamadas = []
+    original = espelho.atualizar
+    espelho.atualizar = lambda: chamadas.append(1) or original()
+    depois = espelho.consultar(consulta)["linhas"][0][0]
+    # A consulta usou a geração pronta, sem montar nada
+    assert chamadas == []
+    assert math.isclose(depois - antes, folhas)
+    assert espelho.consultar("SELECT versao FROM categorias WHERE categoria = 'producao'")["linhas"] == [[2]]
+
+
+def test_consultas_nao_esperam_a_montagem(downloader, espelho, monkeypatch):
+    espelho.consultar("SELECT 1")
+    liberar = threading.Event()
+    original = espelho._carregar
+
+    def carregar_lento(conexao, categoria, versao):
+        liberar.wait(5)
+        return original(conexao, categoria, versao)
+
+    monkeypatch.setattr(espelho, "_carregar", carregar_lento)
+    _instalar_versao(downloader, "producao")
+    try:
+        # Montagem em andamento: a consulta responde com a geração anterior
+        inicio = time.monotonic()
+        resultado = espelho.consultar("SELECT versao FROM categorias WHERE categoria = 'producao'")
+        assert time.monotonic() - inicio < 1
+        assert resultado["linhas"] == [[1]]
+    finally:
+        liberar.set()
+    _aguardar_montagem(espelho)
+    assert espelho.consultar("SELECT versao FROM categorias WHERE categoria = 'producao'")["linhas"] == [[2]]
+
+
+def test_nova_versao_montada_da_carga_do_aviso(downloader, espelho, monkeypatch):
+    espelho.consultar("SELECT 1")
+    lidas = []
+    original = downloader.carga_vigente
+    monkeypatch.setattr(downloader, "carga_vigente", lambda categoria: lidas.append(categoria) or original(categoria))
+    _instalar_versao(downloader, "producao")
+    _aguardar_montagem(espelho)
+    # producao veio do aviso e exportacao_vinho, da geração anterior
+    assert lidas == []
+    assert espelho.consultar("SELECT versao FROM categorias WHERE categoria = 'producao'")["linhas"] == [[2]]
+
+
+def test_montagem_nao_traz_de_volta_categorias_despejadas(downloader, monkeypatch):
+    monkeypatch.setattr(modulo_downloader, "CACHE_MAX_BYTES", 1)
+    downloader._aplicar_orcamento("exportacao_vinho")
+    assert list(downloader._cache) == ["exportacao_vinho"]
+
+    espelho = SQLMirror(downloader)
+    linhas = espelho.consultar("SELECT categoria, versao, linhas FROM categorias ORDER BY categoria")["linhas"]
+    assert linhas == [
+        [categoria, 1, len(carregar_dataframe(categoria)) * len(ANOS)] for categoria in sorted(CATEGORIAS)
+    ]
+    # producao foi lida do disco só para a montagem; exportacao_vinho saiu para dar lugar ao espelho
+    assert not downloader._cache
+    assert sorted(downloader._despejadas) == sorted(CATEGORIAS)
+
+
+def test_geracao_conta_no_orcamento(downloader, espelho, monkeypatch):
+    antes = downloader.memory_budget()["bytes"]
+    monkeypatch.setattr(modulo_downloader, "CACHE_MAX_BYTES", antes)
+    espelho.consultar("SELECT 1")
+
+    orcamento = downloader.memory_budget()
+    assert orcamento["externas"]["espelho_sql"] > 0
+    # A montagem não guardou o formato longo no cache; o espelho tirou uma categoria da memória
+    assert all("longo" not in entrada.get("derivados", {}) for entrada in downloader._cache.values())
+    assert len(downloader._despejadas) == 1
+    assert orcamento["bytes"] <= antes
@@ -0,0 +1,50 @@
+"""
+Testes das métricas de comércio exterior: precisão dos valores em US$.
+"""
+import numpy as np
+import pandas as pd
+
+from src.utils import trade_metrics
+from src.utils.trade_metrics import TradeBalance
+
+
+def _df(valores):
+    # Quantidade (kg) e valor (US$) de 1970, em colunas pareadas como nos CSVs
+    return pd.DataFrame({
+        "Id": range(1, len(valores) + 1),
+        "País": [pais for pais, _, _ in valores],
+        "1970": [quantidade for _, quantidade, _ in valores],
+        "1970.1": [valor for _, _, valor in valores],
+    })
+
+
+class DownloaderFalso:
+    def __init__(self, metricas):
+        self.metricas = metricas
+
+    def get_trade_metrics(self, categoria):
+        return self.metricas[categoria]
+
+    def versao(self, categoria):
+        return 1
+
+
+def test_preco_unitario_sem_perda_de_precisao():
+    metricas = trade_metrics.calcular(_df([("Chile", 3, 150_000_003), ("Peru", 1, 1)]), None, "País")
+    # Em float32, 150000003 vira 150000000
+    assert metricas["preco_unitario"][0, 0] == 50_000_001
+    assert metricas["participacao_valor"][1, 0] == 1 / 150_000_004
+
+
+def test_saldo_sem_perda_de_precisao():
+    exportacao = trade_metrics.calcular(_df([("Chile", 10, 150_000_003)]), None, "País")
+    importacao = trade_metrics.calcular(_df([("Chile", 10, 150_000_001)]), None, "País")
+    saldos = TradeBalance(DownloaderFalso({"exportacao_vinho": exportacao, "importacao_vinho": importacao}))
+    assert saldos.saldo("exportacao_vinho")["saldo_valor"][0, 0] == 2
+    assert saldos.saldo("importacao_vinho")["saldo_quantidade"][0, 0] == 0
+    assert exportacao["matriz"].valores.dtype == np.float64
+
+
+def test_sem_colunas_de_valor():
+    df = pd.DataFrame({"Id": [1], "produto": ["Tinto"], "1970": [10]})
+    assert trade_metrics.calcular(df, None, "produto") is None
@@ -0,0 +1,216 @@
+"""
+Testes do cliente upstream: retentativas, prazo total, hedging, circuit
+breaker e gravação/reprodução das respostas.
+"""
+import io
+import itertools
+import threading
+import time
+
+import pytest
+import requests
+
+from src.utils import upstream as modulo_upstream
+from src.utils.cassette import Cassette
+from src.utils.circuit_breaker import CircuitOpenError, get_breaker
+from src.utils.upstream import UpstreamClient, UpstreamError
+
+_hosts = itertools.count(1)
+
+
+def _url() -> str:
+    # Um host por teste: os circuit breakers são compartilhados por host
+    return f"http://upstream-{next(_hosts)}.teste/arquivo.csv"
+
+
+def _resposta(status: int, corpo: bytes = b"ok") -> requests.Response:
+    resposta = requests.Response()
+    resposta.status_code = status
+    resposta._content = corpo
+    resposta.raw = io.BytesIO(corpo)
+    return resposta
+
+
+class SessaoFalsa:
+    """
+    Substitui requests.Session: cada chamada consome o próximo passo do roteiro.
+
+    Um passo é um status, uma exceção ou uma tupla (atraso, status).
+    """
+
+    def __init__(self, roteiro):
+        self.roteiro = list(roteiro)
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, stream=False):
+        with self._lock:
+            passo = self.roteiro[min(self.chamadas, len(self.roteiro) - 1)]
+            self.chamadas += 1
+        if isinstance(passo, tuple):
+            atraso, passo = passo
+            time.sleep(atraso)
+        if isinstance(passo, Exception):
+            raise passo
+        return _resposta(passo)
+
+
+class CorpoLento(io.RawIOBase):
+    """
+    Corpo enviado aos poucos: cada leitura respeita o timeout, mas o corpo não termina.
+    """
+
+    def __init__(self, duracao: float):
+        self.fim = time.monotonic() + duracao
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        if time.monotonic() >= self.fim:
+            return 0
+        time.sleep(0.02)
+        destino[0:1] = b"x"
+        return 1
+
+
+class SessaoLenta:
+    """
+    Substitui requests.Session: URLs com "lento" enviam o corpo aos poucos, as demais respondem na hora.
+    """
+
+    def __init__(self):
+        self.timeouts = []
+
+    def get(self, url, timeout=None, stream=False):
+        self.timeouts.append(timeout)
+        if "lento" not in url:
+            return _resposta(200)
+        resposta = requests.Response()
+        resposta.status_code = 200
+        resposta.raw = CorpoLento(5.0)
+        if not stream:
+            # Como no requests: sem stream, o corpo é lido antes de retornar
+            resposta.content
+        return resposta
+
+
+@pytest.fixture(autouse=True)
+def backoff_curto(monkeypatch):
+    monkeypatch.setattr(modulo_upstream, "UPSTREAM_BACKOFF_BASE", 0.001)
+
+
+def _cliente(roteiro, **kwargs) -> UpstreamClient:
+    cliente = UpstreamClient(cassete=Cassette(modo="off"), **kwargs)
+    cliente._session = SessaoFalsa(roteiro)
+    return cliente
+
+
+def test_repete_apos_5xx_e_erro_de_rede():
+    cliente = _cliente([503, requests.ConnectionError("recusada"), 200], retries=2)
+    resposta = cliente.get(_url())
+    assert resposta.status_code == 200
+    metricas = cliente.metrics()
+    assert metricas["tentativas"] == 3
+    assert metricas["retentativas"] == 2
+    assert metricas["falhas"] == 0
+
+
+def test_4xx_nao_e_repetido():
+    cliente = _cliente([404, 200], retries=2)
+    assert cliente.get(_url()).status_code == 404
+    assert cliente.metrics()["tentativas"] == 1
+
+
+def test_falha_definitiva_apos_esgotar_retentativas():
+    url = _url()
+    cliente = _cliente([500], retries=2)
+    with pytest.raises(UpstreamError):
+        cliente.get(url)
+    assert cliente.metrics()["tentativas"] == 3
+    assert cliente.metrics()["falhas"] == 1
+    assert get_breaker(url).falhas == 1
+
+
+def test_prazo_total_interrompe_a_espera():
+    cliente = _cliente([(2.0, 200)], retries=3)
+    inicio = time.monotonic()
+    with pytest.raises((UpstreamError, requests.Timeout)):
+        cliente.get(_url(), deadline=0.2)
+    assert time.monotonic() - inicio < 1.0
+
+
+def test_corpo_lento_nao_prende_as_threads_do_pool():
+    cliente = UpstreamClient(retries=0, cassete=Cassette(modo="off"))
+    cliente._session = SessaoLenta()
+    erros = []
+
+    def chamar():
+        try:
+            # Um host por chamada: nenhuma é recusada pelo circuit breaker
+            cliente.get(_url().replace("upstream", "upstream-lento"), deadline=0.2)
+        except Exception as e:
+            erros.append(e)
+
+    # Mais chamadas que threads no pool, todas presas no mesmo servidor lento
+    threads = [threading.Thread(target=chamar) for _ in range(cliente._executor._max_workers + 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(erros) == len(threads)
+    assert all(conexao <= 0.2 and leitura <= 0.2 for conexao, leitura in cliente._session.timeouts)
+
+    # As leituras foram abandonadas no prazo: o pool atende a próxima chamada de imediato
+    time.sleep(0.1)
+    inicio = time.monotonic()
+    assert cliente.get(_url(), deadline=0.5).status_code == 200
+    assert time.monotonic() - inicio < 0.2
+
+
+def test_hedge_vence_requisicao_lenta():
+    cliente = _cliente([(1.0, 200), 200], retries=0, hedge=True)
+    cliente._atraso_hedge = lambda host: 0.05
+    inicio = time.monotonic()
+    assert cliente.get(_url()).status_code == 200
+    assert time.monotonic() - inicio < 0.8
+    metricas = cliente.metrics()
+    assert metricas["hedges"] == 1
+    assert metricas["hedges_vencedores"] == 1
+
+
+def test_sem_hedge_quando_a_resposta_chega_antes_do_atraso():
+    cliente = _cliente([200], retries=0, hedge=True)
+    cliente._atraso_hedge = lambda host: 0.5
+    cliente.get(_url())
+    assert cliente.metrics()["hedges"] == 0
+
+
+def test_circuito_aberto_recusa_sem_requisitar():
+    url = _url()
+    breaker = get_breaker(url)
+    breaker.tempo_abertura = 60
+    for _ in range(breaker.limite_falhas):
+        breaker.registrar_falha()
+    cliente = _cliente([200])
+    with pytest.raises(CircuitOpenError):
+        cliente.get(url)
+    assert cliente._session.chamadas == 0
+    assert cliente.metrics()["recusadas_circuito"] == 1
+
+
+def test_gravacao_e_reproducao(tmp_path):
+    url = _url()
+    gravador = _cliente([200], retries=0)
+    gravador.cassete = Cassette(str(tmp_path), "record")
+    gravada = gravador.get(url)
+
+    reprodutor = UpstreamClient(cassete=Cassette(str(tmp_path), "replay", latencia=0.05))
+    inicio = time.monotonic()
+    reproduzida = reprodutor.get(url)
+    assert time.monotonic() - inicio >= 0.05
+    assert reproduzida.status_code == gravada.status_code
+    assert reproduzida.content == gravada.content
+
+    with pytest.raises(UpstreamError):
+        reprodutor.get(_url())
@@ -0,0 +1,73 @@
+"""
+Testes do aquecimento: dados locais antigos são atualizados ou sinalizados.
+"""
+import asyncio
+import os
+import shutil
+import time
+
+import pytest
+
+from src.utils.config import CACHE_TTL
+from src.utils.csv_downloader import CSVDownloader
+from src.utils.warmup import WarmUp
+
+CATEGORIAS = ("producao", "exportacao_vinho")
+
+
+@pytest.fixture()
+def pequeno(dados_dir, tmp_path):
+    # Cópia dos CSVs: os testes alteram a data de modificação dos arquivos
+    for categoria in CATEGORIAS:
+        shutil.copytree(os.path.join(dados_dir, categoria), tmp_path / categoria)
+    d = CSVDownloader(data_dir=str(tmp_path))
+    d.DOWNLOAD_URLS = {categoria: CSVDownloader.DOWNLOAD_URLS[categoria] for categoria in CATEGORIAS}
+    return d
+
+
+def _envelhecer(d, categoria):
+    caminho = d.get_latest_csv(categoria)
+    antigo = time.time() - CACHE_TTL - 60
+    os.utime(caminho, (antigo, antigo))
+    return caminho
+
+
+def test_csv_local_antigo_sem_embrapa_fica_pronto_desatualizado(pequeno):
+    _envelhecer(pequeno, "producao")
+    aquecimento = WarmUp(pequeno)
+    # O cliente upstream está em modo replay sem gravações: o download falha
+    asyncio.run(aquecimento.run())
+
+    assert aquecimento.ready()
+    assert aquecimento.desatualizadas() == ["producao"]
+    assert pequeno.status()["producao"]["origem"] == "local"
+    assert not pequeno.status()["exportacao_vinho"]["desatualizado"]
+
+
+def test_csv_local_antigo_e_atualizado_da_embrapa(pequeno, monkeypatch):
+    caminho = _envelhecer(pequeno, "producao")
+    with open(caminho, "rb") as f:
+        conteudo = f.read()
+    baixadas = []
+
+    def baixar(categoria):
+        baixadas.append(categoria)
+        return conteudo
+
+    monkeypatch.setattr(pequeno, "_download", baixar)
+    aquecimento = WarmUp(pequeno)
+    asyncio.run(aquecimento.run())
+
+    assert baixadas == ["producao"]
+    assert aquecimento.ready()
+    assert aquecimento.desatualizadas() == []
+    assert pequeno.status()["producao"]["origem"] == "web"
+
+
+def test_readyz_informa_dados_desatualizados(client, monkeypatch):
+    from src.api.endpoints import health
+
+    monkeypatch.setattr(health.warmup, "desatualizadas", lambda: ["producao"])
+    resposta = client.get("/readyz")
+    assert resposta.status_code == 200
+    assert resposta.json()["status"] == "pronto_desatualizado"
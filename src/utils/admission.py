@@ -0,0 +1,276 @@
+"""
+Controle de admissão das requisições: limites de concorrência por categoria
+(compartimentos) e global, com fila de espera limitada.
+
+Sem limites, um pico de tráfego deixa todas as requisições presas na carga
+dos datasets e uma categoria lenta (ex.: importacao_vinho com a Embrapa
+instável) ocupa a capacidade das demais. Cada requisição precisa de uma
+vaga no compartimento da sua categoria e depois de uma vaga global; quando
+não há vaga, espera no máximo ADMISSION_QUEUE_TIMEOUT segundos, e só
+ADMISSION_QUEUE requisições podem esperar ao mesmo tempo. As demais são
+recusadas imediatamente com 503 e `Retry-After`, em vez de esgotarem o
+timeout do cliente.
+
+Todo o controle roda no event loop, sem locks: as vagas são passadas
+diretamente de quem sai para o primeiro da fila, em ordem de chegada.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+from src.utils.config import (
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_CATEGORY_CONCURRENCY,
+    ADMISSION_CATEGORY_LIMITS,
+    ADMISSION_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRY_AFTER,
+)
+from src.utils.csv_downloader import resolve_categoria
+from src.utils.metrics import ADMISSION_REJECTED, ADMISSION_WAIT
+
+# Rotas sem controle de admissão: o stream de eventos mantém a conexão aberta indefinidamente
+ISENTAS = ("/api/v1/events",)
+
+
+class Saturado(Exception):
+    """
+    Requisição recusada por falta de vaga.
+    """
+
+    def __init__(self, compartimento: str, motivo: str):
+        super().__init__(f"Sem vaga em {compartimento} ({motivo})")
+        self.compartimento = compartimento
+        self.motivo = motivo
+
+
+class Compartimento:
+    """
+    Limite de requisições simultâneas com fila de espera em ordem de chegada.
+    """
+
+    def __init__(self, nome: str, limite: int):
+        """
+        Args:
+            nome: Categoria ou "global"
+            limite: Requisições simultâneas (0 = sem limite)
+        """
+        self.nome = nome
+        self.limite = limite
+        self.ativos = 0
+        self._fila: deque = deque()
+
+    def livre(self) -> bool:
+        """
+        Indica se há vaga sem passar na frente de quem já espera.
+        """
+        return self.limite <= 0 or (self.ativos < self.limite and not self._fila)
+
+    def ocupar(self):
+        """
+        Ocupa uma vaga livre (ver `livre`).
+        """
+        self.ativos += 1
+
+    async def aguardar(self, espera: float) -> bool:
+        """
+        Espera a próxima vaga por até `espera` segundos.
+
+        Returns:
+            True se a vaga foi obtida, False se o tempo acabou
+        """
+        vaga = asyncio.get_running_loop().create_future()
+        self._fila.append(vaga)
+        try:
+            # shield: o timeout cancela a espera, não a vaga, que pode ter sido passada no mesmo instante
+            await asyncio.wait_for(asyncio.shield(vaga), max(espera, 0))
+            return True
+        except asyncio.TimeoutError:
+            if vaga.done():
+                return True
+            vaga.cancel()
+            return False
+        except asyncio.CancelledError:
+            # Cliente desconectado: devolve a vaga, se ela chegou a ser passada
+            if vaga.done() and not vaga.cancelled():
+                self.liberar()
+            else:
+                vaga.cancel()
+            raise
+        finally:
+            if vaga in self._fila:
+                self._fila.remove(vaga)
+
+    def liberar(self):
+        """
+        Devolve a vaga, passando-a ao primeiro da fila se houver.
+        """
+        while self._fila:
+            vaga = self._fila.popleft()
+            if not vaga.done():
+                # A vaga muda de dono sem passar por `ativos`
+                vaga.set_result(None)
+                return
+        self.ativos -= 1
+
+    def esperando(self) -> int:
+        """
+        Requisições na fila.
+        """
+        return sum(1 for vaga in self._fila if not vaga.done())
+
+
+class AdmissionControl:
+    """
+    Compartimentos por categoria e global, com fila de espera compartilhada.
+    """
+
+    def __init__(self, limite_global: int = ADMISSION_MAX_CONCURRENCY,
+                 limite_categoria: int = ADMISSION_CATEGORY_CONCURRENCY,
+                 limites: Optional[Dict[str, int]] = None,
+                 fila: int = ADMISSION_QUEUE,
+                 espera: float = ADMISSION_QUEUE_TIMEOUT,
+                 retry_after: int = ADMISSION_RETRY_AFTER):
+        """
+        Args:
+            limite_global: Requisições simultâneas no processo (0 = sem limite)
+            limite_categoria: Requisições simultâneas por categoria (0 = sem limite)
+            limites: Limites específicos por categoria
+            fila: Requisições que podem esperar por vaga ao mesmo tempo
+            espera: Segundos máximos de espera por vaga
+            retry_after: Segundos sugeridos ao cliente nas recusas
+        """
+        self.limite_categoria = limite_categoria
+        self.limites = ADMISSION_CATEGORY_LIMITS if limites is None else limites
+        self.fila = fila
+        self.espera = espera
+        self.retry_after = retry_after
+        self.global_ = Compartimento("global", limite_global)
+        self._categorias: Dict[str, Compartimento] = {}
+        self._esperando = 0
+
+    def _compartimento(self, categoria: str) -> Compartimento:
+        compartimento = self._categorias.get(categoria)
+        if compartimento is None:
+            compartimento = Compartimento(categoria, self.limites.get(categoria, self.limite_categoria))
+            self._categorias[categoria] = compartimento
+        return compartimento
+
+    @asynccontextmanager
+    async def admitir(self, categoria: Optional[str]):
+        """
+        Ocupa uma vaga da categoria (se houver) e uma vaga global durante o bloco.
+
+        A vaga da categoria vem primeiro: requisições de uma categoria lenta
+        esperam no próprio compartimento sem ocupar a capacidade global.
+
+        Raises:
+            Saturado: Fila cheia ou espera esgotada
+        """
+        compartimentos = [self._compartimento(categoria)] if categoria else []
+        compartimentos.append(self.global_)
+        async with self._ocupar(compartimentos):
+            yield
+
+    @asynccontextmanager
+    async def categorias(self, categorias: Iterable[str]):
+        """
+        Ocupa uma vaga no compartimento de cada categoria durante o bloco.
+
+        Usado pelas rotas que acessam várias categorias (lote, consulta
+        cruzada, busca e SQL), cuja vaga global já foi ocupada pelo
+        middleware. As vagas são ocupadas em ordem alfabética, para que duas
+        requisições nunca esperem uma pela outra.
+
+        Raises:
+            Saturado: Fila cheia ou espera esgotada
+        """
+        async with self._ocupar([self._compartimento(categoria) for categoria in sorted(set(categorias))]):
+            yield
+
+    @asynccontextmanager
+    async def _ocupar(self, compartimentos: List[Compartimento]):
+        prazo = time.monotonic() + self.espera
+        ocupados = []
+        try:
+            for compartimento in compartimentos:
+                if compartimento.livre():
+                    compartimento.ocupar()
+                else:
+                    await self._aguardar(compartimento, prazo)
+                ocupados.append(compartimento)
+            yield
+        finally:
+            for compartimento in reversed(ocupados):
+                compartimento.liberar()
+
+    async def _aguardar(self, compartimento: Compartimento, prazo: float):
+        if self._esperando >= self.fila:
+            ADMISSION_REJECTED.inc(compartimento=compartimento.nome, motivo="fila_cheia")
+            raise Saturado(compartimento.nome, "fila cheia")
+        inicio = time.monotonic()
+        self._esperando += 1
+        try:
+            obtida = await compartimento.aguardar(prazo - inicio)
+        finally:
+            self._esperando -= 1
+        if not obtida:
+            ADMISSION_REJECTED.inc(compartimento=compartimento.nome, motivo="espera")
+            raise Saturado(compartimento.nome, "espera esgotada")
+        ADMISSION_WAIT.observe(time.monotonic() - inicio, compartimento=compartimento.nome)
+
+    def recusa(self, erro: Saturado) -> HTTPException:
+        """
+        Resposta 503 com Retry-After para uma recusa dentro de um endpoint.
+        """
+        return HTTPException(
+            status_code=503,
+            detail=f"Serviço sobrecarregado, tente novamente em instantes ({erro.compartimento}).",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Vagas ocupadas e requisições na fila, no total e por compartimento.
+        """
+        return {
+            "esperando": self._esperando,
+            "compartimentos": {
+                compartimento.nome: {
+                    "ativos": compartimento.ativos,
+                    "limite": compartimento.limite,
+                    "esperando": compartimento.esperando(),
+                }
+                for compartimento in [self.global_, *self._categorias.values()]
+            },
+        }
+
+
+def categoria_da_rota(caminho: str) -> Optional[str]:
+    """
+    Categoria do dataset acessado pela rota, antes do roteamento do FastAPI.
+
+    Cobre as rotas dos módulos (/api/v1/importacao/importacao/vinho) e as
+    de séries e métricas (/api/v1/importacao/vinho/series). Busca, lote,
+    consulta cruzada e SQL ocupam as vagas das categorias que carregam no
+    próprio endpoint (ver AdmissionControl.categorias).
+
+    Returns:
+        Chave da categoria ou None
+    """
+    partes = caminho.strip("/").split("/")[2:]
+    if len(partes) >= 3 and partes[0] == partes[1]:
+        categoria = resolve_categoria(partes[0], partes[2])
+        if categoria:
+            return categoria
+    if len(partes) >= 2:
+        return resolve_categoria(partes[0], partes[1])
+    return None
+
+
+# Instância compartilhada pelo middleware da aplicação (src/main.py)
+admissao = AdmissionControl()
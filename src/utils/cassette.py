@@ -0,0 +1,163 @@
+"""
+Gravação e reprodução das respostas da Embrapa ("cassetes").
+
+O desempenho do downloader e dos scrapers só podia ser medido contra o
+site real, com tempos de resposta longos e erráticos. Com
+UPSTREAM_CASSETTE_MODE=record, cada resposta obtida pelo cliente upstream
+(downloads dos CSVs e páginas dos scrapers) é gravada em
+UPSTREAM_CASSETTE_DIR; com UPSTREAM_CASSETTE_MODE=replay, as respostas vêm
+desse diretório, sem rede, com latência injetada opcional: fixa
+(UPSTREAM_REPLAY_LATENCY, em segundos, mais UPSTREAM_REPLAY_JITTER) ou a
+medida na gravação (UPSTREAM_REPLAY_LATENCY=gravada).
+
+Cada resposta ocupa dois arquivos, com o nome derivado da URL:
+
+- `<nome>.json`: URL, status, cabeçalhos, codificação, duração e data da gravação
+- `<nome>.bin`: corpo da resposta, byte a byte
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import logging
+from datetime import datetime
+from typing import Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from src.utils.config import (
+    UPSTREAM_CASSETTE_MODE,
+    UPSTREAM_CASSETTE_DIR,
+    UPSTREAM_REPLAY_LATENCY,
+    UPSTREAM_REPLAY_JITTER,
+)
+
+logger = logging.getLogger(__name__)
+
+MODOS = ("off", "record", "replay")
+
+# Latência de reprodução igual à medida na gravação
+LATENCIA_GRAVADA = "gravada"
+
+# Cabeçalhos gravados: os que mudam a interpretação do corpo
+CABECALHOS = ("Content-Type", "Content-Disposition", "Last-Modified", "ETag")
+
+
+class CassetteMissing(Exception):
+    """
+    Nenhuma resposta gravada para a URL (modo replay).
+    """
+
+
+class Cassette:
+    """
+    Diretório de respostas gravadas do upstream.
+    """
+
+    def __init__(self, diretorio: str = UPSTREAM_CASSETTE_DIR, modo: str = UPSTREAM_CASSETTE_MODE,
+                 latencia: Union[float, str] = UPSTREAM_REPLAY_LATENCY, jitter: float = UPSTREAM_REPLAY_JITTER):
+        """
+        Args:
+            diretorio: Diretório dos arquivos gravados
+            modo: "off", "record" ou "replay"
+            latencia: Atraso de cada resposta reproduzida, em segundos, ou "gravada"
+            jitter: Atraso adicional aleatório (uniforme entre 0 e jitter)
+        """
+        if modo not in MODOS:
+            logger.warning(f"UPSTREAM_CASSETTE_MODE inválido: {modo}; usando off")
+            modo = "off"
+        self.diretorio = diretorio
+        self.modo = modo
+        self.gravada = str(latencia).strip().lower() == LATENCIA_GRAVADA
+        self.latencia = 0.0 if self.gravada else float(latencia)
+        self.jitter = jitter
+        # Semente fixa: a mesma sequência de atrasos a cada execução
+        self._aleatorio = random.Random(0)
+        if modo == "record":
+            os.makedirs(diretorio, exist_ok=True)
+
+    @staticmethod
+    def nome(url: str) -> str:
+        """
+        Nome dos arquivos da URL: parte legível (arquivo ou consulta) e hash da URL completa.
+        """
+        partes = urlsplit(url)
+        legivel = os.path.basename(partes.path) + (f"_{partes.query}" if partes.query else "")
+        legivel = re.sub(r"[^A-Za-z0-9._=-]+", "_", legivel)[:60]
+        return f"{legivel}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]}"
+
+    def gravar(self, url: str, resposta: requests.Response, duracao: float):
+        """
+        Grava a resposta, substituindo uma gravação anterior da mesma URL.
+
+        Args:
+            url: URL pedida (chave da gravação)
+            resposta: Resposta recebida
+            duracao: Segundos da chamada, com retentativas
+        """
+        base = os.path.join(self.diretorio, self.nome(url))
+        meta = {
+            "url": url,
+            "status": resposta.status_code,
+            "cabecalhos": {nome: resposta.headers[nome] for nome in CABECALHOS if nome in resposta.headers},
+            "codificacao": resposta.encoding,
+            "duracao": round(duracao, 4),
+            "gravado_em": datetime.now().isoformat(timespec="seconds"),
+        }
+        try:
+            # Corpo antes dos metadados: um .json sempre tem o .bin correspondente completo
+            for caminho, modo, conteudo in ((f"{base}.bin", "wb", resposta.content),
+                                            (f"{base}.json", "w", json.dumps(meta, ensure_ascii=False, indent=2))):
+                temporario = f"{caminho}.{os.getpid()}.tmp"
+                with open(temporario, modo, **({} if "b" in modo else {"encoding": "utf-8"})) as f:
+                    f.write(conteudo)
+                os.replace(temporario, caminho)
+            logger.info(f"Resposta gravada: {url} -> {base}.json")
+        except OSError as e:
+            logger.error(f"Erro ao gravar resposta de {url}: {str(e)}")
+
+    def reproduzir(self, url: str) -> requests.Response:
+        """
+        Reproduz a resposta gravada da URL, após a latência configurada.
+
+        Returns:
+            Resposta equivalente à gravada (status, cabeçalhos, codificação e corpo)
+
+        Raises:
+            CassetteMissing: Se não houver gravação para a URL
+        """
+        base = os.path.join(self.diretorio, self.nome(url))
+        try:
+            with open(f"{base}.json", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(f"{base}.bin", "rb") as f:
+                conteudo = f.read()
+        except FileNotFoundError:
+            raise CassetteMissing(f"Nenhuma resposta gravada para {url} em {self.diretorio}")
+
+        atraso = meta["duracao"] if self.gravada else self.latencia
+        if self.jitter:
+            atraso += self._aleatorio.uniform(0, self.jitter)
+        if atraso > 0:
+            time.sleep(atraso)
+
+        resposta = requests.Response()
+        resposta.status_code = meta["status"]
+        resposta.headers = CaseInsensitiveDict(meta["cabecalhos"])
+        resposta.encoding = meta["codificacao"]
+        resposta.url = url
+        resposta.reason = "Replay"
+        resposta._content = conteudo
+        return resposta
+
+    def gravacoes(self) -> int:
+        """
+        Número de respostas gravadas no diretório.
+        """
+        if not os.path.isdir(self.diretorio):
+            return 0
+        return sum(1 for arquivo in os.listdir(self.diretorio) if arquivo.endswith(".json"))
@@ -0,0 +1,158 @@
+"""
+Circuit breaker por host para as chamadas ao site da Embrapa.
+
+Quando o servidor da Embrapa está fora do ar, cada requisição esperaria o
+timeout completo antes de recorrer aos dados locais. Após
+BREAKER_FAILURE_THRESHOLD falhas seguidas o circuito abre: as chamadas
+seguintes falham imediatamente (servindo o último dataset válido) e uma
+thread em segundo plano sonda o host a cada BREAKER_RESET_TIMEOUT segundos,
+fechando o circuito assim que ele volta a responder.
+"""
+import threading
+import time
+import logging
+from typing import Callable, Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from src.utils.config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    BREAKER_PROBE_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """
+    Chamada recusada porque o circuito do host está aberto.
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com estados fechado, aberto e meio-aberto (sondagem).
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, nome: str, sonda: Callable[[], bool],
+                 limite_falhas: int = BREAKER_FAILURE_THRESHOLD,
+                 tempo_abertura: float = BREAKER_RESET_TIMEOUT):
+        """
+        Args:
+            nome: Identificação do circuito (normalmente o host)
+            sonda: Função que retorna True se o host voltou a responder
+            limite_falhas: Falhas consecutivas para abrir o circuito
+            tempo_abertura: Segundos entre sondagens com o circuito aberto
+        """
+        self.nome = nome
+        self.sonda = sonda
+        self.limite_falhas = limite_falhas
+        self.tempo_abertura = tempo_abertura
+        self.estado = self.FECHADO
+        self.falhas = 0
+        self.aberto_em: Optional[float] = None
+        self._lock = threading.Lock()
+        self._sondando = False
+
+    def permitir(self) -> bool:
+        """
+        Indica se uma chamada ao host pode ser feita agora.
+        """
+        return self.estado == self.FECHADO
+
+    def registrar_sucesso(self):
+        """
+        Registra uma chamada bem-sucedida e fecha o circuito.
+        """
+        with self._lock:
+            if self.estado != self.FECHADO:
+                logger.info(f"Circuito {self.nome} fechado")
+            self.estado = self.FECHADO
+            self.falhas = 0
+            self.aberto_em = None
+
+    def registrar_falha(self):
+        """
+        Registra uma falha; abre o circuito ao atingir o limite.
+        """
+        with self._lock:
+            self.falhas += 1
+            if self.estado == self.FECHADO and self.falhas >= self.limite_falhas:
+                self.estado = self.ABERTO
+                self.aberto_em = time.time()
+                logger.warning(f"Circuito {self.nome} aberto após {self.falhas} falhas seguidas")
+                self._iniciar_sondagem()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Estado atual do circuito.
+        """
+        return {"estado": self.estado, "falhas": self.falhas, "aberto_em": self.aberto_em}
+
+    def _iniciar_sondagem(self):
+        if self._sondando:
+            return
+        self._sondando = True
+        threading.Thread(target=self._sondar, name=f"sonda-{self.nome}", daemon=True).start()
+
+    def _sondar(self):
+        """
+        Sonda o host em segundo plano até que ele volte a responder.
+        """
+        try:
+            while True:
+                time.sleep(self.tempo_abertura)
+                with self._lock:
+                    self.estado = self.MEIO_ABERTO
+                try:
+                    ok = self.sonda()
+                except Exception:
+                    ok = False
+                if ok:
+                    self.registrar_sucesso()
+                    return
+                with self._lock:
+                    self.estado = self.ABERTO
+                    self.aberto_em = time.time()
+        finally:
+            self._sondando = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """
+    Obtém (criando se necessário) o circuit breaker do host da URL.
+
+    Args:
+        url: Qualquer URL do host
+
+    Returns:
+        CircuitBreaker compartilhado por todas as chamadas ao host
+    """
+    partes = urlsplit(url)
+    host = partes.netloc
+    with _breakers_lock:
+        if host not in _breakers:
+            raiz = f"{partes.scheme}://{host}/"
+
+            def sonda() -> bool:
+                return requests.get(raiz, timeout=BREAKER_PROBE_TIMEOUT).status_code < 500
+
+            _breakers[host] = CircuitBreaker(host, sonda)
+        return _breakers[host]
+
+
+def breakers_status() -> Dict[str, Dict[str, Any]]:
+    """
+    Estado de todos os circuitos conhecidos, por host.
+    """
+    return {host: breaker.status() for host, breaker in _breakers.items()}
@@ -0,0 +1,221 @@
+"""
+Exportação colunar dos datasets em Apache Arrow (IPC stream) e Parquet.
+
+As tabelas Arrow são montadas a partir dos DataFrames já em cache, coluna a
+coluna, sem passar pelos registros JSON; a tabela e os bytes do dataset
+completo ficam memoizados por versão (ver CSVDownloader.get_derived). Uma
+resposta filtrada é um `take` das linhas selecionadas sobre a mesma tabela.
+
+Depende do pacote opcional `pyarrow` (`pip install -r requirements-colunar.txt`); sem ele, os
+endpoints respondem 501 aos formatos colunares e continuam servindo JSON.
+"""
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from src.utils.long_format import longo_da_carga
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # dependência opcional
+    pa = pq = None
+
+# Tipo de conteúdo e extensão de cada formato colunar
+FORMATOS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def disponivel() -> bool:
+    """
+    Indica se o pyarrow está instalado.
+    """
+    return pa is not None
+
+
+def tabela(df) -> "pa.Table":
+    """
+    Converte um DataFrame em tabela Arrow, preservando os tipos das colunas.
+
+    Colunas de texto com valores de tipos misturados (ex.: números e "nd")
+    são convertidas para texto.
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mistas = {coluna: "string" for coluna in df.columns if df[coluna].dtype == object}
+        return pa.Table.from_pandas(df.astype(mistas), preserve_index=False)
+
+
+def serializar(tabela_arrow: "pa.Table", formato: str) -> bytes:
+    """
+    Serializa a tabela no formato pedido ("arrow" ou "parquet").
+    """
+    destino = pa.BufferOutputStream()
+    if formato == "arrow":
+        with pa.ipc.new_stream(destino, tabela_arrow.schema) as escritor:
+            escritor.write_table(tabela_arrow)
+    else:
+        pq.write_table(tabela_arrow, destino, compression="zstd")
+    return destino.getvalue().to_pybytes()
+
+
+def _colunar(entrada: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Tabela Arrow da entrada e a posição de cada registro JSON nela.
+
+    A estrutura é memoizada na própria entrada, isto é, por categoria e
+    versão; os registros são mantidos nela para que cada posição seja
+    conferida pela identidade do objeto, e não apenas pelo `id()`, que pode
+    ser reutilizado por objetos criados depois que os originais são liberados.
+    """
+    # No modo "shared", os registros são montados a cada requisição e não têm identidade fixa
+    registros = entrada["result"].get("data") or None
+    return {
+        "tabela": tabela(entrada["df"]),
+        "registros": registros,
+        "posicoes": {id(item): pos for pos, item in enumerate(registros or [])},
+    }
+
+
+def _posicoes(colunar: Dict[str, Any], registros: List[Dict[str, Any]]) -> Optional[List[int]]:
+    """
+    Posições dos registros na tabela em cache, ou None se algum não for um registro da mesma versão.
+    """
+    cache = colunar["registros"]
+    if cache is None:
+        return None
+    posicoes = []
+    for item in registros:
+        pos = colunar["posicoes"].get(id(item))
+        if pos is None or cache[pos] is not item:
+            return None
+        posicoes.append(pos)
+    return posicoes
+
+
+def _tabela_registros(registros: List[Dict[str, Any]], esquema: "pa.Schema") -> "pa.Table":
+    """
+    Tabela Arrow de registros avulsos com o esquema da tabela em cache, para
+    que as colunas de ano mantenham os tipos do dataset completo.
+    """
+    try:
+        return pa.Table.from_pylist(registros, schema=esquema)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Colunas de tipos misturados são texto na tabela em cache (ver `tabela`)
+        texto = {campo.name for campo in esquema if pa.types.is_string(campo.type)}
+        convertidos = [
+            {coluna: str(valor) if coluna in texto and valor is not None else valor for coluna, valor in item.items()}
+            for item in registros
+        ]
+        return pa.Table.from_pylist(convertidos, schema=esquema)
+
+
+def exportar(downloader, categoria: str, registros: List[Dict[str, Any]], formato: str) -> Optional[bytes]:
+    """
+    Serializa os registros selecionados de uma categoria a partir da tabela em cache.
+
+    Args:
+        downloader: CSVDownloader com a categoria em cache
+        categoria: Nome da categoria
+        registros: Registros da resposta JSON (todos ou um subconjunto,
+            nos mesmos objetos do cache, como retornados por get_data)
+        formato: "arrow" ou "parquet"
+
+    Returns:
+        Bytes serializados ou None se os dados não estiverem disponíveis
+    """
+    colunar = downloader.get_derived(categoria, "colunar", _colunar)
+    if colunar is None:
+        return None
+    # Sem identidade fixa (modo "shared"), o dataset inteiro é reconhecido pelo número de linhas
+    completo = colunar["registros"] is None and len(registros) == colunar["tabela"].num_rows
+    if completo or registros is colunar["registros"]:
+        # Dataset inteiro: os bytes são calculados uma vez por versão
+        return downloader.get_derived(categoria, formato, lambda entrada: serializar(colunar["tabela"], formato))
+    posicoes = _posicoes(colunar, registros)
+    if posicoes is None:
+        # Registros de uma versão substituída durante a requisição ou montados a cada requisição (modo "shared")
+        return serializar(_tabela_registros(registros, colunar["tabela"].schema), formato)
+    return serializar(colunar["tabela"].take(pa.array(posicoes, type=pa.int32())), formato)
+
+
+def tabela_longa(longo, categoria: str) -> "pa.Table":
+    """
+    Tabela Arrow do formato longo (ver long_format.to_long), com esquema fixo
+    e a coluna `categoria` codificada como dicionário.
+    """
+    esquema = pa.schema([
+        ("entidade", pa.string()),
+        ("pai", pa.string()),
+        ("folha", pa.bool_()),
+        ("ano", pa.int16()),
+        ("quantidade", pa.float64()),
+        ("valor", pa.float64()),
+    ])
+    resultado = pa.Table.from_pandas(longo[esquema.names], schema=esquema, preserve_index=False)
+    rotulos = pa.DictionaryArray.from_arrays(np.zeros(len(longo), dtype=np.int32), pa.array([categoria]))
+    return resultado.add_column(0, "categoria", rotulos)
+
+
+class CatalogExport:
+    """
+    Exportação de todas as categorias em uma única tabela no formato longo,
+    refeita apenas quando a versão de alguma categoria muda.
+
+    As tabelas e os bytes serializados contam no orçamento de memória do
+    downloader (CACHE_MAX_BYTES); as categorias despejadas são lidas do disco
+    só para montar a sua tabela, sem voltar ao cache (ver carga_vigente).
+    """
+
+    def __init__(self, downloader):
+        """
+        Args:
+            downloader: CSVDownloader de onde vêm os datasets
+        """
+        self.downloader = downloader
+        self._versoes: Dict[str, Optional[int]] = {}
+        self._tabelas: Dict[str, "pa.Table"] = {}
+        self._bytes: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        downloader.registrar_memoria("catalogo_colunar", self.memoria)
+
+    def memoria(self) -> int:
+        """
+        Bytes das tabelas e dos catálogos serializados mantidos em memória.
+        """
+        tabelas, serializados = list(self._tabelas.values()), list(self._bytes.values())
+        return sum(t.nbytes for t in tabelas) + sum(len(b) for b in serializados)
+
+    def exportar(self, formato: str) -> bytes:
+        """
+        Catálogo completo serializado no formato pedido ("arrow" ou "parquet").
+        """
+        versoes = {categoria: self.downloader.versao(categoria) for categoria in self.downloader.DOWNLOAD_URLS}
+        with self._lock:
+            if versoes != self._versoes:
+                for categoria, versao in versoes.items():
+                    if versao is not None and self._versoes.get(categoria) == versao:
+                        continue
+                    carga = self.downloader.carga_vigente(categoria)
+                    if carga is None:
+                        # Ainda não carregada: carrega como as demais exportações
+                        self.downloader.get_data(categoria)
+                        carga = self.downloader.carga_vigente(categoria)
+                    if carga is not None:
+                        self._tabelas[categoria] = tabela_longa(longo_da_carga(carga), categoria)
+                        versoes[categoria] = carga["versao"]
+                    del carga
+                self._versoes = versoes
+                self._bytes = {}
+            novo = formato not in self._bytes
+            if novo:
+                self._bytes[formato] = serializar(pa.concat_tables(list(self._tabelas.values())), formato)
+            conteudo = self._bytes[formato]
+        if novo:
+            self.downloader.aplicar_orcamento()
+        return conteudo
@@ -16,6 +16,98 @@ API_VERSION = "1.0.0"
 # Configurações de requisições
 REQUEST_TIMEOUT = 30  # segundos
 
+# Chamadas ao site da Embrapa
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3"))  # segundos
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "10"))  # segundos sem receber dados
+UPSTREAM_DEADLINE = float(os.getenv("UPSTREAM_DEADLINE", "20"))  # prazo total de cada chamada, com retentativas
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))  # retentativas após a primeira tentativa
+UPSTREAM_BACKOFF_BASE = 0.5  # segundos; dobra a cada retentativa, com jitter completo
+UPSTREAM_BACKOFF_MAX = 4.0  # limite do backoff entre retentativas
+UPSTREAM_HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE_ENABLED", "false").lower() in ("1", "true", "sim")
+UPSTREAM_HEDGE_DELAY = float(os.getenv("UPSTREAM_HEDGE_DELAY", "3"))  # atraso do hedge até haver amostras para o p95
+UPSTREAM_HEDGE_MIN_DELAY = 0.2  # atraso mínimo do hedge, mesmo com p95 menor
+LOCAL_CSV_KEEP = 3  # CSVs baixados mantidos por categoria para fallback
+
+# Gravação e reprodução das respostas da Embrapa (ver src/utils/cassette.py)
+UPSTREAM_CASSETTE_MODE = os.getenv("UPSTREAM_CASSETTE_MODE", "off")  # "off", "record" ou "replay"
+UPSTREAM_CASSETTE_DIR = os.getenv("UPSTREAM_CASSETTE_DIR", os.path.join(DATA_DIR, "cassetes"))
+UPSTREAM_REPLAY_LATENCY = os.getenv("UPSTREAM_REPLAY_LATENCY", "0")  # segundos por resposta ou "gravada"
+UPSTREAM_REPLAY_JITTER = float(os.getenv("UPSTREAM_REPLAY_JITTER", "0"))  # atraso adicional uniforme entre 0 e o valor
+
+# Circuit breaker por host (ver src/utils/circuit_breaker.py)
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))  # falhas seguidas para abrir
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))  # segundos entre sondagens
+BREAKER_PROBE_TIMEOUT = float(os.getenv("BREAKER_PROBE_TIMEOUT", "5"))  # timeout de cada sondagem
+
+# Configurações de cache
+CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))  # segundos que um dataset carregado permanece válido
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", "0"))  # orçamento de memória do cache de datasets (0 = ilimitado)
+
+# Armazenamento compartilhado entre workers (ver src/utils/shared_store.py)
+# "local": cada processo baixa os dados; "loader": baixa e publica snapshots; "shared": só anexa snapshots
+DATA_STORE_MODE = os.getenv("DATA_STORE_MODE", "local")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "/tmp/vitibrasil_snapshots")
+SHARED_POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", "5"))  # segundos entre verificações de nova versão
+
+# Leitor dos CSVs (ver src/utils/light_csv.py)
+# "pandas": pd.read_csv; "stdlib": módulo csv, sem importar o pandas até alguma estrutura derivada precisar dele
+CSV_LOADER = os.getenv("CSV_LOADER", "pandas")
+
+# Atualização em segundo plano (ver src/utils/scheduler.py)
+# Desativada por padrão: cada worker ou instância serverless rodaria o próprio agendador. Só o
+# processo "loader" a ativa sem configuração; um processo único "local" pode ativá-la explicitamente
+REFRESH_ENABLED = os.getenv("REFRESH_ENABLED", "true" if DATA_STORE_MODE == "loader" else "false").lower() in ("1", "true", "sim")
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "1800"))  # segundos entre atualizações de cada categoria
+# Intervalos específicos por categoria, ex.: {"producao": 86400}
+REFRESH_INTERVALS = {
+    "producao": 6 * 3600,
+    "comercializacao": 6 * 3600,
+}
+REFRESH_JITTER = 0.1  # variação aleatória de ±10% no intervalo
+REFRESH_MAX_CONCURRENCY = int(os.getenv("REFRESH_MAX_CONCURRENCY", "2"))  # categorias atualizadas ao mesmo tempo
+REFRESH_STAGGER = 2.0  # segundos entre as primeiras execuções de cada categoria
+REFRESH_BACKOFF_BASE = 30.0  # segundos de espera após a primeira falha, dobrando a cada falha
+REFRESH_BACKOFF_MAX = 1800.0  # limite do backoff
+
+# Perfilamento das requisições (ver src/utils/profiling.py)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "sim")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.01"))  # fração perfilada com cProfile
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", "500"))  # requisições mais lentas guardam a linha do tempo
+PROFILING_KEEP = 50  # perfis mantidos em memória
+
+# Logging (ver src/utils/logger.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Níveis por módulo, no formato "src.utils.upstream=DEBUG,src.api=WARNING"
+LOG_LEVELS = {
+    nome.strip(): nivel.strip().upper()
+    for nome, nivel in (item.split("=", 1) for item in os.getenv("LOG_LEVELS", "").split(",") if "=" in item)
+}
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" ou "text"
+LOG_FILE = os.getenv("LOG_FILE", "")  # arquivo adicional de log (opcional)
+
+# Token exigido (cabeçalho X-Admin-Token) nos endpoints administrativos; vazio desativa esses endpoints
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Consultas SQL sobre o espelho SQLite dos datasets (ver src/utils/sql_mirror.py)
+SQL_TIMEOUT = float(os.getenv("SQL_TIMEOUT", "2"))  # segundos de execução por consulta
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "5000"))  # linhas retornadas por consulta
+
+# Controle de admissão das requisições (ver src/utils/admission.py)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))  # requisições em andamento no processo (0 = sem limite)
+ADMISSION_CATEGORY_CONCURRENCY = int(os.getenv("ADMISSION_CATEGORY_CONCURRENCY", "16"))  # por categoria (0 = sem limite)
+# Limites específicos por categoria, no formato "importacao_vinho=4,producao=32"
+ADMISSION_CATEGORY_LIMITS = {
+    nome.strip(): int(limite)
+    for nome, limite in (item.split("=", 1) for item in os.getenv("ADMISSION_CATEGORY_LIMITS", "").split(",") if "=" in item)
+}
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "128"))  # requisições aguardando vaga; as seguintes recebem 503
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))  # segundos de espera por uma vaga
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))  # valor do cabeçalho Retry-After nas respostas 503
+
+# Stream de eventos de novas versões dos datasets (ver src/utils/events.py)
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))  # segundos entre comentários de keep-alive
+EVENTS_HISTORY = 100  # eventos guardados para clientes que reconectam com Last-Event-ID
+
 # URLs base da Embrapa
 EMBRAPA_BASE_URL = "http://vitibrasil.cnpuv.embrapa.br"
 PRODUCAO_URL = f"{EMBRAPA_BASE_URL}/index.php?opcao=opt_01"
@@ -0,0 +1,84 @@
+"""
+Detecção do formato dos CSVs da Embrapa: codificação, separador e linha do cabeçalho.
+
+Os arquivos não seguem um padrão único: os de processamento usam tabulação,
+os demais ponto e vírgula, e alguns vêm em Windows-1252 em vez de UTF-8.
+Ler todos com `sep=';'` produz uma única coluna com a linha inteira, ou
+falha na decodificação. O perfil é detectado uma vez por categoria a partir
+do conteúdo baixado, guardado pelo CSVDownloader junto dos CSVs locais e
+reutilizado nas cargas seguintes; só é refeito quando deixa de servir.
+"""
+import csv
+from collections import Counter
+from typing import Dict, Any, List
+
+# Codificações tentadas, em ordem; latin-1 decodifica qualquer sequência de bytes
+CODIFICACOES = ("utf-8-sig", "cp1252", "latin-1")
+
+# Separadores candidatos
+SEPARADORES = (";", "\t", ",")
+
+# Linhas examinadas na detecção do separador
+AMOSTRA_LINHAS = 50
+
+# Perfil usado enquanto nenhum foi detectado (formato mais comum nos arquivos)
+PADRAO = {"encoding": "utf-8-sig", "sep": ";", "cabecalho": 0}
+
+
+def codificacao(conteudo: bytes) -> str:
+    """
+    Primeira codificação de CODIFICACOES que decodifica o conteúdo inteiro.
+    """
+    for nome in CODIFICACOES:
+        try:
+            conteudo.decode(nome)
+            return nome
+        except UnicodeDecodeError:
+            continue
+    return CODIFICACOES[-1]
+
+
+def _larguras(linhas: List[str], sep: str) -> List[int]:
+    return [len(campos) for campos in csv.reader(linhas, delimiter=sep)]
+
+
+def detectar(conteudo: bytes) -> Dict[str, Any]:
+    """
+    Detecta o perfil do CSV.
+
+    O separador escolhido é o que divide as linhas da amostra no mesmo
+    número de campos (maior que um) na maior fração delas; o cabeçalho é a
+    primeira linha com esse número de campos, o que descarta títulos e
+    linhas em branco antes da tabela.
+
+    Args:
+        conteudo: Bytes do CSV
+
+    Returns:
+        Dicionário com "encoding", "sep" e "cabecalho" (linhas a pular antes do cabeçalho)
+    """
+    encoding = codificacao(conteudo)
+    linhas = conteudo.decode(encoding).splitlines()[:AMOSTRA_LINHAS]
+    preenchidas = [linha for linha in linhas if linha.strip()]
+    if not preenchidas:
+        return dict(PADRAO, encoding=encoding)
+
+    melhor = None
+    for sep in SEPARADORES:
+        larguras = _larguras(preenchidas, sep)
+        largura, ocorrencias = Counter(larguras).most_common(1)[0]
+        if largura < 2:
+            continue
+        pontuacao = (ocorrencias / len(larguras), largura)
+        if melhor is None or pontuacao > melhor[0]:
+            melhor = (pontuacao, sep, largura)
+    if melhor is None:
+        return dict(PADRAO, encoding=encoding)
+
+    _, sep, largura = melhor
+    cabecalho = 0
+    for posicao, linha in enumerate(linhas):
+        if linha.strip() and _larguras([linha], sep)[0] == largura:
+            cabecalho = posicao
+            break
+    return {"encoding": encoding, "sep": sep, "cabecalho": cabecalho}
@@ -4,12 +4,41 @@ Módulo de download de dados CSV da Embrapa.
 Este módulo é responsável por baixar os arquivos CSV diretamente do site da Embrapa
 e gerenciar o fallback para arquivos locais quando o download falhar.
 """
+import io
 import os
-import requests
+import json
+import re
+import time
+import hashlib
+import threading
 import logging
-import pandas as pd
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Union, TYPE_CHECKING
 from datetime import datetime
+from src.utils.config import (
+    DATA_DIR,
+    CACHE_TTL,
+    CACHE_MAX_BYTES,
+    DATA_STORE_MODE,
+    CSV_LOADER,
+    SNAPSHOT_DIR,
+    SHARED_POLL_INTERVAL,
+    LOCAL_CSV_KEEP,
+)
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.upstream import upstream
+from src.utils.hierarchy import HierarchyIndex
+from src.utils import light_csv, csv_dialect
+from src.utils.long_format import to_long, coluna_entidade
+from src.utils.year_matrix import YearMatrix
+from src.utils import trade_metrics
+from src.utils.shared_store import SnapshotStore
+from src.utils.metrics import DATASET_LOAD, CACHE_LOOKUPS, CACHE_EVICTIONS
+from src.utils.profiling import span
+from src.utils.sizing import estimar_bytes
+from src.utils.events import eventos, diferencas
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -40,14 +69,46 @@ class CSVDownloader:
         "exportacao_suco": "http://vitibrasil.cnpuv.embrapa.br/download/ExpSuco.csv"
     }
     
-    def __init__(self, data_dir: str = "/tmp"):
+    # Colunas de quantidade não listadas nas subcategorias
+    COLUNAS_QUANTIDADE = ['quantidade', 'quantidade (l)', 'quantidade (l.)', 'quantidade (kg)']
+    
+    def __init__(self, data_dir: str = "/tmp", modo: Optional[str] = None):
         """
         Inicializa o downloader de CSV.
         
         Args:
             data_dir: Diretório base para armazenamento dos arquivos CSV
+            modo: "local" (padrão: cada processo baixa e mantém seus dados),
+                "loader" (baixa e publica snapshots compartilhados) ou
+                "shared" (apenas anexa os snapshots publicados pelo loader).
+                Se omitido, usa DATA_STORE_MODE.
         """
         self.data_dir = data_dir
+        self.modo = modo or DATA_STORE_MODE
+        self._store = SnapshotStore(SNAPSHOT_DIR) if self.modo in ("loader", "shared") else None
+        # Leitor dos CSVs: os snapshots do modo compartilhado são montados a partir de DataFrames
+        self.leitor = CSV_LOADER
+        if self.leitor == "stdlib" and self.modo != "local":
+            logger.warning(f"CSV_LOADER=stdlib não é suportado no modo {self.modo}; usando pandas")
+            self.leitor = "pandas"
+        # Ativado pelo RefreshScheduler: o cache deixa de expirar no caminho das requisições
+        self.background_refresh = False
+        # Cache em memória por categoria: dados já processados e índices derivados
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        # Um lock por categoria: requisições concorrentes aguardam uma única carga
+        self._locks: Dict[str, threading.Lock] = {
+            categoria: threading.Lock() for categoria in self.DOWNLOAD_URLS
+        }
+        # Categorias despejadas pelo orçamento de memória (CACHE_MAX_BYTES):
+        # versão, hash e validade do que foi servido, para a restauração do disco
+        self._despejadas: Dict[str, Dict[str, Any]] = {}
+        self._orcamento_lock = threading.Lock()
+        # Formato detectado dos CSVs de cada categoria (ver src/utils/csv_dialect.py)
+        self._perfis: Dict[str, Dict[str, Any]] = {}
+        # Funções avisadas a cada nova versão (ver ouvir)
+        self._ouvintes: List[Callable[[str, Dict[str, Any]], None]] = []
+        # Estruturas mantidas fora do cache que contam no orçamento (ver registrar_memoria)
+        self._externas: Dict[str, Callable[[], int]] = {}
         self._ensure_directories()
     
     def _ensure_directories(self):
@@ -73,31 +134,62 @@ class CSVDownloader:
         if categoria not in self.DOWNLOAD_URLS:
             logger.error(f"Categoria inválida: {categoria}")
             return None
-            
-        url = self.DOWNLOAD_URLS[categoria]
-        categoria_dir = os.path.join(self.data_dir, categoria)
         
-        # Nome do arquivo com timestamp para evitar conflitos
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{categoria}_{timestamp}.csv"
-        filepath = os.path.join(categoria_dir, filename)
+        conteudo = self._download(categoria)
+        if conteudo is None:
+            return None
+        return self._save_csv(categoria, conteudo)
+    
+    def _download(self, categoria: str) -> Optional[bytes]:
+        """
+        Baixa o conteúdo do CSV da categoria pelo cliente upstream (prazo total,
+        retentativas, hedging e circuit breaker do host).
+        
+        Com o circuito aberto a chamada falha imediatamente, sem esperar timeouts.
         
+        Returns:
+            Conteúdo do arquivo ou None em caso de falha
+        """
+        url = self.DOWNLOAD_URLS[categoria]
         try:
             logger.info(f"Tentando baixar CSV de {url}")
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                logger.info(f"CSV baixado com sucesso: {filepath}")
-                return filepath
-            else:
-                logger.warning(f"Falha ao baixar CSV. Status code: {response.status_code}")
-                return None
-                
+            response = upstream.get(url)
+        except CircuitOpenError:
+            logger.warning(f"Circuito aberto para {url}; download ignorado")
+            return None
         except Exception as e:
             logger.error(f"Erro ao baixar CSV: {str(e)}")
             return None
+        
+        if response.status_code != 200:
+            logger.warning(f"Falha ao baixar CSV. Status code: {response.status_code}")
+            return None
+        return response.content
+    
+    def _save_csv(self, categoria: str, conteudo: bytes) -> str:
+        """
+        Salva o CSV baixado no diretório da categoria, mantendo apenas os mais recentes.
+        
+        Returns:
+            Caminho do arquivo salvo
+        """
+        categoria_dir = os.path.join(self.data_dir, categoria)
+        
+        # Nome do arquivo com timestamp para evitar conflitos
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(categoria_dir, f"{categoria}_{timestamp}.csv")
+        with open(filepath, 'wb') as f:
+            f.write(conteudo)
+        logger.info(f"CSV baixado com sucesso: {filepath}")
+        
+        csv_files = sorted(
+            (f for f in os.listdir(categoria_dir) if f.endswith('.csv')),
+            key=lambda x: os.path.getmtime(os.path.join(categoria_dir, x)),
+            reverse=True,
+        )
+        for antigo in csv_files[LOCAL_CSV_KEEP:]:
+            os.remove(os.path.join(categoria_dir, antigo))
+        return filepath
     
     def get_latest_csv(self, categoria: str) -> Optional[str]:
         """
@@ -129,53 +221,777 @@ class CSVDownloader:
         """
         Obtém os dados da categoria, tentando baixar primeiro e usando fallback se necessário.
         
+        Os dados processados ficam em cache por CACHE_TTL segundos.
+        
         Args:
             categoria: Nome da categoria (producao, processamento, etc.)
-            force_download: Se True, força o download mesmo que exista arquivo local
+            force_download: Se True, ignora o cache e força um novo download
             
         Returns:
             Dicionário com os dados ou None em caso de falha
         """
-        csv_path = None
-        # Sempre tenta baixar o arquivo mais recente da web
+        entrada = self._get_entry(categoria, force_download)
+        if entrada is None:
+            return None
+        if "data" not in entrada["result"]:
+            # Modo "shared": registros e subcategorias montados das colunas mapeadas do snapshot
+            return {**entrada["result"], "data": entrada["tabela"].registros(),
+                    "subcategorias": entrada["tabela"].subcategorias()}
+        # Cópia rasa: os endpoints substituem "data" ao aplicar filtros
+        return dict(entrada["result"])
+    
+    @staticmethod
+    def registros(entrada: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Registros de uma entrada de cache ou carga (ver ouvir).
+        
+        No modo "shared", os registros não ficam em cache: são montados a
+        cada chamada a partir das colunas mapeadas do snapshot.
+        """
+        data = entrada["result"].get("data")
+        return data if data is not None else entrada["tabela"].registros()
+    
+    def em_cache(self, categoria: str) -> bool:
+        """
+        Indica se a categoria pode ser servida do cache sem carga.
+        
+        Usado pelo controle de admissão para levar as cargas para fora do event loop.
+        """
+        entrada = self._cache.get(categoria)
+        return bool(entrada) and self._is_fresh(categoria, entrada)
+    
+    def preparar(self, categoria: str) -> bool:
+        """
+        Carrega a categoria se necessário, sem copiar os dados.
+        
+        Returns:
+            True se a categoria está disponível, False caso contrário
+        """
+        return self._get_entry(categoria) is not None
+    
+    def get_hierarchy(self, categoria: str) -> Optional[HierarchyIndex]:
+        """
+        Obtém o índice hierárquico (pai/filho) da categoria.
+        
+        Args:
+            categoria: Nome da categoria
+            
+        Returns:
+            Índice hierárquico ou None se a categoria não tiver a coluna `control`
+        """
+        entrada = self._get_entry(categoria)
+        return self._materializar(categoria, entrada)["hierarquia"] if entrada else None
+    
+    def get_year_matrix(self, categoria: str) -> Optional[YearMatrix]:
+        """
+        Obtém a matriz densa entidade x ano x medida da categoria.
+        
+        Args:
+            categoria: Nome da categoria
+            
+        Returns:
+            YearMatrix ou None se os dados não estiverem disponíveis
+        """
+        entrada = self._get_entry(categoria)
+        if entrada is None:
+            return None
+        if entrada["matriz"] is None:
+            # Leitor leve: montada com o DataFrame; no modo "shared", já vem mapeada do snapshot
+            self._materializar(categoria, entrada)
+        return entrada["matriz"]
+    
+    def get_trade_metrics(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém o preço unitário e as participações no total calculados na
+        carga das categorias de importação e exportação.
+        
+        Args:
+            categoria: Nome da categoria
+            
+        Returns:
+            Métricas (ver trade_metrics.calcular) ou None se a categoria não
+            tiver valor em US$ ou os dados não estiverem disponíveis
+        """
+        entrada = self._get_entry(categoria)
+        if entrada is None:
+            return None
+        if entrada["matriz"] is None:
+            # Calculadas junto com a matriz densa (ver get_year_matrix)
+            self._materializar(categoria, entrada)
+        return entrada["metricas"]
+    
+    def get_long_data(self, categoria: str) -> Optional["pd.DataFrame"]:
+        """
+        Obtém os dados da categoria em formato longo (entidade x ano).
+        
+        Args:
+            categoria: Nome da categoria
+        
+        Returns:
+            DataFrame longo (ver long_format.to_long) ou None em caso de falha
+        """
+        return self.get_derived(categoria, "longo", lambda entrada: to_long(entrada["df"], entrada["hierarquia"]))
+    
+    def get_derived(self, categoria: str, nome: str, construtor: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Obtém uma estrutura derivada do dataset, calculada uma vez por versão.
+        
+        Args:
+            categoria: Nome da categoria
+            nome: Nome da estrutura derivada
+            construtor: Função que recebe a entrada de cache e constrói a estrutura
+        
+        Returns:
+            Estrutura derivada ou None se os dados não estiverem disponíveis
+        """
+        entrada = self._get_entry(categoria)
+        if entrada is None:
+            return None
+        self._materializar(categoria, entrada)
+        derivados = entrada.setdefault("derivados", {})
+        if nome not in derivados:
+            estrutura = derivados[nome] = construtor(entrada)
+            # O que a estrutura referencia da própria entrada (DataFrame, registros) já é contado nela
+            proprias = {id(valor) for valor in (entrada["df"], *entrada["result"].values())}
+            entrada.setdefault("memoria_derivados", {})[nome] = estimar_bytes(estrutura, proprias)
+            self._aplicar_orcamento(categoria)
+            return estrutura
+        return derivados[nome]
+    
+    def versao(self, categoria: str) -> Optional[int]:
+        """
+        Versão da categoria em cache, ou despejada para o disco, sem carregá-la.
+        
+        Args:
+            categoria: Nome da categoria
+        
+        Returns:
+            Número da versão ou None se a categoria ainda não foi carregada
+        """
+        entrada = self._cache.get(categoria) or self._despejadas.get(categoria)
+        return entrada["versao"] if entrada else None
+    
+    def carga_vigente(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Carga da versão em uso da categoria, sem carregá-la no cache.
+        
+        Usado pelas estruturas montadas sobre todas as categorias (espelho
+        SQL), que não devem trazer de volta à memória as categorias
+        despejadas pelo orçamento: retorna a entrada em cache, se houver, ou
+        a leitura do disco da categoria despejada, que o chamador descarta
+        depois do uso.
+        
+        Args:
+            categoria: Nome da categoria
+        
+        Returns:
+            Carga com "versao", ou None se a categoria não foi carregada ou se
+            o disco não tem mais a versão em uso
+        """
+        entrada = self._cache.get(categoria)
+        if entrada is not None:
+            return entrada
+        despejada = self._despejadas.get(categoria)
+        if despejada is None:
+            return None
+        carga = self._carga_local(categoria)
+        if carga is None or carga.setdefault("hash", self._hash_carga(carga)) != despejada["hash"]:
+            return None
+        carga["versao"] = despejada["versao"]
+        return carga
+    
+    def _materializar(self, categoria: str, entrada: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Monta o DataFrame, o índice hierárquico e a matriz densa de uma entrada
+        carregada pelo leitor leve (CSV_LOADER=stdlib) ou anexada de um
+        snapshot (modo "shared"), no primeiro uso.
+        
+        Os registros e as subcategorias já são servidos sem pandas; só as
+        estruturas derivadas precisam dele. A matriz e as métricas de um
+        snapshot já vêm mapeadas e não são recalculadas.
+        
+        Returns:
+            A própria entrada, com "df", "hierarquia", "matriz" e "metricas" preenchidos
+        """
+        if entrada["df"] is not None:
+            return entrada
+        with self._locks[categoria]:
+            if entrada["df"] is None:
+                with span("materializar"):
+                    df = entrada["tabela"].to_dataframe()
+                    hierarquia = HierarchyIndex(df) if 'control' in df.columns else None
+                    entrada["hierarquia"] = hierarquia
+                    if entrada["matriz"] is None:
+                        entrada["matriz"] = YearMatrix.from_dataframe(df, hierarquia)
+                        entrada["metricas"] = trade_metrics.calcular(df, hierarquia, coluna_entidade(df))
+                    entrada["df"] = df
+                if "data" in entrada["result"]:
+                    # Leitor leve: os registros já estão montados; no modo "shared", continuam vindo da tabela
+                    del entrada["tabela"]
+                # As estruturas mudaram: a medida é refeita na próxima consulta
+                entrada.pop("memoria", None)
+        self._aplicar_orcamento(categoria)
+        return entrada
+    
+    def _get_entry(self, categoria: str, force_download: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a entrada de cache da categoria, carregando-a se necessário.
+        """
+        entrada = self._cache.get(categoria)
+        if entrada and not force_download and self._is_fresh(categoria, entrada):
+            CACHE_LOOKUPS.inc(categoria=categoria, resultado="hit")
+            entrada["acessado_em"] = time.monotonic()
+            return entrada
+        
+        lock = self._locks.get(categoria)
+        if lock is None:
+            logger.error(f"Categoria inválida: {categoria}")
+            return None
+        
+        with lock:
+            # Outra thread pode ter concluído a carga enquanto esta aguardava
+            atual = self._cache.get(categoria)
+            if atual is not entrada and atual and self._is_fresh(categoria, atual):
+                CACHE_LOOKUPS.inc(categoria=categoria, resultado="hit")
+                atual["acessado_em"] = time.monotonic()
+                return atual
+            if atual is None and categoria in self._despejadas:
+                # Despejada pelo orçamento de memória: volta do disco, sem acessar a Embrapa
+                atual = self._restaurar(categoria)
+                if atual and not force_download and self._is_fresh(categoria, atual):
+                    CACHE_LOOKUPS.inc(categoria=categoria, resultado="restaurada")
+                    return atual
+            CACHE_LOOKUPS.inc(categoria=categoria, resultado="miss")
+            # Se a atualização falhar, mantém a última versão válida, mesmo expirada
+            return self._reload(categoria) or atual
+    
+    def refresh(self, categoria: str) -> bool:
+        """
+        Recarrega a categoria imediatamente, independentemente do cache.
+        
+        Usado pela atualização em segundo plano (ver src/utils/scheduler.py).
+        
+        Args:
+            categoria: Nome da categoria
+            
+        Returns:
+            True se a carga teve sucesso, False caso contrário
+        """
+        lock = self._locks.get(categoria)
+        if lock is None:
+            logger.error(f"Categoria inválida: {categoria}")
+            return False
+        with lock:
+            if categoria in self._despejadas:
+                return self._atualizar_despejada(categoria)
+            return self._reload(categoria) is not None
+    
+    def _reload(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Carrega a categoria e atualiza o cache. Deve ser chamado com o lock da categoria.
+        
+        Returns:
+            Entrada de cache vigente ou None se a carga falhou
+        """
+        carga = self._attach(categoria) if self.modo == "shared" else self._fetch(categoria)
+        if carga is None:
+            return None
+        return self._install(categoria, carga)
+    
+    def load_local(self, categoria: str) -> bool:
+        """
+        Carrega a categoria sem acessar a Embrapa: do snapshot compartilhado,
+        se houver, ou do CSV local mais recente (diretório de dados ou
+        arquivos distribuídos em DATA_DIR). Usado no aquecimento da aplicação.
+        
+        Args:
+            categoria: Nome da categoria
+            
+        Returns:
+            True se a categoria ficou disponível em cache
+        """
+        lock = self._locks.get(categoria)
+        if lock is None:
+            logger.error(f"Categoria inválida: {categoria}")
+            return False
+        with lock:
+            if categoria in self._cache:
+                return True
+            carga = self._carga_local(categoria)
+            if carga is None:
+                return False
+            self._install(categoria, carga)
+            return True
+    
+    def _carga_local(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Lê a categoria do snapshot compartilhado ou do CSV local mais recente.
+        
+        Returns:
+            Carga processada ou None se não houver dados locais
+        """
+        carga = self._attach(categoria) if self._store else None
+        if carga is not None:
+            return carga
+        csv_path = self.get_latest_csv(categoria) or self._bundled_csv(categoria)
+        if csv_path is None:
+            return None
         try:
-            url = self.DOWNLOAD_URLS[categoria]
-            logger.info(f"Lendo CSV diretamente da web: {url}")
-            df = pd.read_csv(url, sep=';')
-            # Extrai o ano do nome do arquivo ou usa o ano atual
-            year = None
-            import re
-            year_match = re.search(r'(\d{4})', url)
-            if year_match:
-                year = year_match.group(1)
-            else:
-                year = str(datetime.now().year)
-            data = df.to_dict('records')
-            subcategorias = self._extract_subcategories(df)
-            result = {
-                "fonte": "Embrapa Vitivinicultura",
-                "url": url,
-                "ano_referencia": year,
-                "data": data,
-                "subcategorias": subcategorias
+            inicio = time.perf_counter()
+            carga = self._read_csv_file(csv_path, categoria)
+            DATASET_LOAD.observe(time.perf_counter() - inicio, categoria=categoria, etapa="local")
+            carga["origem"] = "local"
+            # Os dados têm a idade do arquivo, não da carga
+            carga["dados_em"] = os.path.getmtime(csv_path)
+            return carga
+        except Exception as e:
+            logger.error(f"Erro ao carregar dados do CSV local: {str(e)}")
+            return None
+    
+    def _restaurar(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Recarrega do disco uma categoria despejada. Deve ser chamado com o lock da categoria.
+        
+        Returns:
+            Entrada de cache restaurada ou None se não houver dados locais
+        """
+        carga = self._carga_local(categoria)
+        if carga is None:
+            return None
+        logger.info(f"Categoria {categoria} restaurada do disco ({carga['origem']})")
+        return self._install(categoria, carga)
+    
+    def _atualizar_despejada(self, categoria: str) -> bool:
+        """
+        Atualiza uma categoria despejada sem trazê-la de volta à memória.
+        
+        O download grava o CSV local (ou, no modo "loader", publica o
+        snapshot) e apenas a versão e a validade registradas no despejo são
+        atualizadas; os dados são lidos do disco no próximo acesso. Deve ser
+        chamado com o lock da categoria.
+        
+        Returns:
+            True se a carga teve sucesso, False caso contrário
+        """
+        carga = self._attach(categoria) if self.modo == "shared" else self._fetch(categoria)
+        if carga is None:
+            return False
+        despejada = self._despejadas[categoria]
+        carga.setdefault("hash", self._hash_carga(carga))
+        if carga["hash"] != despejada["hash"]:
+            if self.modo == "loader":
+                self._store.publish(categoria, carga)
+            elif "versao" not in carga:
+                carga["versao"] = despejada["versao"] + 1
+            anterior = dict(despejada)
+            despejada["versao"] = carga["versao"]
+            despejada["hash"] = carga["hash"]
+            if anterior["versao"] != carga["versao"]:
+                # A versão anterior não está em memória: o evento sai sem a contagem de alterações
+                self._publicar_versao(categoria, carga, anterior, None)
+        despejada["carregado_em"] = despejada["verificado_em"] = time.time()
+        despejada["dados_em"] = carga.get("dados_em", despejada["carregado_em"])
+        return True
+    
+    def ouvir(self, ouvinte: Callable[[str, Dict[str, Any]], None]):
+        """
+        Registra uma função chamada a cada nova versão instalada de uma categoria.
+        
+        Usado pelos índices montados sobre várias categorias (busca, espelho
+        SQL) para se atualizarem na carga, e não na primeira consulta. A
+        função recebe a categoria e a carga da nova versão e roda na thread
+        da carga, logo depois de a versão passar a ser servida, mas ainda com
+        o lock da categoria: deve ser rápida e não pode carregar a categoria
+        (ex.: levar a leitura para outra thread).
+        
+        Args:
+            ouvinte: Função (categoria, carga)
+        """
+        self._ouvintes.append(ouvinte)
+    
+    def registrar_memoria(self, nome: str, medir: Callable[[], int]):
+        """
+        Registra uma estrutura mantida fora do cache (ex.: o espelho SQL) cujo
+        tamanho conta no orçamento CACHE_MAX_BYTES.
+        
+        A estrutura não é despejada: quando ela cresce, saem as entradas do
+        cache (ver aplicar_orcamento).
+        
+        Args:
+            nome: Nome da estrutura em memory_budget
+            medir: Função que retorna os bytes ocupados no momento; deve ser rápida
+        """
+        self._externas[nome] = medir
+    
+    def _publicar_versao(self, categoria: str, carga: Dict[str, Any], anterior: Optional[Dict[str, Any]],
+                         registros_anteriores: Optional[List[Dict[str, Any]]]):
+        """
+        Publica no stream de eventos a instalação de uma nova versão da categoria
+        e avisa os ouvintes registrados (ver ouvir).
+        
+        Args:
+            categoria: Categoria atualizada
+            carga: Carga da nova versão
+            anterior: Entrada (ou registro de despejo) da versão anterior, se houver
+            registros_anteriores: Registros da versão anterior, para contar as linhas alteradas
+        """
+        try:
+            novos = self.registros(carga)
+            eventos.publicar("versao", {
+                "categoria": categoria,
+                "versao": carga["versao"],
+                "versao_anterior": anterior["versao"] if anterior else None,
+                "linhas": len(novos),
+                "alteracoes": diferencas(registros_anteriores, novos),
+                "origem": carga.get("origem"),
+                "publicado_em": datetime.now().isoformat(timespec="seconds"),
+            })
+        except Exception as e:
+            # O evento é informativo: uma falha aqui não pode impedir a instalação da versão
+            logger.error(f"Erro ao publicar evento de {categoria}: {str(e)}")
+        for ouvinte in self._ouvintes:
+            try:
+                ouvinte(categoria, carga)
+            except Exception as e:
+                logger.error(f"Erro ao avisar nova versão de {categoria}: {str(e)}")
+    
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Estado de carga de cada categoria, usado pelos endpoints de saúde.
+        
+        Returns:
+            Dicionário categoria -> estado (carregado ou despejado, origem, versão,
+            idade, se os dados passam de CACHE_TTL, linhas, bytes por estrutura)
+        """
+        agora = time.time()
+        estado = {}
+        for categoria in self.DOWNLOAD_URLS:
+            entrada = self._cache.get(categoria)
+            despejada = self._despejadas.get(categoria)
+            if entrada is None and despejada is not None:
+                # Fora da memória por causa do orçamento, mas disponível no disco
+                estado[categoria] = {
+                    "carregado": False,
+                    "despejado": True,
+                    "versao": despejada["versao"],
+                    "idade": round(agora - despejada["carregado_em"], 1),
+                    "desatualizado": self._desatualizada(despejada, agora),
+                }
+                continue
+            if entrada is None:
+                estado[categoria] = {"carregado": False}
+                continue
+            estado[categoria] = {
+                "carregado": True,
+                "origem": entrada.get("origem"),
+                "versao": entrada["versao"],
+                "idade": round(agora - entrada["carregado_em"], 1),
+                "desatualizado": self._desatualizada(entrada, agora),
+                "linhas": len(entrada["df"] if entrada["df"] is not None else entrada["tabela"]),
+                "bytes": self._memory_usage(entrada),
+            }
+        return estado
+    
+    @staticmethod
+    def _desatualizada(entrada: Dict[str, Any], agora: float) -> bool:
+        """
+        Indica se os dados da entrada têm mais de CACHE_TTL segundos.
+        
+        Difere da validade do cache numa carga local: um CSV antigo recém-lido
+        é servido, mas os dados continuam com a idade do arquivo.
+        """
+        return agora - entrada.get("dados_em", entrada["carregado_em"]) > CACHE_TTL
+    
+    def memory_budget(self) -> Dict[str, Any]:
+        """
+        Uso de memória do cache frente ao orçamento CACHE_MAX_BYTES.
+        
+        Returns:
+            Dicionário com bytes em uso (cache e estruturas externas), orçamento
+            (0 = ilimitado), bytes de cada estrutura externa e categorias despejadas
+        """
+        externas = self._memoria_externa()
+        return {
+            "bytes": sum(sum(self._memory_usage(entrada).values()) for entrada in list(self._cache.values()))
+                     + sum(externas.values()),
+            "orcamento": CACHE_MAX_BYTES,
+            "externas": externas,
+            "despejadas": sorted(self._despejadas),
+        }
+    
+    def _memoria_externa(self) -> Dict[str, int]:
+        """
+        Bytes de cada estrutura registrada em registrar_memoria.
+        """
+        externas = {}
+        for nome, medir in list(self._externas.items()):
+            try:
+                externas[nome] = int(medir())
+            except Exception as e:
+                logger.error(f"Erro ao medir a memória de {nome}: {str(e)}")
+        return externas
+    
+    @staticmethod
+    def _memory_usage(entrada: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Bytes ocupados por estrutura da entrada (ver src/utils/sizing.py).
+        
+        As estruturas da carga são medidas uma vez por versão; as derivadas,
+        quando construídas em get_derived.
+        """
+        if "memoria" not in entrada:
+            # Conjunto compartilhado: o que a matriz ou o índice referenciam do DataFrame conta uma vez
+            vistos = set()
+            entrada["memoria"] = {
+                "df": estimar_bytes(entrada["df"] if entrada["df"] is not None else entrada.get("tabela"), vistos),
+                "registros": estimar_bytes(entrada["result"], vistos),
+                "hierarquia": estimar_bytes(entrada.get("hierarquia"), vistos),
+                "matriz": estimar_bytes(entrada.get("matriz"), vistos),
+                "metricas": estimar_bytes(entrada.get("metricas"), vistos),
             }
-            return result
+        return {**entrada["memoria"], "derivados": sum(entrada.get("memoria_derivados", {}).values())}
+    
+    def aplicar_orcamento(self):
+        """
+        Verifica o orçamento depois que uma estrutura registrada em
+        registrar_memoria cresceu, despejando entradas do cache se preciso.
+        """
+        self._aplicar_orcamento(None)
+    
+    def _aplicar_orcamento(self, protegida: Optional[str]):
+        """
+        Mantém o cache, somado às estruturas registradas em registrar_memoria,
+        dentro de CACHE_MAX_BYTES.
+        
+        Libera primeiro as estruturas derivadas, reconstruídas sob demanda sem
+        recarga, e depois entradas inteiras, que voltam do snapshot ou do CSV
+        local no próximo acesso (ver _restaurar). A ordem é LRU ponderada pelo
+        tamanho: sai primeiro a entrada com maior produto entre o tempo sem
+        acesso e os bytes ocupados. A categoria recém-carregada ou consultada
+        nunca é liberada.
+        
+        Args:
+            protegida: Categoria que motivou a verificação, se houver
+        """
+        if CACHE_MAX_BYTES <= 0:
+            return
+        with self._orcamento_lock:
+            entradas = dict(self._cache)
+            tamanhos = {categoria: self._memory_usage(entrada) for categoria, entrada in entradas.items()}
+            total = sum(sum(partes.values()) for partes in tamanhos.values()) + sum(self._memoria_externa().values())
+            if total <= CACHE_MAX_BYTES:
+                return
+            agora = time.monotonic()
+            candidatas = sorted(
+                (categoria for categoria in entradas if categoria != protegida),
+                key=lambda c: (agora - entradas[c].get("acessado_em", 0)) * sum(tamanhos[c].values()),
+                reverse=True,
+            )
+            for categoria in candidatas:
+                if total <= CACHE_MAX_BYTES:
+                    return
+                if tamanhos[categoria]["derivados"]:
+                    entradas[categoria].get("derivados", {}).clear()
+                    entradas[categoria].get("memoria_derivados", {}).clear()
+                    total -= tamanhos[categoria].pop("derivados")
+                    CACHE_EVICTIONS.inc(categoria=categoria, tipo="derivados")
+            for categoria in candidatas:
+                if total <= CACHE_MAX_BYTES:
+                    return
+                entrada = entradas[categoria]
+                # Uma recarga concorrente pode ter substituído a entrada: só despeja a medida
+                if self._cache.get(categoria) is not entrada:
+                    continue
+                self._despejadas[categoria] = {
+                    chave: entrada[chave] for chave in ("versao", "hash", "carregado_em", "verificado_em", "dados_em")
+                }
+                del self._cache[categoria]
+                liberado = sum(tamanhos[categoria].values())
+                total -= liberado
+                CACHE_EVICTIONS.inc(categoria=categoria, tipo="entrada")
+                logger.info(f"Categoria {categoria} despejada do cache ({liberado} bytes)")
+            if total > CACHE_MAX_BYTES:
+                em_uso = f" com {protegida} em uso" if protegida else ""
+                logger.warning(f"Cache acima do orçamento: {total} de {CACHE_MAX_BYTES} bytes{em_uso}")
+    
+    def _bundled_csv(self, categoria: str) -> Optional[str]:
+        """
+        CSV distribuído junto com a aplicação em DATA_DIR/<categoria>, se existir.
+        """
+        pasta = os.path.join(DATA_DIR, categoria)
+        if not os.path.isdir(pasta):
+            return None
+        csv_files = sorted(f for f in os.listdir(pasta) if f.endswith('.csv'))
+        return os.path.join(pasta, csv_files[-1]) if csv_files else None
+    
+    def _install(self, categoria: str, carga: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Instala uma carga no cache, atribuindo a versão. Deve ser chamado com o lock da categoria.
+        
+        Returns:
+            Entrada de cache vigente
+        """
+        atual = self._cache.get(categoria)
+        carga.setdefault("hash", self._hash_carga(carga))
+        carga["acessado_em"] = time.monotonic()
+        carga.setdefault("dados_em", time.time())
+        if atual and atual["hash"] == carga["hash"]:
+            # Conteúdo inalterado: mantém a versão e os índices derivados já calculados
+            atual["carregado_em"] = atual["verificado_em"] = time.time()
+            atual["origem"] = carga.get("origem")
+            atual["dados_em"] = carga["dados_em"]
+            atual["acessado_em"] = carga["acessado_em"]
+            return atual
+        
+        despejada = self._despejadas.pop(categoria, None)
+        anterior = atual or despejada
+        nova_versao = False
+        if atual is None and despejada and despejada["hash"] == carga["hash"]:
+            # Restauração do disco: mesma versão e validade da entrada despejada
+            carga["versao"] = despejada["versao"]
+            carga["carregado_em"] = despejada["carregado_em"]
+            carga["verificado_em"] = despejada["verificado_em"]
+        else:
+            if self.modo == "loader":
+                self._store.publish(categoria, carga)
+            elif "versao" not in carga:
+                carga["versao"] = anterior["versao"] + 1 if anterior else 1
+            carga["carregado_em"] = carga["verificado_em"] = time.time()
+            nova_versao = not anterior or anterior["versao"] != carga["versao"]
+        self._cache[categoria] = carga
+        if nova_versao:
+            # Depois da troca: quem for avisado já encontra a nova versão no cache
+            self._publicar_versao(categoria, carga, anterior, self.registros(atual) if atual else None)
+        self._aplicar_orcamento(categoria)
+        return carga
+    
+    def _is_fresh(self, categoria: str, entrada: Dict[str, Any]) -> bool:
+        """
+        Indica se a entrada de cache ainda pode ser servida sem recarga.
+        
+        No modo "shared", a entrada vale enquanto for a versão publicada,
+        verificada no máximo a cada SHARED_POLL_INTERVAL segundos. Com
+        background_refresh ativo, as entradas são renovadas pelo agendador.
+        """
+        agora = time.time()
+        if self.modo != "shared":
+            # Com a atualização em segundo plano ativa, requisições nunca disparam recargas
+            return self.background_refresh or agora - entrada["carregado_em"] < CACHE_TTL
+        if agora - entrada["verificado_em"] < SHARED_POLL_INTERVAL:
+            return True
+        if self._store.versao_atual(categoria) == entrada["versao"]:
+            entrada["verificado_em"] = agora
+            return True
+        return False
+    
+    @classmethod
+    def _hash_carga(cls, carga: Dict[str, Any]) -> str:
+        """
+        Impressão digital da carga: do DataFrame ou, no leitor leve, da tabela lida.
+        """
+        if carga["df"] is None:
+            return carga["tabela"].digest()
+        return cls._hash_dataframe(carga["df"])
+    
+    @staticmethod
+    def _hash_dataframe(df: "pd.DataFrame") -> str:
+        """
+        Impressão digital do conteúdo do DataFrame, usada para detectar novas versões.
+        """
+        import pandas as pd
+
+        digest = hashlib.sha1(",".join(map(str, df.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+    
+    def _attach(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Anexa o snapshot publicado pelo processo carregador (modo "shared").
+        
+        Nada é recalculado no worker: a matriz densa e as métricas vêm
+        mapeadas do snapshot, os registros e as subcategorias são montados a
+        cada requisição (ver get_data) e o DataFrame e o índice hierárquico
+        só no primeiro uso (ver _materializar).
+        
+        Returns:
+            Carga com a tabela mapeada do snapshot ("tabela") ou None
+        """
+        inicio = time.perf_counter()
+        try:
+            snapshot = self._store.attach(categoria)
         except Exception as e:
-            logger.error(f"Erro ao ler CSV da web: {str(e)}. Tentando fallback local...")
-            # Se falhar, tenta baixar e ler localmente
-            csv_path = self.download_csv(categoria)
-            if csv_path is None:
-                csv_path = self.get_latest_csv(categoria)
-                if csv_path:
-                    logger.info(f"Usando arquivo CSV local: {csv_path}")
-                else:
-                    logger.error(f"Não foi possível obter dados para {categoria}")
-                    return None
+            logger.error(f"Erro ao anexar snapshot de {categoria}: {str(e)}")
+            return None
+        if snapshot is None:
+            logger.warning(f"Nenhum snapshot publicado para {categoria}")
+            return None
+        carga = {
+            "df": None,
+            "tabela": snapshot["tabela"],
+            "result": {
+                "fonte": snapshot["fonte"],
+                "url": snapshot["url"],
+                "ano_referencia": snapshot["ano_referencia"],
+            },
+            "hierarquia": None,
+            "matriz": snapshot["matriz"],
+            "metricas": snapshot["metricas"],
+            "versao": snapshot["versao"],
+            "hash": snapshot["hash"],
+            "origem": "snapshot",
+        }
+        DATASET_LOAD.observe(time.perf_counter() - inicio, categoria=categoria, etapa="snapshot")
+        return carga
+    
+    def _fetch(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Baixa o CSV da web uma única vez e, em caso de falha, lê o arquivo local.
+        
+        Se a categoria já estiver em cache, a falha no download não recorre ao
+        arquivo local: o último dataset válido em cache continua sendo servido.
+        
+        Returns:
+            Carga processada (ver _process_dataframe) ou None em caso de falha
+        """
+        url = self.DOWNLOAD_URLS[categoria]
+        inicio = time.perf_counter()
+        with span("upstream"):
+            conteudo = self._download(categoria)
+        DATASET_LOAD.observe(time.perf_counter() - inicio, categoria=categoria, etapa="download")
+        if conteudo is not None:
             try:
-                return self._load_csv_data(csv_path, categoria)
+                inicio = time.perf_counter()
+                # Extrai o ano do nome do arquivo ou usa o ano atual
+                year_match = re.search(r'(\d{4})', url)
+                year = year_match.group(1) if year_match else str(datetime.now().year)
+                carga = self._parse_csv(conteudo, url, year, categoria)
+                DATASET_LOAD.observe(time.perf_counter() - inicio, categoria=categoria, etapa="parse")
+                carga["origem"] = "web"
+                # Guarda o CSV para o fallback local e o aquecimento da aplicação
+                self._save_csv(categoria, conteudo)
+                return carga
             except Exception as e:
-                logger.error(f"Erro ao carregar dados do CSV local: {str(e)}")
-                return None
+                logger.error(f"Erro ao processar CSV baixado de {url}: {str(e)}")
+        
+        if categoria in self._cache or categoria in self._despejadas:
+            return None
+        
+        csv_path = self.get_latest_csv(categoria)
+        if csv_path is None:
+            logger.error(f"Não foi possível obter dados para {categoria}")
+            return None
+        logger.info(f"Usando arquivo CSV local: {csv_path}")
+        try:
+            inicio = time.perf_counter()
+            carga = self._read_csv_file(csv_path, categoria)
+            DATASET_LOAD.observe(time.perf_counter() - inicio, categoria=categoria, etapa="local")
+            carga["origem"] = "local"
+            # Os dados têm a idade do arquivo, não da carga
+            carga["dados_em"] = os.path.getmtime(csv_path)
+            return carga
+        except Exception as e:
+            logger.error(f"Erro ao carregar dados do CSV local: {str(e)}")
+            return None
     
     def _load_csv_data(self, csv_path: str, categoria: str) -> Dict[str, Any]:
         """
@@ -188,41 +1004,226 @@ class CSVDownloader:
         Returns:
             Dicionário com os dados processados
         """
+        return self._read_csv_file(csv_path, categoria)["result"]
+    
+    def _read_csv_file(self, csv_path: str, categoria: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lê um arquivo CSV local e o processa.
+        
+        Args:
+            csv_path: Caminho do arquivo
+            categoria: Categoria do arquivo, cujo formato detectado é reutilizado
+        
+        Returns:
+            Carga processada (ver _process_dataframe)
+        """
         try:
-            # Lê o CSV com separador ';'
-            df = pd.read_csv(csv_path, sep=';')
+            with open(csv_path, 'rb') as f:
+                conteudo = f.read()
             
             # Extrai o ano do nome do arquivo ou usa o ano atual
             year = None
-            import re
             year_match = re.search(r'(\d{4})', os.path.basename(csv_path))
             if year_match:
                 year = year_match.group(1)
             else:
                 year = str(datetime.now().year)
             
-            # Converte para lista de dicionários
-            data = df.to_dict('records')
-            
-            # Extrai subcategorias
-            subcategorias = self._extract_subcategories(df)
-            
-            # Organiza os dados no formato esperado
-            result = {
-                "fonte": "Embrapa Vitivinicultura",
-                "url": "http://vitibrasil.cnpuv.embrapa.br/",
-                "ano_referencia": year,
-                "data": data,
-                "subcategorias": subcategorias
-            }
-            
-            return result
+            return self._parse_csv(conteudo, "http://vitibrasil.cnpuv.embrapa.br/", year, categoria)
             
         except Exception as e:
             logger.error(f"Erro ao processar CSV {csv_path}: {str(e)}")
             raise
     
-    def _extract_subcategories(self, df: pd.DataFrame) -> Dict[str, List[Any]]:
+    def _parse_csv(self, conteudo: bytes, url: str, year: str, categoria: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lê o CSV com o leitor configurado (CSV_LOADER) e o processa.
+        
+        O formato (codificação, separador e linha do cabeçalho) é detectado
+        na primeira carga da categoria e reutilizado nas seguintes. Se o
+        formato salvo deixar de servir (erro de leitura ou uma única coluna),
+        é detectado de novo a partir do mesmo conteúdo, sem novo download.
+        
+        Args:
+            conteudo: Bytes do CSV
+            url: URL de origem
+            year: Ano de referência
+            categoria: Categoria do CSV; sem ela, o formato é detectado a cada leitura
+        
+        Returns:
+            Carga processada (ver _process_dataframe e _process_tabela)
+        """
+        perfil = self._perfil_csv(categoria) if categoria else None
+        tabela = None
+        if perfil is not None:
+            try:
+                tabela = self._ler_tabela(conteudo, perfil)
+                if len(tabela.columns) > 1:
+                    return self._processar_tabela(tabela, url, year)
+            except ValueError as e:
+                logger.warning(f"Formato salvo de {categoria} não serviu ({str(e)}); detectando novamente")
+        
+        with span("detectar_formato"):
+            detectado = csv_dialect.detectar(conteudo)
+        if detectado != perfil and categoria:
+            self._salvar_perfil(categoria, detectado)
+        if detectado != perfil or tabela is None:
+            tabela = self._ler_tabela(conteudo, detectado)
+        return self._processar_tabela(tabela, url, year)
+    
+    def _ler_tabela(self, conteudo: bytes, perfil: Dict[str, Any]) -> Any:
+        """
+        Lê o CSV no formato informado: DataFrame ou, com CSV_LOADER=stdlib, LightTable.
+        """
+        with span("read_csv"):
+            if self.leitor == "stdlib":
+                return light_csv.ler(conteudo, sep=perfil["sep"], encoding=perfil["encoding"],
+                                     pular=perfil["cabecalho"])
+            
+            import pandas as pd
+            
+            return pd.read_csv(io.BytesIO(conteudo), sep=perfil["sep"], encoding=perfil["encoding"],
+                               skiprows=perfil["cabecalho"])
+    
+    def _processar_tabela(self, tabela: Any, url: str, year: str) -> Dict[str, Any]:
+        """
+        Processa a tabela lida com o caminho correspondente ao leitor.
+        """
+        if isinstance(tabela, light_csv.LightTable):
+            return self._process_tabela(tabela, url, year)
+        return self._process_dataframe(tabela, url, year)
+    
+    def _perfil_csv(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Formato detectado dos CSVs da categoria, em memória ou salvo no diretório dela.
+        
+        Returns:
+            Perfil (ver csv_dialect.detectar) ou None se ainda não foi detectado
+        """
+        perfil = self._perfis.get(categoria)
+        if perfil is not None:
+            return perfil
+        caminho = os.path.join(self.data_dir, categoria, "formato.json")
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                perfil = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(perfil, dict) or set(perfil) != set(csv_dialect.PADRAO):
+            logger.warning(f"Formato salvo inválido em {caminho}; será detectado novamente")
+            return None
+        self._perfis[categoria] = perfil
+        return perfil
+    
+    def _salvar_perfil(self, categoria: str, perfil: Dict[str, Any]):
+        """
+        Guarda o formato detectado em memória e no diretório da categoria,
+        para as próximas cargas (inclusive de outros processos e após reinícios).
+        """
+        self._perfis[categoria] = perfil
+        logger.info(f"Formato dos CSVs de {categoria}: {perfil}")
+        caminho = os.path.join(self.data_dir, categoria, "formato.json")
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(perfil, f)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            logger.warning(f"Não foi possível salvar o formato de {categoria}: {str(e)}")
+    
+    def _process_tabela(self, tabela: light_csv.LightTable, url: str, year: str) -> Dict[str, Any]:
+        """
+        Converte a tabela do leitor leve no formato de resposta da API, sem pandas.
+        
+        Os registros e as subcategorias são iguais aos de _process_dataframe;
+        o DataFrame, o índice hierárquico e a matriz densa ficam para o
+        primeiro uso (ver _materializar).
+        
+        Args:
+            tabela: Tabela lida por light_csv.ler
+            url: URL de origem
+            year: Ano de referência
+        
+        Returns:
+            Dicionário com a tabela ("tabela"), a resposta ("result") e
+            "df", "hierarquia", "matriz" e "metricas" ainda vazios
+        """
+        with span("to_dict"):
+            data = tabela.registros()
+        
+        with span("subcategorias"):
+            subcategorias = {
+                col: tabela.unicos(col) for col in tabela.columns
+                if col.lower() not in self.COLUNAS_QUANTIDADE
+            }
+        
+        result = {
+            "fonte": "Embrapa Vitivinicultura",
+            "url": url,
+            "ano_referencia": year,
+            "data": data,
+            "subcategorias": subcategorias
+        }
+        return {
+            "df": None,
+            "tabela": tabela,
+            "result": result,
+            "hierarquia": None,
+            "matriz": None,
+            "metricas": None,
+        }
+    
+    def _process_dataframe(self, df: "pd.DataFrame", url: str, year: str) -> Dict[str, Any]:
+        """
+        Converte o DataFrame lido no formato de resposta da API.
+        
+        Quando o CSV possui a coluna `control`, o índice hierárquico é construído
+        aqui; nível e pai de cada linha ficam no índice, sem alterar as colunas
+        do DataFrame nem os registros.
+        
+        Args:
+            df: DataFrame lido do CSV
+            url: URL de origem
+            year: Ano de referência
+        
+        Returns:
+            Dicionário com o DataFrame ("df"), a resposta ("result"), o índice
+            hierárquico ("hierarquia", ou None), a matriz densa ("matriz") e,
+            nos arquivos de comércio exterior, as métricas de preço unitário e
+            participação ("metricas", ver trade_metrics.calcular)
+        """
+        hierarquia = None
+        if 'control' in df.columns:
+            with span("hierarquia"):
+                hierarquia = HierarchyIndex(df)
+        
+        # Converte para lista de dicionários
+        with span("to_dict"):
+            data = df.to_dict('records')
+        
+        # Extrai subcategorias
+        with span("subcategorias"):
+            subcategorias = self._extract_subcategories(df)
+        
+        # Organiza os dados no formato esperado
+        result = {
+            "fonte": "Embrapa Vitivinicultura",
+            "url": url,
+            "ano_referencia": year,
+            "data": data,
+            "subcategorias": subcategorias
+        }
+        with span("matriz"):
+            matriz = YearMatrix.from_dataframe(df, hierarquia)
+        return {
+            "df": df,
+            "result": result,
+            "hierarquia": hierarquia,
+            "matriz": matriz,
+            "metricas": trade_metrics.calcular(df, hierarquia, coluna_entidade(df)),
+        }
+    
+    def _extract_subcategories(self, df: "pd.DataFrame") -> Dict[str, List[Any]]:
         """
         Extrai as subcategorias dos dados do DataFrame.
         
@@ -236,8 +1237,27 @@ class CSVDownloader:
         
         # Para cada coluna, extrai valores únicos como subcategorias
         for col in df.columns:
-            if col.lower() not in ['quantidade', 'quantidade (l)', 'quantidade (l.)', 'quantidade (kg)']:
+            if col.lower() not in self.COLUNAS_QUANTIDADE:
                 valores = df[col].dropna().unique().tolist()
                 subcategorias[col] = valores
         
         return subcategorias
+
+
+def resolve_categoria(modulo: str, tipo: str) -> Optional[str]:
+    """
+    Converte o par (modulo, tipo) da URL na chave de categoria do CSVDownloader.
+    
+    Args:
+        modulo: Módulo da API (producao, importacao, ...)
+        tipo: Tipo dentro do módulo (vinho, suco, ...)
+        
+    Returns:
+        Chave da categoria ou None se a combinação não existir
+    """
+    chave = modulo if modulo == tipo else f"{modulo}_{tipo}"
+    return chave if chave in CSVDownloader.DOWNLOAD_URLS else None
+
+
+# Instância compartilhada pelos endpoints, para que o cache seja único por processo
+csv_downloader = CSVDownloader(data_dir="/tmp")
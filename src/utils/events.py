@@ -0,0 +1,168 @@
+"""
+Eventos de publicação de novas versões dos datasets, para o stream SSE
+(ver src/api/endpoints/events.py).
+
+O CSVDownloader publica um evento sempre que instala uma nova versão de uma
+categoria, seja na atualização em segundo plano, numa recarga por expiração
+ou, no modo "shared", ao anexar um snapshot novo. A publicação acontece nas
+threads de carga; cada assinante tem uma fila asyncio limitada no event loop
+em que foi criado, alimentada com `call_soon_threadsafe`. Os últimos eventos
+ficam em um histórico numerado, para que um cliente que reconecte com o
+cabeçalho `Last-Event-ID` receba o que perdeu.
+"""
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Set
+
+from src.utils.config import EVENTS_HISTORY
+from src.utils.metrics import EVENTS_PUBLISHED
+
+# Eventos pendentes por assinante antes de ele ser considerado atrasado
+FILA_ASSINANTE = 256
+
+# Colunas usadas, nesta ordem, para identificar uma linha entre duas versões
+COLUNAS_CHAVE = ("id", "Id", "ID")
+
+
+def _linha(registro: Dict[str, Any]) -> tuple:
+    # NaN != NaN: troca por None para que linhas iguais sejam iguais
+    return tuple(None if valor != valor else valor for valor in registro.values())
+
+
+def diferencas(anteriores: Optional[List[Dict[str, Any]]], novos: List[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    """
+    Conta as linhas adicionadas, removidas e alteradas entre duas versões.
+
+    As linhas são identificadas pela coluna de id do CSV ou, sem ela, pela posição.
+
+    Args:
+        anteriores: Registros da versão anterior (None se não estiverem em memória)
+        novos: Registros da nova versão
+
+    Returns:
+        Dicionário com "adicionadas", "removidas" e "alteradas", ou None sem a versão anterior
+    """
+    if anteriores is None:
+        return None
+    amostra = novos[0] if novos else (anteriores[0] if anteriores else {})
+    coluna = next((c for c in COLUNAS_CHAVE if c in amostra), None)
+
+    def indexar(registros):
+        if coluna is None:
+            return {pos: _linha(registro) for pos, registro in enumerate(registros)}
+        return {registro.get(coluna): _linha(registro) for registro in registros}
+
+    antes, depois = indexar(anteriores), indexar(novos)
+    comuns = antes.keys() & depois.keys()
+    return {
+        "adicionadas": len(depois.keys() - comuns),
+        "removidas": len(antes.keys() - comuns),
+        "alteradas": sum(1 for chave in comuns if antes[chave] != depois[chave]),
+    }
+
+
+class Assinatura:
+    """
+    Fila de eventos de um cliente do stream.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, tamanho: int = FILA_ASSINANTE):
+        """
+        Args:
+            loop: Event loop em que a fila é consumida
+            tamanho: Eventos pendentes antes de o assinante ser marcado como atrasado
+        """
+        self.loop = loop
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=tamanho)
+        # Fila cheia: o cliente perdeu eventos e deve reconectar com Last-Event-ID
+        self.atrasada = False
+
+    def entregar(self, evento: Dict[str, Any]):
+        """
+        Enfileira o evento a partir de qualquer thread.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._colocar, evento)
+        except RuntimeError:
+            # Event loop já encerrado: o assinante é removido quando o stream termina
+            pass
+
+    def _colocar(self, evento: Dict[str, Any]):
+        if self.fila.full():
+            self.atrasada = True
+            return
+        self.fila.put_nowait(evento)
+
+
+class EventBus:
+    """
+    Distribui os eventos publicados para os assinantes conectados.
+    """
+
+    def __init__(self, historico: int = EVENTS_HISTORY):
+        """
+        Args:
+            historico: Eventos mantidos para clientes que reconectam
+        """
+        self._historico: deque = deque(maxlen=historico)
+        self._assinantes: Set[Assinatura] = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publicar(self, tipo: str, dados: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Publica um evento para todos os assinantes.
+
+        Args:
+            tipo: Tipo do evento (campo `event` do SSE)
+            dados: Conteúdo do evento, serializável em JSON
+
+        Returns:
+            Evento publicado, com o id atribuído
+        """
+        with self._lock:
+            evento = {"id": next(self._ids), "tipo": tipo, "dados": dados}
+            self._historico.append(evento)
+            assinantes = list(self._assinantes)
+        for assinatura in assinantes:
+            assinatura.entregar(evento)
+        EVENTS_PUBLISHED.inc(tipo=tipo)
+        return evento
+
+    def assinar(self, desde: Optional[int] = None) -> Assinatura:
+        """
+        Cria uma assinatura no event loop corrente.
+
+        Args:
+            desde: Último id recebido pelo cliente; os eventos posteriores
+                ainda no histórico são entregues primeiro
+
+        Returns:
+            Assinatura cuja fila recebe os eventos
+        """
+        assinatura = Assinatura(asyncio.get_running_loop())
+        with self._lock:
+            pendentes = [evento for evento in self._historico if desde is not None and evento["id"] > desde]
+            self._assinantes.add(assinatura)
+        for evento in pendentes[-FILA_ASSINANTE:]:
+            assinatura.fila.put_nowait(evento)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        """
+        Remove a assinatura (cliente desconectado).
+        """
+        with self._lock:
+            self._assinantes.discard(assinatura)
+
+    def assinantes(self) -> int:
+        """
+        Número de clientes conectados.
+        """
+        return len(self._assinantes)
+
+
+# Instância compartilhada entre o CSVDownloader e o endpoint de eventos
+eventos = EventBus()
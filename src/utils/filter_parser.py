@@ -2,7 +2,7 @@
 Função utilitária para parsear filtros de query parameters.
 """
 from fastapi import Query
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 
 def parse_filters(q: Optional[str] = Query(None, description="Filtros no formato 'chave1=valor1,chave2=valor2'")):
     """
@@ -27,4 +27,22 @@ def parse_filters(q: Optional[str] = Query(None, description="Filtros no formato
                 filters[key] = value
         return filters
     except Exception:
-        return None 
\ No newline at end of file
+        return None
+
+def apply_filters(data: List[Dict[str, Any]], filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Aplica os filtros aos registros, com a mesma semântica dos endpoints:
+    comparação de strings sem diferenciar maiúsculas, ignorando chaves ausentes.
+    """
+    if not filters:
+        return data
+    filtered = []
+    for item in data:
+        match = True
+        for key, value in filters.items():
+            if key in item and str(item[key]).lower() != str(value).lower():
+                match = False
+                break
+        if match:
+            filtered.append(item)
+    return filtered
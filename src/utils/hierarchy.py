@@ -0,0 +1,197 @@
+"""
+Índice hierárquico de produtos/subprodutos dos CSVs da Embrapa.
+
+Os arquivos de Produção e Comercialização misturam linhas de categoria
+(ex.: "VINHO DE MESA") com os produtos filhos, identificados pela coluna
+`control` (ex.: "vm_Tinto"). Este módulo monta, uma única vez por carga,
+um índice pai/filho e somas de prefixo por coluna numérica, de modo que
+consultas por nível, por pai e totais de subárvore não precisem reagrupar
+os dados a cada requisição.
+"""
+import re
+from typing import Dict, Any, Optional, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Linhas filhas têm o control prefixado por uma sigla da categoria (ex.: "vm_Tinto")
+PADRAO_FILHO = re.compile(r'^[a-z]{1,4}_')
+
+# Colunas de valores anuais ("1970", "2019.1", ...)
+PADRAO_COLUNA_ANO = re.compile(r'^\d{4}(\.\d+)?$')
+
+
+def colunas_numericas(df: "pd.DataFrame") -> List[str]:
+    """
+    Retorna as colunas de valores anuais do DataFrame.
+
+    Args:
+        df: DataFrame com os dados
+
+    Returns:
+        Lista com os nomes das colunas de ano
+    """
+    return [col for col in df.columns if PADRAO_COLUNA_ANO.match(str(col))]
+
+
+def coluna_produto(df: "pd.DataFrame") -> Optional[str]:
+    """
+    Localiza a coluna com o nome do produto/cultivar, ignorando maiúsculas.
+
+    Args:
+        df: DataFrame com os dados
+
+    Returns:
+        Nome da coluna ou None se não existir
+    """
+    for col in df.columns:
+        if str(col).lower() in ('produto', 'cultivar'):
+            return col
+    return None
+
+
+def classificar(controles: List[str], nomes: List[str]) -> Tuple[List[int], List[Optional[str]]]:
+    """
+    Classifica cada linha como categoria (nível 1) ou filho (nível 2).
+
+    Não depende do pandas: é usado também pelo leitor leve (CSV_LOADER=stdlib).
+
+    Args:
+        controles: Valores da coluna `control`, como texto
+        nomes: Nome do produto/cultivar de cada linha, sem espaços nas bordas
+
+    Returns:
+        Tupla (niveis, pais) com uma posição por linha
+    """
+    niveis: List[int] = []
+    pais: List[Optional[str]] = []
+    pai_atual = None
+    for controle, nome in zip(controles, nomes):
+        if PADRAO_FILHO.match(controle.strip()) and pai_atual is not None:
+            niveis.append(2)
+            pais.append(pai_atual)
+        else:
+            pai_atual = nome
+            niveis.append(1)
+            pais.append(None)
+    return niveis, pais
+
+
+class HierarchyIndex:
+    """
+    Índice pai/filho construído a partir da coluna `control`.
+
+    As posições referem-se à ordem das linhas no DataFrame original, na qual
+    cada categoria vem imediatamente antes dos seus filhos.
+    """
+
+    def __init__(self, df: "pd.DataFrame"):
+        """
+        Constrói o índice a partir do DataFrame.
+
+        Args:
+            df: DataFrame com as colunas `control` e produto/cultivar
+        """
+        import pandas as pd
+
+        controles = df['control'].fillna('').astype(str).tolist()
+        col_produto = coluna_produto(df)
+        nomes = df[col_produto].fillna('').astype(str).str.strip().tolist() if col_produto else controles
+
+        self.niveis, self.pais = classificar(controles, nomes)
+        self.por_nivel: Dict[int, List[int]] = {1: [], 2: []}
+        self.filhos: Dict[str, List[int]] = {}
+        # Intervalo [inicio, fim) das linhas de cada subárvore, incluindo o próprio pai
+        self.intervalos: Dict[str, tuple] = {}
+
+        for pos, (nivel, pai, nome) in enumerate(zip(self.niveis, self.pais, nomes)):
+            self.por_nivel[nivel].append(pos)
+            if nivel == 2:
+                self.filhos[pai].append(pos)
+                self.intervalos[pai] = (self.intervalos[pai][0], pos + 1)
+            else:
+                self.filhos.setdefault(nome, [])
+                self.intervalos[nome] = (pos, pos + 1)
+
+        # Folhas: filhos e categorias sem filhos. Somar apenas folhas evita dupla contagem.
+        self.folha = np.array([
+            nivel == 2 or not self.filhos[nomes[pos]]
+            for pos, nivel in enumerate(self.niveis)
+        ], dtype=bool)
+
+        self.colunas = colunas_numericas(df)
+        valores = df[self.colunas].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        valores = valores * self.folha[:, None]
+        # prefixos[i] = soma das folhas nas linhas [0, i)
+        self._prefixos = np.vstack([np.zeros((1, len(self.colunas))), np.cumsum(valores, axis=0)])
+
+    def linhas(self, nivel: Optional[int] = None, pai: Optional[str] = None) -> List[int]:
+        """
+        Retorna as posições das linhas que atendem ao nível e/ou pai informados.
+
+        Args:
+            nivel: 1 para categorias, 2 para produtos filhos
+            pai: Nome da categoria pai (sem diferenciar maiúsculas)
+
+        Returns:
+            Lista de posições em ordem crescente
+        """
+        if pai is not None:
+            chave = self._resolver_pai(pai)
+            posicoes = self.filhos.get(chave, []) if chave else []
+            if nivel is not None and nivel != 2:
+                return []
+            return posicoes
+        if nivel is not None:
+            return self.por_nivel.get(nivel, [])
+        return list(range(len(self.niveis)))
+
+    def soma_subarvore(self, pai: str) -> Optional[Dict[str, float]]:
+        """
+        Soma os valores anuais de uma categoria a partir das somas de prefixo.
+
+        Args:
+            pai: Nome da categoria
+
+        Returns:
+            Dicionário coluna -> total ou None se a categoria não existir
+        """
+        chave = self._resolver_pai(pai)
+        if chave is None:
+            return None
+        inicio, fim = self.intervalos[chave]
+        return self._somar(inicio, fim)
+
+    def totais(self) -> Dict[str, float]:
+        """
+        Retorna o total geral por coluna, sem dupla contagem de categorias.
+        """
+        return self._somar(0, len(self.niveis))
+
+    def _somar(self, inicio: int, fim: int) -> Dict[str, float]:
+        somas = self._prefixos[fim] - self._prefixos[inicio]
+        return {col: float(valor) for col, valor in zip(self.colunas, somas)}
+
+    def _resolver_pai(self, pai: str) -> Optional[str]:
+        if pai in self.filhos:
+            return pai
+        alvo = pai.strip().lower()
+        for nome in self.filhos:
+            if nome.lower() == alvo:
+                return nome
+        return None
+
+    def resumo(self) -> List[Dict[str, Any]]:
+        """
+        Lista as categorias com seus filhos e totais por coluna.
+        """
+        return [
+            {
+                "pai": nome,
+                "filhos": len(self.filhos[nome]),
+                "totais": self._somar(*self.intervalos[nome]),
+            }
+            for nome in self.filhos
+        ]
@@ -0,0 +1,192 @@
+"""
+Leitor de CSV sem pandas, para implantações em que o tempo de inicialização
+e a memória importam (CSV_LOADER=stdlib).
+
+O arquivo é lido com o módulo `csv` da biblioteca padrão e guardado em
+colunas compactas: `array('q')` para colunas inteiras, `array('d')` para
+colunas numéricas com valores ausentes e listas para texto. A inferência de
+tipos e os nomes de colunas repetidas ("1970", "1970.1") seguem o
+`pd.read_csv`, de modo que os registros e as subcategorias gerados são
+iguais aos do caminho com pandas. O DataFrame só é montado (e o pandas
+importado) quando alguma estrutura derivada precisa dele.
+"""
+import csv
+import hashlib
+import io
+import math
+from array import array
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+# Valores tratados como ausentes pelo pd.read_csv (na_values padrão)
+VALORES_AUSENTES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+Coluna = Union[array, List[Any]]
+
+
+def _inteiro(texto: str) -> Optional[int]:
+    if "_" in texto:
+        return None
+    try:
+        return int(texto)
+    except ValueError:
+        return None
+
+
+def _real(texto: str) -> Optional[float]:
+    if "_" in texto:
+        return None
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def _tipar(valores: List[str]) -> Coluna:
+    """
+    Converte os textos de uma coluna como o pd.read_csv faria: inteiros sem
+    ausentes viram int64, números com ausentes ou decimais viram float64 e
+    qualquer outro texto mantém a coluna inteira como texto.
+    """
+    ausente = [valor in VALORES_AUSENTES for valor in valores]
+    presentes = [valor for valor, falta in zip(valores, ausente) if not falta]
+    inteiros = [_inteiro(valor) for valor in presentes]
+    if None not in inteiros and not any(ausente):
+        return array("q", inteiros)
+    reais = [_real(valor) for valor in presentes]
+    if None not in reais:
+        iterador = iter(reais)
+        return array("d", [math.nan if falta else next(iterador) for falta in ausente])
+    return [math.nan if falta else valor for valor, falta in zip(valores, ausente)]
+
+
+def _nomes_unicos(cabecalho: List[str]) -> List[str]:
+    """
+    Renomeia colunas repetidas como o pandas: "1970", "1970.1", "1970.2"...
+    """
+    nomes: List[str] = []
+    contagem: Dict[str, int] = {}
+    for nome in cabecalho:
+        if nome in contagem:
+            novo = nome
+            while novo in contagem:
+                contagem[nome] += 1
+                novo = f"{nome}.{contagem[nome]}"
+            contagem[novo] = 0
+            nomes.append(novo)
+        else:
+            contagem[nome] = 0
+            nomes.append(nome)
+    return nomes
+
+
+class LightTable:
+    """
+    Tabela em colunas compactas, com o subconjunto da interface do DataFrame
+    usado pelo CSVDownloader.
+    """
+
+    def __init__(self, colunas: Dict[str, Coluna]):
+        """
+        Args:
+            colunas: Nome -> valores, na ordem do arquivo
+        """
+        self.dados = colunas
+        self.columns = list(colunas)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.dados.values()))) if self.dados else 0
+
+    def __getitem__(self, coluna: str) -> Coluna:
+        return self.dados[coluna]
+
+    def textos(self, coluna: str, strip: bool = False) -> List[str]:
+        """
+        Valores da coluna como texto, com os ausentes vazios
+        (equivalente a `df[coluna].fillna('').astype(str)`).
+        """
+        resultado = ["" if isinstance(valor, float) and math.isnan(valor) else str(valor)
+                     for valor in self.dados[coluna]]
+        return [valor.strip() for valor in resultado] if strip else resultado
+
+    def registros(self) -> List[Dict[str, Any]]:
+        """
+        Linhas como dicionários, como `df.to_dict('records')`.
+        """
+        return [dict(zip(self.columns, linha)) for linha in zip(*(self.dados[c] for c in self.columns))]
+
+    def unicos(self, coluna: str) -> List[Any]:
+        """
+        Valores distintos não ausentes, na ordem de aparição
+        (como `df[coluna].dropna().unique().tolist()`).
+        """
+        vistos = {}
+        for valor in self.dados[coluna]:
+            if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+                continue
+            vistos.setdefault(valor, None)
+        return list(vistos)
+
+    def digest(self) -> str:
+        """
+        Impressão digital do conteúdo, usada para detectar novas versões.
+        """
+        digest = hashlib.sha1(",".join(self.columns).encode("utf-8"))
+        for coluna in self.columns:
+            valores = self.dados[coluna]
+            digest.update(valores.tobytes() if isinstance(valores, array) else repr(valores).encode("utf-8"))
+        return digest.hexdigest()
+
+    def to_dataframe(self):
+        """
+        Monta o DataFrame equivalente ao do pd.read_csv (importa o pandas).
+        """
+        import numpy as np
+        import pandas as pd
+
+        return pd.DataFrame({
+            coluna: np.frombuffer(valores, dtype=np.int64 if valores.typecode == "q" else np.float64).copy()
+            if isinstance(valores, array) else pd.Series(valores, dtype=object)
+            for coluna, valores in self.dados.items()
+        })
+
+
+def ler(origem: Union[str, bytes], sep: str = ";", encoding: str = "utf-8-sig", pular: int = 0) -> LightTable:
+    """
+    Lê um CSV de um caminho ou do conteúdo já baixado.
+
+    Args:
+        origem: Caminho do arquivo ou bytes do CSV
+        sep: Separador de campos
+        encoding: Codificação do texto
+        pular: Linhas antes do cabeçalho (como `skiprows` do pd.read_csv)
+
+    Returns:
+        Tabela com as colunas tipadas
+
+    Raises:
+        ValueError: Se alguma linha tiver mais campos que o cabeçalho
+    """
+    if isinstance(origem, bytes):
+        texto = io.StringIO(origem.decode(encoding), newline="")
+    else:
+        texto = open(origem, encoding=encoding, newline="")
+    with texto:
+        for _ in range(pular):
+            texto.readline()
+        leitor = csv.reader(texto, delimiter=sep)
+        linhas: List[List[str]] = [linha for linha in leitor if linha]
+    if not linhas:
+        raise ValueError("CSV vazio")
+    nomes = _nomes_unicos(linhas[0])
+    largura = len(nomes)
+    colunas: Tuple[List[str], ...] = tuple([] for _ in nomes)
+    for numero, linha in enumerate(linhas[1:], start=2):
+        if len(linha) > largura:
+            raise ValueError(f"Linha {numero}: esperados {largura} campos, encontrados {len(linha)}")
+        linha = linha + [""] * (largura - len(linha))
+        for coluna, valor in zip(colunas, linha):
+            coluna.append(valor)
+    return LightTable({nome: _tipar(valores) for nome, valores in zip(nomes, colunas)})
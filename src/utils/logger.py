@@ -1,43 +1,152 @@
 """
 Módulo de utilitários para logging.
+
+Os logs da aplicação (loggers "src.*") passam por uma fila: o handler
+instalado no logger apenas enfileira o registro, e uma thread
+(QueueListener) formata e escreve em stderr ou em arquivo, fora do caminho
+das requisições. A saída é JSON por padrão (LOG_FORMAT=text para o formato
+legível) e o nível pode ser definido por módulo em LOG_LEVELS.
+
+A configuração é instalada uma única vez, mesmo que `setup_logger` seja
+chamado várias vezes para o mesmo nome.
 """
+import atexit
+import json
 import logging
 import os
-from pathlib import Path
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from src.utils.config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_FILE
+
+# Logger raiz da aplicação; os módulos usam logging.getLogger(__name__)
+LOGGER_RAIZ = "src"
+
+# Atributos padrão de LogRecord; o que não estiver aqui veio de `extra=`
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_arquivos: Dict[str, logging.Handler] = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        evento = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "modulo": record.module,
+            "linha": record.lineno,
+            "thread": record.threadName,
+        }
+        # Campos estruturados passados com logger.info(..., extra={...})
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                evento[chave] = valor
+        if record.exc_text:
+            evento["excecao"] = record.exc_text
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+class _FilaHandler(QueueHandler):
+    """
+    QueueHandler que preserva a exceção como texto separado da mensagem,
+    para que o formatador da thread de escrita a coloque no campo próprio.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _formatter() -> logging.Formatter:
+    if LOG_FORMAT == "text":
+        return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    return JsonFormatter()
+
+
+def configure_logging():
+    """
+    Instala a fila, a thread de escrita e os níveis por módulo. Idempotente.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        fila: queue.Queue = queue.Queue(-1)
+        saida = logging.StreamHandler()
+        saida.setFormatter(_formatter())
+        _listener = QueueListener(fila, saida, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        raiz = logging.getLogger(LOGGER_RAIZ)
+        raiz.addHandler(_FilaHandler(fila))
+        raiz.setLevel(LOG_LEVEL)
+        # Evita duplicar a saída em handlers do logger raiz do Python (ex.: uvicorn)
+        raiz.propagate = False
+        for nome, nivel in LOG_LEVELS.items():
+            logging.getLogger(nome).setLevel(nivel)
+        if LOG_FILE:
+            _adicionar_arquivo(LOG_FILE)
+
+
+def _adicionar_arquivo(log_file: str, nome: Optional[str] = None):
+    """
+    Adiciona um arquivo de destino à thread de escrita, uma vez por caminho.
+    """
+    if log_file in _arquivos:
+        return
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(_formatter())
+    if nome:
+        # Arquivo pedido para um logger específico recebe apenas os registros dele
+        file_handler.addFilter(logging.Filter(nome))
+    _arquivos[log_file] = file_handler
+    _listener.handlers = _listener.handlers + (file_handler,)
+
 
 # Configuração do logger
-def setup_logger(name, log_file=None, level=logging.INFO):
+def setup_logger(name, log_file=None, level=None):
     """
-    Configura um logger com o nome e nível especificados.
-    
+    Obtém um logger da aplicação, garantindo que o logging esteja configurado.
+
+    Chamadas repetidas não adicionam handlers: todos os registros passam pela
+    fila instalada em `configure_logging`.
+
     Args:
         name: Nome do logger
         log_file: Caminho para o arquivo de log (opcional)
-        level: Nível de logging
-        
+        level: Nível de logging (padrão: LOG_LEVELS ou LOG_LEVEL)
+
     Returns:
         Logger configurado
     """
+    configure_logging()
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    
-    # Formatar as mensagens de log
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    
-    # Adicionar handler para console
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # Adicionar handler para arquivo, se especificado
+    if level is not None:
+        logger.setLevel(level)
+
+    # Adicionar arquivo de destino, se especificado
     if log_file:
-        # Garantir que o diretório de logs exista
-        log_dir = os.path.dirname(log_file)
-        if log_dir:
-            os.makedirs(log_dir, exist_ok=True)
-            
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+        with _lock:
+            _adicionar_arquivo(log_file, name)
+
     return logger
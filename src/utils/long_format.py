@@ -0,0 +1,108 @@
+"""
+Conversão dos CSVs da Embrapa para o formato longo (entidade x ano).
+
+Os arquivos vêm em formato largo, com uma coluna por ano. Nos arquivos de
+importação/exportação cada ano aparece duas vezes: a primeira coluna é a
+quantidade (kg/L) e a segunda, renomeada pelo pandas para "AAAA.1", o valor
+em US$. O formato longo permite juntar categorias diferentes por ano (e por
+entidade) com operações vetorizadas do pandas.
+"""
+import re
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.utils.hierarchy import HierarchyIndex
+
+PADRAO_QUANTIDADE = re.compile(r'^\d{4}$')
+PADRAO_VALOR = re.compile(r'^\d{4}\.1$')
+
+COLUNAS_ENTIDADE = ('país', 'pais', 'produto', 'cultivar')
+
+
+def coluna_entidade(df: "pd.DataFrame") -> Optional[str]:
+    """
+    Localiza a coluna que identifica a entidade (país, produto ou cultivar).
+
+    Args:
+        df: DataFrame no formato original
+
+    Returns:
+        Nome da coluna ou None se não existir
+    """
+    for col in df.columns:
+        if str(col).strip().lower() in COLUNAS_ENTIDADE:
+            return col
+    return None
+
+
+def to_long(df: "pd.DataFrame", hierarquia: Optional[HierarchyIndex] = None) -> "pd.DataFrame":
+    """
+    Converte o DataFrame largo em formato longo.
+
+    Args:
+        df: DataFrame no formato original do CSV
+        hierarquia: Índice hierárquico da categoria, se houver
+
+    Returns:
+        DataFrame com as colunas entidade, pai, folha, ano, quantidade e valor
+        (valor é NaN nas categorias que só têm quantidade)
+    """
+    import pandas as pd
+
+    col_entidade = coluna_entidade(df)
+    if col_entidade is None:
+        return pd.DataFrame(columns=["entidade", "pai", "folha", "ano", "quantidade", "valor"])
+
+    colunas_qtd = [col for col in df.columns if PADRAO_QUANTIDADE.match(str(col))]
+    anos = np.array([int(col) for col in colunas_qtd], dtype=np.int64)
+    n_linhas, n_anos = len(df), len(colunas_qtd)
+
+    quantidades = df[colunas_qtd].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+    # Colunas de valor (US$) alinhadas às de quantidade pelo ano
+    colunas_valor = {str(col)[:4]: col for col in df.columns if PADRAO_VALOR.match(str(col))}
+    valores = np.full((n_linhas, n_anos), np.nan)
+    for j, col in enumerate(colunas_qtd):
+        if str(col) in colunas_valor:
+            valores[:, j] = pd.to_numeric(df[colunas_valor[str(col)]], errors='coerce').to_numpy(dtype=np.float64)
+
+    entidades = df[col_entidade].fillna('').astype(str).str.strip().to_numpy()
+    if hierarquia is not None:
+        pais = np.array(hierarquia.pais, dtype=object)
+        folha = hierarquia.folha
+    else:
+        pais = np.full(n_linhas, None, dtype=object)
+        folha = np.ones(n_linhas, dtype=bool)
+
+    return pd.DataFrame({
+        "entidade": np.repeat(entidades, n_anos),
+        "pai": np.repeat(pais, n_anos),
+        "folha": np.repeat(folha, n_anos),
+        "ano": np.tile(anos, n_linhas),
+        "quantidade": quantidades.ravel(),
+        "valor": valores.ravel(),
+    })
+
+
+def longo_da_carga(carga: Dict[str, Any]) -> "pd.DataFrame":
+    """
+    Formato longo de uma carga ou entrada de cache (ver CSVDownloader.carga_vigente),
+    montado para uso imediato, sem guardá-lo na entrada.
+
+    Args:
+        carga: Carga com "df" e "hierarquia", ou apenas "tabela" (leitor leve e modo "shared")
+
+    Returns:
+        DataFrame longo (ver to_long)
+    """
+    # A tabela é lida antes do DataFrame: a materialização preenche "df" e só então remove "tabela"
+    tabela = carga.get("tabela")
+    df = carga["df"] if carga["df"] is not None else tabela.to_dataframe()
+    hierarquia = carga["hierarquia"]
+    if hierarquia is None and 'control' in df.columns:
+        hierarquia = HierarchyIndex(df)
+    return to_long(df, hierarquia)
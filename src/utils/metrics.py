@@ -0,0 +1,196 @@
+"""
+Métricas no formato de texto do Prometheus, sem dependências externas.
+
+Contadores e histogramas são atualizados no caminho das requisições e da
+carga dos datasets; valores que já existem em outros objetos (cache,
+cliente upstream, circuit breakers) são lidos apenas no momento da coleta,
+por funções registradas com `registry.collector`.
+
+As métricas são por processo: com vários workers, cada um expõe as suas.
+"""
+import math
+import threading
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Buckets padrão, em segundos, para latências de requisição e de carga
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Amostra coletada: (nome, rótulos, valor)
+Amostra = Tuple[str, Dict[str, str], float]
+
+
+def _chave(nomes: Tuple[str, ...], rotulos: Dict[str, object]) -> Tuple[str, ...]:
+    # Enums (ex.: o tipo dos endpoints) entram pelo valor, não pela representação
+    return tuple(str(v.value if isinstance(v, Enum) else v) for v in (rotulos[n] for n in nomes))
+
+
+def _formatar_rotulos(rotulos: Dict[str, str]) -> str:
+    if not rotulos:
+        return ""
+    pares = []
+    for chave, valor in rotulos.items():
+        valor = str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pares.append(f'{chave}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+
+def _formatar_valor(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class Counter:
+    """
+    Contador monotônico com rótulos.
+    """
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor: float = 1, **rotulos):
+        chave = _chave(self.rotulos, rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def amostras(self) -> List[Amostra]:
+        with self._lock:
+            itens = list(self._valores.items())
+        return [(self.nome, dict(zip(self.rotulos, chave)), valor) for chave, valor in itens]
+
+
+class Histogram:
+    """
+    Histograma cumulativo com rótulos, no formato do Prometheus.
+    """
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = (), buckets=BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets))
+        # chave -> [contagem por bucket..., soma, total]
+        self._valores: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, valor: float, **rotulos):
+        chave = _chave(self.rotulos, rotulos)
+        with self._lock:
+            estado = self._valores.get(chave)
+            if estado is None:
+                estado = self._valores[chave] = [0] * (len(self.buckets) + 2)
+            for indice, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    estado[indice] += 1
+                    break
+            estado[-2] += valor
+            estado[-1] += 1
+
+    def amostras(self) -> List[Amostra]:
+        with self._lock:
+            itens = [(chave, list(estado)) for chave, estado in self._valores.items()]
+        amostras = []
+        for chave, estado in itens:
+            rotulos = dict(zip(self.rotulos, chave))
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, estado):
+                acumulado += contagem
+                amostras.append((f"{self.nome}_bucket", {**rotulos, "le": _formatar_valor(limite)}, acumulado))
+            amostras.append((f"{self.nome}_bucket", {**rotulos, "le": "+Inf"}, estado[-1]))
+            amostras.append((f"{self.nome}_sum", rotulos, estado[-2]))
+            amostras.append((f"{self.nome}_count", rotulos, estado[-1]))
+        return amostras
+
+
+class Registry:
+    """
+    Conjunto de métricas e coletores expostos em /metrics.
+    """
+
+    def __init__(self):
+        self._metricas: List = []
+        self._coletores: List[Callable[[], Iterable[Tuple[str, str, str, List[Amostra]]]]] = []
+
+    def counter(self, nome: str, ajuda: str, rotulos: Iterable[str] = ()) -> Counter:
+        metrica = Counter(nome, ajuda, rotulos)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histogram(self, nome: str, ajuda: str, rotulos: Iterable[str] = (), buckets=BUCKETS_PADRAO) -> Histogram:
+        metrica = Histogram(nome, ajuda, rotulos, buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def collector(self, funcao: Callable):
+        """
+        Registra uma função chamada a cada coleta. Ela deve produzir tuplas
+        (nome, tipo, ajuda, amostras). Pode ser usada como decorador.
+        """
+        self._coletores.append(funcao)
+        return funcao
+
+    def render(self) -> str:
+        """
+        Gera o texto de exposição (formato 0.0.4) de todas as métricas.
+        """
+        familias = [(m.nome, m.tipo, m.ajuda, m.amostras()) for m in self._metricas]
+        for coletor in self._coletores:
+            familias.extend(coletor())
+        linhas = []
+        for nome, tipo, ajuda, amostras in familias:
+            ajuda = ajuda.replace("\\", "\\\\").replace("\n", "\\n")
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for nome_amostra, rotulos, valor in amostras:
+                linhas.append(f"{nome_amostra}{_formatar_rotulos(rotulos)} {_formatar_valor(valor)}")
+        return "\n".join(linhas) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "vitibrasil_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ("metodo", "rota", "status"),
+)
+DATASET_LOAD = registry.histogram(
+    "vitibrasil_dataset_load_duration_seconds",
+    "Duração de cada etapa da carga de um dataset (download, parse, local, snapshot)",
+    ("categoria", "etapa"),
+)
+CACHE_LOOKUPS = registry.counter(
+    "vitibrasil_cache_lookups_total",
+    "Consultas ao cache de datasets por resultado (hit ou miss)",
+    ("categoria", "resultado"),
+)
+CACHE_EVICTIONS = registry.counter(
+    "vitibrasil_cache_evictions_total",
+    "Liberações de memória do cache de datasets por tipo (derivados ou entrada)",
+    ("categoria", "tipo"),
+)
+ADMISSION_REJECTED = registry.counter(
+    "vitibrasil_admission_rejected_total",
+    "Requisições recusadas com 503 pelo controle de admissão por motivo (fila cheia ou espera esgotada)",
+    ("compartimento", "motivo"),
+)
+ADMISSION_WAIT = registry.histogram(
+    "vitibrasil_admission_wait_seconds",
+    "Espera por uma vaga no controle de admissão, das requisições admitidas após aguardar na fila",
+    ("compartimento",),
+)
+EVENTS_PUBLISHED = registry.counter(
+    "vitibrasil_events_published_total",
+    "Eventos publicados no stream /api/v1/events por tipo",
+    ("tipo",),
+)
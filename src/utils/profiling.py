@@ -0,0 +1,195 @@
+"""
+Perfilamento opcional das requisições.
+
+Com PROFILING_ENABLED, cada requisição registra a duração das etapas
+marcadas com `span(...)` nos endpoints e no CSVDownloader (download,
+read_csv, to_dict, filtros...), devolvidas no cabeçalho `Server-Timing`.
+Requisições lentas (acima de PROFILING_SLOW_MS) guardam a linha do tempo
+das etapas; requisições amostradas (PROFILING_SAMPLE_RATE, ou com o
+cabeçalho `X-Profile: 1`) guardam também um perfil do cProfile. Os últimos
+PROFILING_KEEP perfis ficam disponíveis em /admin/profiles.
+
+O cProfile mede a thread do loop de eventos inteira enquanto a requisição
+amostrada está em andamento, e não só a requisição: toda vez que ela
+aguarda (`await`), as corrotinas das outras requisições que rodam no loop
+entram no mesmo perfil. O campo `sobrepostas` de cada perfil conta essas
+requisições; um perfil limpo de uma rota vem de um momento sem tráfego
+(sobrepostas = 0). O trabalho feito no threadpool (`run_in_threadpool`,
+como a carga de uma categoria fora do cache) não aparece no perfil, só nas
+etapas. Só um perfil é capturado por vez.
+"""
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+
+from src.utils.config import (
+    PROFILING_SAMPLE_RATE,
+    PROFILING_SLOW_MS,
+    PROFILING_KEEP,
+)
+
+# Perfil da requisição em andamento; None fora de requisições perfiladas
+_perfil_atual: ContextVar[Optional["PerfilRequisicao"]] = ContextVar("perfil_atual", default=None)
+_nivel_atual: ContextVar[int] = ContextVar("nivel_atual", default=0)
+
+
+class PerfilRequisicao:
+    """
+    Linha do tempo das etapas de uma requisição.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+
+@contextmanager
+def span(nome: str):
+    """
+    Mede uma etapa da requisição atual. Sem perfil ativo, não faz nada.
+
+    Args:
+        nome: Nome da etapa (ex.: "read_csv", "filtros")
+    """
+    perfil = _perfil_atual.get()
+    if perfil is None:
+        yield
+        return
+    nivel = _nivel_atual.get()
+    token = _nivel_atual.set(nivel + 1)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _nivel_atual.reset(token)
+        perfil.spans.append({
+            "nome": nome,
+            "nivel": nivel,
+            "inicio_ms": round((inicio - perfil.inicio) * 1000, 3),
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 3),
+        })
+
+
+class Profiler:
+    """
+    Middleware de perfilamento e armazenamento dos perfis capturados.
+    """
+
+    def __init__(self, taxa: float = PROFILING_SAMPLE_RATE, lento_ms: float = PROFILING_SLOW_MS,
+                 manter: int = PROFILING_KEEP):
+        """
+        Args:
+            taxa: Fração das requisições perfiladas com cProfile
+            lento_ms: Duração a partir da qual a linha do tempo é guardada
+            manter: Quantidade de perfis mantidos em memória
+        """
+        self.taxa = taxa
+        self.lento_ms = lento_ms
+        self.registros: deque = deque(maxlen=manter)
+        self._cprofile_lock = threading.Lock()
+        # Requisições em andamento e as que se sobrepuseram ao perfil do cProfile ativo
+        self._ativas = 0
+        self._sobrepostas = 0
+
+    async def __call__(self, request, call_next):
+        """
+        Função de middleware HTTP (ver src/main.py).
+        """
+        perfil = PerfilRequisicao()
+        token = _perfil_atual.set(perfil)
+        forcado = request.headers.get("x-profile") == "1"
+        cprof = None
+        if self._cprofile_lock.locked():
+            self._sobrepostas += 1
+        if (forcado or random.random() < self.taxa) and self._cprofile_lock.acquire(blocking=False):
+            # As requisições já em andamento também rodam no loop durante o perfil
+            self._sobrepostas = self._ativas
+            cprof = cProfile.Profile()
+            cprof.enable()
+        self._ativas += 1
+        status = 500
+        sobrepostas = None
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            self._ativas -= 1
+            if cprof is not None:
+                cprof.disable()
+                sobrepostas = self._sobrepostas
+                self._cprofile_lock.release()
+            _perfil_atual.reset(token)
+            duracao_ms = (time.perf_counter() - perfil.inicio) * 1000
+            if cprof is not None or duracao_ms >= self.lento_ms:
+                motivo = "forcado" if forcado else ("amostra" if cprof is not None else "lenta")
+                self._guardar(request, status, duracao_ms, perfil, cprof, motivo, sobrepostas)
+        response.headers["Server-Timing"] = ", ".join(
+            f'{s["nome"]};dur={s["duracao_ms"]}' for s in perfil.spans if s["nivel"] == 0
+        )
+        return response
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """
+        Resumo dos perfis guardados, do mais recente ao mais antigo.
+        """
+        campos = ("id", "inicio", "metodo", "caminho", "rota", "status", "duracao_ms", "motivo", "sobrepostas")
+        return [
+            {**{campo: registro[campo] for campo in campos}, "cprofile": registro["cprofile"] is not None}
+            for registro in reversed(self.registros)
+        ]
+
+    def obter(self, perfil_id: str, ordenar: str = "cumulative", limite: int = 40) -> Optional[Dict[str, Any]]:
+        """
+        Perfil completo: linha do tempo das etapas e estatísticas do cProfile.
+
+        Args:
+            perfil_id: Identificador do perfil
+            ordenar: Critério de ordenação do pstats (cumulative, tottime, calls...)
+            limite: Número de funções listadas
+
+        Returns:
+            Perfil ou None se não existir (ou já tiver sido descartado)
+        """
+        for registro in self.registros:
+            if registro["id"] == perfil_id:
+                break
+        else:
+            return None
+        detalhe = {chave: valor for chave, valor in registro.items() if chave != "cprofile"}
+        if registro["cprofile"] is not None:
+            saida = io.StringIO()
+            pstats.Stats(registro["cprofile"], stream=saida).sort_stats(ordenar).print_stats(limite)
+            detalhe["cprofile"] = saida.getvalue()
+        return detalhe
+
+    def _guardar(self, request, status: int, duracao_ms: float, perfil: PerfilRequisicao,
+                 cprof: Optional[cProfile.Profile], motivo: str, sobrepostas: Optional[int]):
+        rota = request.scope.get("route")
+        medido = sum(s["duracao_ms"] for s in perfil.spans if s["nivel"] == 0)
+        self.registros.append({
+            "id": uuid.uuid4().hex[:12],
+            "inicio": time.time() - duracao_ms / 1000,
+            "metodo": request.method,
+            "caminho": request.url.path,
+            "rota": rota.path if rota else None,
+            "status": status,
+            "duracao_ms": round(duracao_ms, 3),
+            "motivo": motivo,
+            # Outras requisições que rodaram no loop durante o cProfile (None sem cProfile)
+            "sobrepostas": sobrepostas,
+            "spans": sorted(perfil.spans, key=lambda s: s["inicio_ms"]),
+            # Validação, serialização JSON e middlewares ficam fora das etapas marcadas
+            "nao_medido_ms": round(max(duracao_ms - medido, 0), 3),
+            "cprofile": cprof,
+        })
+
+
+profiler = Profiler()
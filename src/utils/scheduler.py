@@ -0,0 +1,139 @@
+"""
+Agendador de atualização dos datasets em segundo plano.
+
+Cada categoria de CSVDownloader.DOWNLOAD_URLS tem seu próprio job, com
+intervalo configurável e jitter, de modo que as atualizações fiquem
+espalhadas no tempo. Um semáforo limita quantas categorias são recarregadas
+ao mesmo tempo e falhas consecutivas aumentam o intervalo com backoff
+exponencial. Enquanto o agendador está ativo, as requisições apenas leem o
+cache e nunca pagam o custo da recarga.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+
+from fastapi.concurrency import run_in_threadpool
+
+from src.utils.config import (
+    REFRESH_INTERVAL,
+    REFRESH_INTERVALS,
+    REFRESH_JITTER,
+    REFRESH_MAX_CONCURRENCY,
+    REFRESH_STAGGER,
+    REFRESH_BACKOFF_BASE,
+    REFRESH_BACKOFF_MAX,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Atualiza periodicamente as categorias de um CSVDownloader.
+    """
+
+    def __init__(self, downloader, categorias: Optional[List[str]] = None,
+                 relogio: Callable[[], float] = time.time,
+                 dormir: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        """
+        Args:
+            downloader: Instância de CSVDownloader a ser mantida atualizada
+            categorias: Categorias a atualizar (padrão: todas)
+            relogio: Fonte dos horários registrados no estado (padrão: time.time)
+            dormir: Espera entre as execuções (padrão: asyncio.sleep)
+        """
+        self.downloader = downloader
+        self._relogio = relogio
+        self._dormir = dormir
+        self.categorias = categorias or list(downloader.DOWNLOAD_URLS)
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._tarefas: List[asyncio.Task] = []
+        self.estado: Dict[str, Dict[str, Any]] = {
+            categoria: {
+                "intervalo": REFRESH_INTERVALS.get(categoria, REFRESH_INTERVAL),
+                "ultima_execucao": None,
+                "ultimo_sucesso": None,
+                "falhas_consecutivas": 0,
+                "proxima_execucao": None,
+            }
+            for categoria in self.categorias
+        }
+
+    def start(self):
+        """
+        Inicia um job por categoria no loop de eventos atual.
+        """
+        self._semaforo = asyncio.Semaphore(REFRESH_MAX_CONCURRENCY)
+        self.downloader.background_refresh = True
+        for indice, categoria in enumerate(self.categorias):
+            # Espalha a primeira execução para não disparar todos os downloads juntos
+            atraso = indice * REFRESH_STAGGER
+            self._tarefas.append(asyncio.create_task(self._job(categoria, atraso)))
+        logger.info(f"Agendador iniciado para {len(self.categorias)} categorias")
+
+    async def stop(self):
+        """
+        Cancela os jobs e volta a deixar o cache expirar no caminho das requisições.
+        """
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+        self.downloader.background_refresh = False
+        logger.info("Agendador encerrado")
+
+    async def run_once(self, categoria: str) -> bool:
+        """
+        Executa uma atualização da categoria respeitando o limite de concorrência.
+
+        Returns:
+            True se a atualização teve sucesso
+        """
+        estado = self.estado[categoria]
+        async with self._semaforo:
+            estado["ultima_execucao"] = self._relogio()
+            try:
+                sucesso = await run_in_threadpool(self.downloader.refresh, categoria)
+            except Exception as e:
+                logger.error(f"Erro ao atualizar {categoria}: {str(e)}")
+                sucesso = False
+        if sucesso:
+            estado["ultimo_sucesso"] = estado["ultima_execucao"]
+            estado["falhas_consecutivas"] = 0
+        else:
+            estado["falhas_consecutivas"] += 1
+        return sucesso
+
+    def proximo_atraso(self, categoria: str) -> float:
+        """
+        Calcula o tempo até a próxima execução: intervalo normal com jitter ou,
+        após falhas, backoff exponencial limitado a REFRESH_BACKOFF_MAX.
+        """
+        estado = self.estado[categoria]
+        falhas = estado["falhas_consecutivas"]
+        if falhas:
+            base = min(REFRESH_BACKOFF_BASE * 2 ** (falhas - 1), REFRESH_BACKOFF_MAX)
+        else:
+            base = estado["intervalo"]
+        return base * (1 + random.uniform(-REFRESH_JITTER, REFRESH_JITTER))
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Estado de cada job (últimas execuções, falhas e próxima execução).
+        """
+        return {categoria: dict(estado) for categoria, estado in self.estado.items()}
+
+    async def _job(self, categoria: str, atraso: float):
+        estado = self.estado[categoria]
+        while True:
+            estado["proxima_execucao"] = self._relogio() + atraso
+            await self._dormir(atraso)
+            sucesso = await self.run_once(categoria)
+            atraso = self.proximo_atraso(categoria)
+            if not sucesso:
+                logger.warning(
+                    f"Falha ao atualizar {categoria} ({estado['falhas_consecutivas']} seguidas); "
+                    f"nova tentativa em {atraso:.0f}s"
+                )
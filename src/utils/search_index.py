@@ -0,0 +1,250 @@
+"""
+Índice de busca por trigramas sobre os nomes de produtos, cultivares e países.
+
+Os nomes são normalizados sem acentos, em minúsculas e com a pontuação
+trocada por espaços ("Alemanha, República Democrática" vira "alemanha
+republica democratica"). Cada palavra é decomposta em trigramas com
+espaços nas bordas, como no pg_trgm, e o índice invertido guarda, para
+cada trigrama, o array dos nomes que o contêm. Uma consulta conta os
+trigramas em comum com cada nome em uma única chamada a `np.bincount`, o
+que tolera erros de digitação e nomes parciais ("estados unidos" encontra
+"Estados Unidos da América").
+
+O índice cobre todas as categorias e é reconstruído quando a versão de
+alguma delas muda, na própria carga (ver CatalogSearch).
+"""
+import re
+import threading
+import unicodedata
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.utils.hierarchy import classificar
+from src.utils.long_format import COLUNAS_ENTIDADE
+
+_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+# Fração mínima dos trigramas da consulta presentes no nome
+COBERTURA_MINIMA = 0.5
+
+
+def dobrar(texto: str) -> str:
+    """
+    Normaliza o texto para busca: sem acentos, minúsculo, só letras e dígitos.
+    """
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(" ", sem_acento.lower()).strip()
+
+
+def trigramas(texto: str) -> Set[str]:
+    """
+    Trigramas de cada palavra do texto já normalizado, com duas posições de
+    borda no início e uma no fim ("uva" -> "  u", " uv", "uva", "va ").
+    """
+    resultado = set()
+    for palavra in texto.split():
+        marcada = f"  {palavra} "
+        resultado.update(marcada[i:i + 3] for i in range(len(marcada) - 2))
+    return resultado
+
+
+def entidades(registros: List[Dict[str, Any]]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Nomes das entidades dos registros de uma categoria, com a categoria pai.
+
+    Lê os registros servidos pela API, sem pandas: a categoria pai vem da
+    coluna `control`, classificada como no índice hierárquico.
+    """
+    if not registros:
+        return []
+    colunas = list(registros[0])
+    coluna = next((c for c in colunas if str(c).strip().lower() in COLUNAS_ENTIDADE), None)
+    if coluna is None:
+        return []
+    nomes = [registro.get(coluna) for registro in registros]
+    pais: List[Optional[str]] = [None] * len(registros)
+    if "control" in colunas:
+        controles = [_texto(registro.get("control")) for registro in registros]
+        col_produto = next((c for c in colunas if str(c).lower() in ("produto", "cultivar")), None)
+        _, pais = classificar(
+            controles,
+            [_texto(registro.get(col_produto)).strip() for registro in registros] if col_produto else controles,
+        )
+    return [
+        (nome.strip(), pai.strip() if isinstance(pai, str) else None)
+        for nome, pai in zip(nomes, pais)
+        if isinstance(nome, str) and nome.strip()
+    ]
+
+
+def _texto(valor: Any) -> str:
+    # Como o fillna('').astype(str) do índice hierárquico: ausente (None/NaN) vira ""
+    return "" if valor is None or valor != valor else str(valor)
+
+
+class SearchIndex:
+    """
+    Índice invertido de trigramas sobre os nomes distintos do catálogo.
+    """
+
+    def __init__(self, por_categoria: Dict[str, List[Tuple[str, Optional[str]]]]):
+        """
+        Args:
+            por_categoria: Categoria -> lista de (nome, pai), ver `entidades`
+        """
+        # Um documento por nome normalizado, com as categorias em que aparece
+        self.nomes: List[str] = []
+        self.ocorrencias: List[List[Dict[str, Optional[str]]]] = []
+        posicoes: Dict[str, int] = {}
+        dobrados: List[str] = []
+        for categoria, itens in por_categoria.items():
+            vistos = set()
+            for nome, pai in itens:
+                chave = dobrar(nome)
+                if not chave or (chave, pai) in vistos:
+                    continue
+                vistos.add((chave, pai))
+                if chave not in posicoes:
+                    posicoes[chave] = len(self.nomes)
+                    self.nomes.append(nome)
+                    self.ocorrencias.append([])
+                    dobrados.append(chave)
+                self.ocorrencias[posicoes[chave]].append({"categoria": categoria, "pai": pai})
+        self._posicoes = posicoes
+
+        listas: Dict[str, List[int]] = {}
+        tamanhos = []
+        for doc, chave in enumerate(dobrados):
+            gramas = trigramas(chave)
+            tamanhos.append(len(gramas))
+            for grama in gramas:
+                listas.setdefault(grama, []).append(doc)
+        self._postings = {grama: np.array(docs, dtype=np.int32) for grama, docs in listas.items()}
+        self._tamanhos = np.array(tamanhos, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def buscar(self, consulta: str, limite: int = 10, categorias: Optional[Set[str]] = None,
+               cobertura_minima: float = COBERTURA_MINIMA) -> List[Dict[str, Any]]:
+        """
+        Busca nomes parecidos com a consulta.
+
+        A pontuação combina a cobertura (fração dos trigramas da consulta
+        presentes no nome, que favorece nomes que contêm a consulta) com a
+        similaridade de Jaccard entre os conjuntos de trigramas (que favorece
+        nomes do mesmo tamanho). Nome idêntico após a normalização vale 1.
+
+        Args:
+            consulta: Texto buscado
+            limite: Número máximo de resultados
+            categorias: Restringe às ocorrências nestas categorias
+            cobertura_minima: Fração mínima dos trigramas da consulta no nome
+
+        Returns:
+            Lista de resultados (entidade, score, categorias), do mais parecido ao menos
+        """
+        chave = dobrar(consulta)
+        todos = trigramas(chave)
+        gramas = [grama for grama in todos if grama in self._postings]
+        total = len(todos)
+        if not total or not gramas:
+            return []
+        contagem = np.bincount(
+            np.concatenate([self._postings[grama] for grama in gramas]),
+            minlength=len(self.nomes),
+        ).astype(np.float64)
+        cobertura = contagem / total
+        jaccard = contagem / (total + self._tamanhos - contagem)
+        score = 0.75 * cobertura + 0.25 * jaccard
+        exato = self._posicoes.get(chave)
+        if exato is not None:
+            score[exato] = 1.0
+            cobertura[exato] = 1.0
+
+        candidatos = np.flatnonzero(cobertura >= cobertura_minima)
+        candidatos = candidatos[np.argsort(-score[candidatos], kind="stable")]
+        resultados = []
+        for doc in candidatos:
+            ocorrencias = self.ocorrencias[doc]
+            if categorias is not None:
+                ocorrencias = [o for o in ocorrencias if o["categoria"] in categorias]
+                if not ocorrencias:
+                    continue
+            resultados.append({
+                "entidade": self.nomes[doc],
+                "score": round(float(score[doc]), 3),
+                "categorias": ocorrencias,
+            })
+            if len(resultados) >= limite:
+                break
+        return resultados
+
+
+class CatalogSearch:
+    """
+    Mantém o índice de busca em dia com as versões dos datasets.
+
+    O índice é refeito a cada nova versão instalada pelo downloader (na
+    carga, no aquecimento ou na atualização em segundo plano), com os nomes
+    lidos dos registros da carga; a busca apenas consulta o índice pronto.
+    """
+
+    def __init__(self, downloader):
+        """
+        Args:
+            downloader: CSVDownloader de onde vêm os nomes de cada categoria
+        """
+        self.downloader = downloader
+        self._versoes: Dict[str, Optional[int]] = {}
+        self._entidades: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        self._indice: Optional[SearchIndex] = None
+        self._lock = threading.Lock()
+        downloader.ouvir(self._nova_versao)
+
+    def _nova_versao(self, categoria: str, carga: Dict[str, Any]):
+        self._atualizar({categoria: (carga.get("versao"), entidades(self.downloader.registros(carga)))})
+
+    def _atualizar(self, novas: Dict[str, Tuple[Optional[int], List[Tuple[str, Optional[str]]]]]):
+        """
+        Troca os nomes das categorias informadas e refaz o índice.
+
+        Uma versão mais antiga que a já indexada é ignorada (carga concorrente).
+        """
+        with self._lock:
+            for categoria, (versao, itens) in novas.items():
+                atual = self._versoes.get(categoria)
+                if atual is not None and versao is not None and atual > versao:
+                    continue
+                self._entidades[categoria] = itens
+                self._versoes[categoria] = versao
+            self._indice = SearchIndex(self._entidades)
+
+    def pendentes(self) -> List[str]:
+        """
+        Categorias que a próxima chamada a `indice` precisa ler.
+        """
+        versoes = {categoria: self.downloader.versao(categoria) for categoria in self.downloader.DOWNLOAD_URLS}
+        if self._indice is not None and versoes == self._versoes:
+            return []
+        return [categoria for categoria, versao in versoes.items()
+                if versao is None or self._versoes.get(categoria) != versao]
+
+    def indice(self) -> SearchIndex:
+        """
+        Índice atual.
+
+        As categorias sem aviso de versão (carregadas antes da criação do
+        índice ou ainda não carregadas) são lidas aqui, fora do lock do
+        índice: a carga avisa os ouvintes com o lock da categoria.
+        """
+        novas = {}
+        for categoria in self.pendentes():
+            dados = self.downloader.get_data(categoria)
+            if dados is not None:
+                novas[categoria] = (self.downloader.versao(categoria), entidades(dados["data"]))
+        if novas or self._indice is None:
+            self._atualizar(novas)
+        return self._indice
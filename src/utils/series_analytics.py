@@ -0,0 +1,172 @@
+"""
+Indicadores de séries temporais calculados para todas as entidades de uma
+categoria de uma só vez, sobre a matriz densa entidade x ano (ver
+year_matrix.YearMatrix).
+
+Para cada entidade: taxa de crescimento anual composta (CAGR), volatilidade
+(desvio padrão das taxas de crescimento logarítmicas), média móvel e
+previsão por suavização exponencial simples. As somas acumuladas dos
+valores e das taxas de crescimento são calculadas uma vez por versão do
+dataset (ver CSVDownloader.get_derived); cada requisição, com o próprio
+intervalo de anos, janela e fator de suavização, é resolvida por diferenças
+dessas somas e operações vetorizadas sobre as linhas da matriz.
+"""
+from typing import Dict, Any, List
+
+import numpy as np
+
+
+def _acumulada(valores: np.ndarray) -> np.ndarray:
+    """
+    Soma acumulada por linha, com uma coluna de zeros no início: a soma das
+    colunas [i, j) é `acumulada[:, j] - acumulada[:, i]`.
+    """
+    resultado = np.zeros((valores.shape[0], valores.shape[1] + 1))
+    np.cumsum(valores, axis=1, out=resultado[:, 1:])
+    return resultado
+
+
+def bases(entrada: Dict[str, Any]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Valores em float64 e somas acumuladas de cada medida da matriz da categoria.
+
+    Usado como construtor em CSVDownloader.get_derived.
+
+    Returns:
+        Medida -> arrays "valores", "soma" e "contagem" (valores presentes)
+        e "retornos", "retornos_quad" e "retornos_n" (taxas de crescimento
+        logarítmicas entre anos consecutivos com valores positivos)
+    """
+    matriz = entrada["matriz"]
+    if matriz is None:
+        return {}
+    resultado = {}
+    for k, medida in enumerate(matriz.medidas):
+        valores = matriz.valores[:, :, k].astype(np.float64)
+        presentes = np.isfinite(valores)
+        positivos = valores > 0
+        pares = positivos[:, 1:] & positivos[:, :-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            retornos = np.where(pares, np.log(valores[:, 1:] / valores[:, :-1]), 0.0)
+        resultado[medida] = {
+            "valores": valores,
+            "soma": _acumulada(np.where(presentes, valores, 0.0)),
+            "contagem": _acumulada(presentes),
+            "retornos": _acumulada(retornos),
+            "retornos_quad": _acumulada(retornos ** 2),
+            "retornos_n": _acumulada(pares),
+        }
+    return resultado
+
+
+def cagr(valores: np.ndarray, anos: np.ndarray) -> np.ndarray:
+    """
+    Taxa de crescimento anual composta de cada linha, entre o primeiro e o
+    último ano com valor positivo.
+
+    Returns:
+        Array com uma taxa por linha (NaN sem ao menos dois anos positivos)
+    """
+    positivos = valores > 0
+    existe = positivos.any(axis=1)
+    primeiro = np.argmax(positivos, axis=1)
+    ultimo = valores.shape[1] - 1 - np.argmax(positivos[:, ::-1], axis=1)
+    linhas = np.arange(valores.shape[0])
+    periodos = (anos[ultimo] - anos[primeiro]).astype(np.float64)
+    validos = existe & (periodos > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taxa = (valores[linhas, ultimo] / valores[linhas, primeiro]) ** (1 / periodos) - 1
+    return np.where(validos, taxa, np.nan)
+
+
+def volatilidade(base: Dict[str, np.ndarray], inicio: int, fim: int) -> np.ndarray:
+    """
+    Desvio padrão amostral das taxas de crescimento logarítmicas entre anos
+    consecutivos da fatia [inicio, fim), por linha.
+
+    Returns:
+        Array com um valor por linha (NaN com menos de duas taxas)
+    """
+    # A taxa j liga os anos j e j + 1: as da fatia são as de inicio a fim - 2
+    limite = base["retornos_n"].shape[1] - 1
+    primeira = min(inicio, limite)
+    fim_retornos = min(max(fim - 1, primeira), limite)
+    n = base["retornos_n"][:, fim_retornos] - base["retornos_n"][:, primeira]
+    soma = base["retornos"][:, fim_retornos] - base["retornos"][:, primeira]
+    quad = base["retornos_quad"][:, fim_retornos] - base["retornos_quad"][:, primeira]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variancia = (quad - soma ** 2 / n) / (n - 1)
+    return np.where(n >= 2, np.sqrt(np.maximum(variancia, 0)), np.nan)
+
+
+def media_movel(base: Dict[str, np.ndarray], inicio: int, fim: int, janela: int) -> np.ndarray:
+    """
+    Média móvel dos `janela` anos até cada ano da fatia [inicio, fim),
+    ignorando valores ausentes.
+
+    Returns:
+        Array (linhas, anos da fatia); NaN nos primeiros `janela - 1` anos e
+        em janelas sem nenhum valor
+    """
+    resultado = np.full((base["valores"].shape[0], fim - inicio), np.nan)
+    if fim - inicio < janela:
+        return resultado
+    # Janela terminada no ano j cobre as colunas [j - janela + 1, j]
+    finais = np.arange(inicio + janela, fim + 1)
+    soma = base["soma"][:, finais] - base["soma"][:, finais - janela]
+    contagem = base["contagem"][:, finais] - base["contagem"][:, finais - janela]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultado[:, janela - 1:] = np.where(contagem > 0, soma / contagem, np.nan)
+    return resultado
+
+
+def suavizacao(valores: np.ndarray, alfa: float) -> np.ndarray:
+    """
+    Nível final da suavização exponencial simples de cada linha.
+
+    O nível começa no primeiro valor presente e, a cada ano, vale
+    `alfa * valor + (1 - alfa) * nível anterior`; anos sem valor mantêm o nível.
+
+    Returns:
+        Array com o nível de cada linha (NaN se a linha não tiver valores)
+    """
+    nivel = np.full(valores.shape[0], np.nan)
+    for coluna in valores.T:
+        atualizado = alfa * coluna + (1 - alfa) * nivel
+        nivel = np.where(np.isnan(nivel), coluna, np.where(np.isnan(coluna), nivel, atualizado))
+    return nivel
+
+
+def analisar(base: Dict[str, np.ndarray], anos: np.ndarray, fatia: slice, linhas: List[int],
+             janela: int, alfa: float, horizonte: int) -> Dict[str, Any]:
+    """
+    Calcula os indicadores das linhas escolhidas no intervalo de anos.
+
+    Args:
+        base: Arrays de uma medida (ver `bases`)
+        anos: Anos da matriz
+        fatia: Fatia da dimensão de anos (ver YearMatrix.intervalo_anos)
+        linhas: Posições das entidades na matriz
+        janela: Anos da média móvel
+        alfa: Fator da suavização exponencial, entre 0 e 1
+        horizonte: Anos previstos após o último ano do intervalo
+
+    Returns:
+        Dicionário com os anos do intervalo e da previsão e os arrays
+        "cagr", "volatilidade", "media_movel" e "previsao" (uma linha por entidade)
+    """
+    inicio, fim, _ = fatia.indices(len(anos))
+    fim = max(fim, inicio)
+    valores = base["valores"][:, inicio:fim]
+    anos_fatia = anos[inicio:fim]
+    nivel = suavizacao(valores, alfa)
+    ultimo = int(anos_fatia[-1]) if len(anos_fatia) else None
+    return {
+        "anos": anos_fatia,
+        "anos_previsao": list(range(ultimo + 1, ultimo + 1 + horizonte)) if ultimo is not None else [],
+        "cagr": cagr(valores, anos_fatia)[linhas] if len(anos_fatia) else np.full(len(linhas), np.nan),
+        "volatilidade": volatilidade(base, inicio, fim)[linhas],
+        "media_movel": media_movel(base, inicio, fim, janela)[linhas],
+        # Suavização simples: a previsão é o nível final, repetido em todo o horizonte
+        "previsao": np.repeat(nivel[linhas, None], horizonte if ultimo is not None else 0, axis=1),
+    }
@@ -0,0 +1,343 @@
+"""
+Armazenamento compartilhado de datasets entre processos (snapshots mmap).
+
+Com vários workers do uvicorn/gunicorn, cada processo manteria sua própria
+cópia dos DataFrames e faria seus próprios downloads. No modo compartilhado,
+um único processo carregador (`python -m src.utils.shared_store`) baixa os
+dados e publica cada versão de dataset em um diretório de snapshots; os
+workers apenas anexam os arquivos com `np.load(mmap_mode='r')`, obtendo
+visões somente leitura sem cópia das colunas, da matriz densa e das
+métricas de comércio exterior. As estruturas derivadas também são
+publicadas, para que os workers não as refaçam: os registros e as
+subcategorias são montados a cada requisição a partir das colunas
+mapeadas (ver SnapshotTable), e a memória própria de cada worker não
+cresce com o tamanho dos datasets.
+
+Layout de cada snapshot (`<SNAPSHOT_DIR>/<categoria>/v<versao>/`):
+
+- `meta.json`: metadados, ordem das colunas e posições dos textos ausentes
+- `bloco_<n>.npy`: colunas numéricas de um mesmo dtype, uma por linha do array
+- `texto_<n>.npy`: coluna de texto, como strings de largura fixa
+- `unicos.npy`: posição da primeira ocorrência de cada valor distinto, por coluna (subcategorias)
+- `matriz.npy` e `folha.npy`: valores da YearMatrix (entidades x anos x medidas) e linhas somadas
+- `metricas_<nome>.npy`: matriz em float64, preço unitário e participações (ver trade_metrics)
+
+O arquivo `<categoria>/ATUAL` aponta para a versão vigente e é trocado de
+forma atômica (os.replace) após o snapshot estar completo.
+"""
+import json
+import os
+import shutil
+import time
+import logging
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.utils.light_csv import LightTable
+from src.utils.year_matrix import YearMatrix
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de versões antigas mantidas em disco para workers que ainda as usam
+VERSOES_MANTIDAS = 2
+
+# Versão do layout dos arquivos: um snapshot de outro layout é publicado de novo, mesmo sem mudança nos dados
+FORMATO = 2
+
+# Arrays das métricas de comércio exterior (ver trade_metrics.calcular)
+METRICAS = ("preco_unitario", "participacao_quantidade", "participacao_valor")
+
+
+class SnapshotTable(LightTable):
+    """
+    Colunas de um snapshot anexado, mapeadas dos arquivos.
+
+    Nada é convertido em objetos Python na anexação: os registros e as
+    subcategorias são montados a cada chamada, e o DataFrame só quando
+    alguma estrutura derivada precisa dele (ver CSVDownloader._materializar).
+    """
+
+    def __init__(self, colunas: Dict[str, np.ndarray], ausentes: Dict[str, List[int]],
+                 unicos: Dict[str, np.ndarray]):
+        """
+        Args:
+            colunas: Nome -> array mapeado, na ordem do arquivo
+            ausentes: Posições dos valores ausentes das colunas de texto
+            unicos: Posições da primeira ocorrência de cada valor distinto, por coluna
+        """
+        super().__init__(colunas)
+        self.ausentes = ausentes
+        self.unicos_pos = unicos
+
+    def _valores(self, coluna: str) -> List[Any]:
+        valores = self.dados[coluna].tolist()
+        for pos in self.ausentes.get(coluna, ()):
+            valores[pos] = None
+        return valores
+
+    def registros(self) -> List[Dict[str, Any]]:
+        """
+        Linhas como dicionários, como `df.to_dict('records')` (textos ausentes como None).
+        """
+        return [dict(zip(self.columns, linha)) for linha in zip(*(self._valores(c) for c in self.columns))]
+
+    def subcategorias(self) -> Dict[str, List[Any]]:
+        """
+        Valores distintos de cada coluna publicada, na ordem de aparição
+        (ver CSVDownloader._extract_subcategories).
+        """
+        return {coluna: self.dados[coluna][pos].tolist() for coluna, pos in self.unicos_pos.items()}
+
+    def to_dataframe(self):
+        """
+        DataFrame da tabela: as colunas numéricas continuam visões dos arquivos mapeados.
+        """
+        import pandas as pd
+
+        colunas = {
+            coluna: np.array(self._valores(coluna), dtype=object) if coluna in self.ausentes else valores
+            for coluna, valores in self.dados.items()
+        }
+        # copy=False mantém cada coluna numérica como visão do arquivo mapeado
+        return pd.DataFrame(colunas, copy=False)
+
+
+class SnapshotStore:
+    """
+    Publica e anexa snapshots de datasets em um diretório compartilhado.
+    """
+
+    def __init__(self, diretorio: str):
+        """
+        Args:
+            diretorio: Diretório compartilhado entre os processos
+        """
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def versao_atual(self, categoria: str) -> Optional[int]:
+        """
+        Versão publicada mais recente da categoria, ou None se não houver.
+        """
+        try:
+            with open(os.path.join(self.diretorio, categoria, "ATUAL"), "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, categoria: str, carga: Dict[str, Any]) -> Optional[str]:
+        """
+        Publica uma nova versão do dataset, se o conteúdo mudou.
+
+        Args:
+            categoria: Nome da categoria
+            carga: Entrada de cache do CSVDownloader (df, result, matriz, hash);
+                o campo "versao" é atualizado com a versão publicada
+
+        Returns:
+            Caminho do diretório do snapshot ou None se nada foi publicado
+        """
+        import pandas as pd
+
+        base = os.path.join(self.diretorio, categoria)
+        atual = self.versao_atual(categoria)
+        if atual is not None and carga.get("hash") and self._publicado(categoria, atual) == (carga["hash"], FORMATO):
+            # Conteúdo idêntico ao publicado: mantém a versão vigente
+            carga["versao"] = atual
+            return None
+        # A numeração das versões é do diretório compartilhado, não do processo
+        versao = (atual or 0) + 1
+        carga["versao"] = versao
+        destino = os.path.join(base, f"v{versao}")
+        temporario = os.path.join(base, f".tmp-{os.getpid()}-{versao}")
+        os.makedirs(temporario, exist_ok=True)
+
+        df: "pd.DataFrame" = carga["df"]
+        colunas: List[Dict[str, Any]] = []
+        blocos: Dict[str, List[str]] = {}
+        for col in df.columns:
+            if pd.api.types.is_numeric_dtype(df[col].dtype):
+                blocos.setdefault(str(df[col].dtype), []).append(col)
+            else:
+                # Até aqui, `colunas` só tem as colunas de texto
+                n = len(colunas)
+                ausente = df[col].isna().to_numpy()
+                textos = np.array(df[col].where(~ausente, "").astype(str).tolist())
+                np.save(os.path.join(temporario, f"texto_{n}.npy"), textos)
+                colunas.append({"nome": col, "texto": n, "ausentes": np.flatnonzero(ausente).tolist()})
+
+        for n, (dtype, nomes) in enumerate(blocos.items()):
+            # Uma coluna por linha: cada coluna vira uma fatia contígua do arquivo
+            np.save(os.path.join(temporario, f"bloco_{n}.npy"), np.ascontiguousarray(df[nomes].to_numpy(dtype=dtype).T))
+            for linha, nome in enumerate(nomes):
+                colunas.append({"nome": nome, "bloco": n, "linha": linha})
+        ordem = {nome: i for i, nome in enumerate(df.columns)}
+        colunas.sort(key=lambda c: ordem[c["nome"]])
+
+        # Subcategorias: posições da primeira ocorrência de cada valor não ausente
+        subcategorias: Dict[str, List[int]] = {}
+        posicoes = []
+        for col in carga["result"]["subcategorias"]:
+            primeiras = np.flatnonzero((df[col].notna() & ~df[col].duplicated()).to_numpy())
+            inicio = sum(len(p) for p in posicoes)
+            subcategorias[col] = [inicio, inicio + len(primeiras)]
+            posicoes.append(primeiras)
+        np.save(os.path.join(temporario, "unicos.npy"),
+                np.concatenate(posicoes).astype(np.int32) if posicoes else np.zeros(0, dtype=np.int32))
+
+        matriz: Optional[YearMatrix] = carga.get("matriz")
+        if matriz is not None:
+            np.save(os.path.join(temporario, "matriz.npy"), matriz.valores)
+            np.save(os.path.join(temporario, "folha.npy"), matriz.folha)
+        metricas: Optional[Dict[str, Any]] = carga.get("metricas")
+        if metricas is not None:
+            np.save(os.path.join(temporario, "metricas_matriz.npy"), metricas["matriz"].valores)
+            for nome in METRICAS:
+                np.save(os.path.join(temporario, f"metricas_{nome}.npy"), metricas[nome])
+
+        result = carga["result"]
+        meta = {
+            "categoria": categoria,
+            "formato": FORMATO,
+            "versao": versao,
+            "hash": carga.get("hash"),
+            "publicado_em": time.time(),
+            "fonte": result.get("fonte"),
+            "url": result.get("url"),
+            "ano_referencia": result.get("ano_referencia"),
+            "colunas": colunas,
+            "subcategorias": subcategorias,
+            "matriz": None if matriz is None else {
+                "entidades": matriz.entidades.tolist(),
+                "anos": matriz.anos.tolist(),
+                "medidas": list(matriz.medidas),
+            },
+            # A matriz das métricas tem as mesmas entidades, anos e medidas da matriz densa
+            "metricas": None if metricas is None else {"coluna": metricas["coluna"]},
+        }
+        with open(os.path.join(temporario, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        if os.path.exists(destino):
+            shutil.rmtree(destino)
+        os.rename(temporario, destino)
+        ponteiro = os.path.join(base, f"ATUAL.tmp-{os.getpid()}")
+        with open(ponteiro, "w") as f:
+            f.write(str(versao))
+        os.replace(ponteiro, os.path.join(base, "ATUAL"))
+        logger.info(f"Snapshot publicado: {categoria} v{versao}")
+
+        self._limpar(base, versao)
+        return destino
+
+    def attach(self, categoria: str) -> Optional[Dict[str, Any]]:
+        """
+        Anexa a versão vigente da categoria em modo somente leitura.
+
+        Returns:
+            Dicionário com "versao", "hash", "tabela" (SnapshotTable com as
+            colunas mapeadas), "matriz" e "metricas" (YearMatrix e arrays
+            mapeados, ou None) e os metadados da resposta, ou None se não
+            houver snapshot publicado
+        """
+        versao = self.versao_atual(categoria)
+        if versao is None:
+            return None
+        pasta = os.path.join(self.diretorio, categoria, f"v{versao}")
+        with open(os.path.join(pasta, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        def carregar(nome: str) -> np.ndarray:
+            # Visão ndarray do memmap: as fatias por coluna não carregam os atributos do np.memmap
+            return np.load(os.path.join(pasta, nome), mmap_mode="r").view(np.ndarray)
+
+        blocos: Dict[int, np.ndarray] = {}
+        colunas = {}
+        ausentes = {}
+        for col in meta["colunas"]:
+            if "bloco" in col:
+                n = col["bloco"]
+                if n not in blocos:
+                    blocos[n] = carregar(f"bloco_{n}.npy")
+                colunas[col["nome"]] = blocos[n][col["linha"]]
+            else:
+                colunas[col["nome"]] = carregar(f"texto_{col['texto']}.npy")
+                ausentes[col["nome"]] = col["ausentes"]
+        unicos = carregar("unicos.npy")
+        tabela = SnapshotTable(colunas, ausentes, {
+            col: unicos[inicio:fim] for col, (inicio, fim) in meta["subcategorias"].items()
+        })
+
+        matriz = metricas = None
+        if meta["matriz"] is not None:
+            eixos = {
+                "entidades": np.array(meta["matriz"]["entidades"], dtype=object),
+                "anos": np.array(meta["matriz"]["anos"], dtype=np.int16),
+                "medidas": tuple(meta["matriz"]["medidas"]),
+                "folha": carregar("folha.npy"),
+            }
+            matriz = YearMatrix(carregar("matriz.npy"), **eixos)
+            if meta["metricas"] is not None:
+                metricas = {
+                    "coluna": meta["metricas"]["coluna"],
+                    "matriz": YearMatrix(carregar("metricas_matriz.npy"), dtype=np.float64, **eixos),
+                    **{nome: carregar(f"metricas_{nome}.npy") for nome in METRICAS},
+                }
+        return {
+            "versao": meta["versao"],
+            "hash": meta["hash"],
+            "tabela": tabela,
+            "matriz": matriz,
+            "metricas": metricas,
+            "fonte": meta["fonte"],
+            "url": meta["url"],
+            "ano_referencia": meta["ano_referencia"],
+        }
+
+    def _publicado(self, categoria: str, versao: int) -> Optional[tuple]:
+        """
+        Hash e layout de uma versão publicada.
+        """
+        try:
+            with open(os.path.join(self.diretorio, categoria, f"v{versao}", "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta.get("hash"), meta.get("formato", 1)
+        except (OSError, ValueError):
+            return None
+
+    def _limpar(self, base: str, versao: int):
+        """
+        Remove versões antigas, mantendo as VERSOES_MANTIDAS mais recentes.
+        """
+        for nome in os.listdir(base):
+            if nome.startswith("v") and nome[1:].isdigit() and int(nome[1:]) <= versao - VERSOES_MANTIDAS:
+                # Workers que ainda mapeiam os arquivos continuam lendo-os (unlink em POSIX)
+                shutil.rmtree(os.path.join(base, nome), ignore_errors=True)
+
+
+def run_loader():
+    """
+    Processo carregador: mantém todas as categorias atualizadas com o
+    RefreshScheduler e publica cada nova versão. É o único processo que
+    acessa a Embrapa.
+    """
+    import asyncio
+    from src.utils.csv_downloader import CSVDownloader
+    from src.utils.scheduler import RefreshScheduler
+
+    async def executar():
+        scheduler = RefreshScheduler(CSVDownloader(data_dir="/tmp", modo="loader"))
+        scheduler.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(executar())
+
+
+if __name__ == "__main__":
+    from src.utils.logger import setup_logger
+    setup_logger("src")
+    run_loader()
@@ -0,0 +1,92 @@
+"""
+Estimativa do tamanho em memória das estruturas mantidas em cache.
+
+`sys.getsizeof` mede apenas o objeto externo; aqui o tamanho é somado
+recursivamente. DataFrames e arrays NumPy usam as medidas próprias
+(`memory_usage(deep=True)` e `nbytes`); listas e dicionários grandes,
+como os registros de `result["data"]`, são medidos por amostragem e
+extrapolados pelo número de itens. Objetos compartilhados (nomes de
+colunas repetidos em cada registro, strings internadas) são contados uma
+única vez. Arrays mapeados de snapshots (modo "shared") não contam: as
+páginas pertencem ao cache do sistema operacional, compartilhado entre os
+workers.
+"""
+import mmap
+import sys
+from typing import Any, Optional, Set
+
+import numpy as np
+
+# Itens medidos em listas e dicionários grandes antes de extrapolar
+AMOSTRA = 64
+
+
+def estimar_bytes(obj: Any, vistos: Optional[Set[int]] = None, amostra: int = AMOSTRA) -> int:
+    """
+    Estima os bytes ocupados por um objeto e pelo que ele referencia.
+
+    Args:
+        obj: Objeto a medir
+        vistos: Identificadores de objetos já contados; compartilhar o mesmo
+            conjunto entre chamadas evita contar duas vezes o que várias
+            estruturas referenciam
+        amostra: Itens medidos em coleções maiores que este número
+
+    Returns:
+        Tamanho estimado em bytes
+    """
+    return int(_estimar(obj, amostra, set() if vistos is None else vistos))
+
+
+def _estimar(obj: Any, amostra: int, vistos: Set[int]) -> float:
+    if obj is None or isinstance(obj, (bool, type)):
+        return 0
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+
+    # Sem importar o pandas: se ele não foi carregado, não há DataFrames a medir
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        uso = obj.memory_usage(index=True, deep=True)
+        return float(uso.sum()) if isinstance(obj, pd.DataFrame) else float(uso)
+    if isinstance(obj, np.ndarray):
+        return 0 if _mapeado(obj) else obj.nbytes
+    if isinstance(obj, (str, bytes, int, float)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        itens = list(obj.items())
+        return sys.getsizeof(obj) + _colecao(itens, amostra, vistos, lambda kv: kv)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        itens = obj if isinstance(obj, (list, tuple)) else list(obj)
+        return sys.getsizeof(obj) + _colecao(itens, amostra, vistos, lambda item: (item,))
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + _estimar(vars(obj), amostra, vistos)
+    # Extensões que informam o próprio tamanho (ex.: tabelas do pyarrow)
+    nbytes = getattr(obj, "nbytes", None)
+    return nbytes if isinstance(nbytes, int) else sys.getsizeof(obj)
+
+
+def _colecao(itens, amostra: int, vistos: Set[int], partes) -> float:
+    """
+    Soma os itens da coleção, medindo no máximo `amostra` itens espaçados.
+    """
+    total = len(itens)
+    if total == 0:
+        return 0
+    passo = max(1, total // amostra)
+    medidos = itens[::passo]
+    soma = sum(_estimar(parte, amostra, vistos) for item in medidos for parte in partes(item))
+    return soma * total / len(medidos)
+
+
+def _mapeado(array: np.ndarray) -> bool:
+    """
+    Indica se o array é uma visão de um arquivo mapeado em memória.
+    """
+    base: Optional[Any] = array
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, "base", None)
+    return False
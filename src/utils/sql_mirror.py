@@ -0,0 +1,320 @@
+"""
+Espelho SQLite em memória dos datasets, para consultas SQL somente leitura.
+
+Todas as categorias ficam em uma única tabela `dados`, no formato longo
+(categoria, entidade, pai, folha, ano, quantidade, valor), com índices por
+entidade e por ano, e uma visão por categoria (`producao`,
+`exportacao_vinho`...). A tabela `categorias` lista a versão e o número de
+linhas de cada uma.
+
+Cada geração do espelho é um banco em memória nomeado, com cache
+compartilhado entre conexões. Quando o downloader instala uma nova versão
+de alguma categoria, uma thread monta a nova geração ao lado da atual,
+copiando do banco anterior as categorias inalteradas, e a troca de uma só
+vez ao terminar; enquanto isso, as consultas seguem na geração atual, e as
+que estão em andamento terminam na antiga. Só a primeira consulta, sem
+geração alguma, espera a montagem.
+
+A montagem lê a carga recebida no aviso de nova versão ou, para as
+categorias já instaladas, a carga vigente do downloader
+(CSVDownloader.carga_vigente): categorias despejadas pelo orçamento de
+memória são lidas do disco e descartadas, sem voltar ao cache. O tamanho
+da geração atual conta no orçamento CACHE_MAX_BYTES.
+
+Cada consulta abre a própria conexão, com `PRAGMA query_only`, um
+autorizador que só permite leitura e funções de uma lista fixa, e um
+progress handler que a interrompe ao fim do prazo.
+"""
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from src.utils.config import SQL_TIMEOUT, SQL_MAX_ROWS
+from src.utils.long_format import longo_da_carga
+
+logger = logging.getLogger(__name__)
+
+# Instruções SQLite executadas entre verificações do prazo da consulta
+PASSOS_PROGRESSO = 1000
+
+_ESQUEMA = """
+CREATE TABLE dados (
+    categoria TEXT NOT NULL,
+    entidade TEXT NOT NULL,
+    pai TEXT,
+    folha INTEGER NOT NULL,
+    ano INTEGER NOT NULL,
+    quantidade REAL,
+    valor REAL
+);
+CREATE TABLE categorias (
+    categoria TEXT PRIMARY KEY,
+    versao INTEGER,
+    linhas INTEGER NOT NULL
+);
+"""
+
+_INDICES = """
+CREATE INDEX idx_dados_categoria_entidade ON dados (categoria, entidade);
+CREATE INDEX idx_dados_categoria_ano ON dados (categoria, ano);
+CREATE INDEX idx_dados_entidade ON dados (entidade);
+"""
+
+# Ações permitidas às consultas (ver sqlite3.Connection.set_authorizer)
+_PERMITIDAS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_RECURSIVE}
+
+# Funções escalares, de agregação e de janela permitidas; as demais (randomblob,
+# zeroblob, load_extension...) são recusadas pelo autorizador
+_FUNCOES = {
+    # Escalares
+    "abs", "char", "coalesce", "format", "glob", "hex", "ifnull", "iif", "instr", "length", "like",
+    "lower", "ltrim", "max", "min", "nullif", "printf", "quote", "replace", "round", "rtrim", "sign",
+    "substr", "substring", "trim", "typeof", "unicode", "upper",
+    # Matemáticas
+    "acos", "asin", "atan", "atan2", "ceil", "ceiling", "cos", "degrees", "exp", "floor", "ln", "log",
+    "log10", "log2", "mod", "pi", "pow", "power", "radians", "sin", "sqrt", "tan", "trunc",
+    # Datas
+    "date", "datetime", "julianday", "strftime", "time", "unixepoch",
+    # Agregação
+    "avg", "count", "group_concat", "string_agg", "sum", "total",
+    # Janela
+    "cume_dist", "dense_rank", "first_value", "lag", "last_value", "lead", "nth_value", "ntile",
+    "percent_rank", "rank", "row_number",
+}
+
+
+class ConsultaInvalida(Exception):
+    """
+    Consulta rejeitada: sintaxe, escrita, várias instruções ou prazo esgotado.
+    """
+
+
+def _autorizar(acao, arg1, arg2, *args) -> int:
+    if acao == sqlite3.SQLITE_FUNCTION:
+        # arg2 é o nome da função chamada
+        return sqlite3.SQLITE_OK if (arg2 or "").lower() in _FUNCOES else sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK if acao in _PERMITIDAS else sqlite3.SQLITE_DENY
+
+
+class SQLMirror:
+    """
+    Mantém o espelho SQLite em dia com as versões dos datasets em cache.
+    """
+
+    _geracoes = itertools.count(1)
+
+    def __init__(self, downloader, acompanhar: bool = True):
+        """
+        Args:
+            downloader: CSVDownloader de onde vêm os datasets
+            acompanhar: Se True, monta uma nova geração a cada nova versão
+                instalada; se False, só quando a primeira consulta chegar
+        """
+        self.downloader = downloader
+        self._versoes: Dict[str, Optional[int]] = {}
+        # Conexão que mantém viva a geração atual (bancos em memória somem com a última conexão)
+        self._ancora: Optional[sqlite3.Connection] = None
+        self._uri: Optional[str] = None
+        # Protege a troca de geração; a montagem usa outro lock e não bloqueia as consultas
+        self._lock = threading.Lock()
+        self._montagem = threading.Lock()
+        # Montagem em segundo plano: thread em execução e nova versão ainda não incorporada
+        self._agenda = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pendente = False
+        # Cargas recebidas nos avisos de nova versão e ainda não incorporadas
+        self._cargas: Dict[str, Dict[str, Any]] = {}
+        # Bytes da geração atual, contados no orçamento de memória do downloader
+        self._bytes = 0
+        downloader.registrar_memoria("espelho_sql", lambda: self._bytes)
+        if acompanhar:
+            downloader.ouvir(self._nova_versao)
+
+    def pronto(self) -> bool:
+        """
+        Indica se já existe uma geração para as consultas.
+        """
+        return self._uri is not None
+
+    def pendentes(self) -> List[str]:
+        """
+        Categorias que a próxima chamada a `atualizar` precisa ler.
+        """
+        versoes = self._versoes_instaladas()
+        if self._uri is not None and versoes == self._versoes:
+            return []
+        return [categoria for categoria, versao in versoes.items() if self._versoes.get(categoria) != versao]
+
+    def _versoes_instaladas(self) -> Dict[str, int]:
+        """
+        Versão de cada categoria já carregada pelo downloader (em cache ou despejada).
+        """
+        versoes = {categoria: self.downloader.versao(categoria) for categoria in self.downloader.DOWNLOAD_URLS}
+        return {categoria: versao for categoria, versao in versoes.items() if versao is not None}
+
+    def _nova_versao(self, categoria: str, carga: Dict[str, Any]):
+        # Chamado com o lock da categoria: a montagem, que lê a carga, fica para a thread
+        with self._agenda:
+            self._cargas[categoria] = carga
+        self.agendar()
+
+    def agendar(self):
+        """
+        Agenda a montagem de uma nova geração numa thread.
+
+        Versões instaladas durante uma montagem são incorporadas por uma
+        nova passada da mesma thread, ao final.
+        """
+        with self._agenda:
+            self._pendente = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._montar, name="espelho-sql", daemon=True)
+                self._thread.start()
+
+    def _montar(self):
+        while True:
+            with self._agenda:
+                if not self._pendente:
+                    self._thread = None
+                    return
+                self._pendente = False
+            try:
+                self.atualizar()
+            except Exception as e:
+                logger.error(f"Erro ao atualizar o espelho SQL: {str(e)}")
+
+    def atualizar(self) -> str:
+        """
+        Monta uma nova geração se alguma categoria mudou de versão.
+
+        Returns:
+            URI da geração atual
+        """
+        with self._montagem:
+            versoes = self._versoes_instaladas()
+            if self._uri is not None and versoes == self._versoes:
+                return self._uri
+            inicio = time.perf_counter()
+            uri = f"file:vitibrasil_sql_{next(self._geracoes)}?mode=memory&cache=shared"
+            ancora = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            ancora.executescript(_ESQUEMA)
+            if self._uri is not None:
+                ancora.execute("ATTACH DATABASE ? AS anterior", (self._uri,))
+            for categoria, versao in versoes.items():
+                if self._uri is not None and self._versoes.get(categoria) == versao:
+                    # Inalterada: copia da geração anterior, sem reler o dataset
+                    ancora.execute("INSERT INTO dados SELECT * FROM anterior.dados WHERE categoria = ?", (categoria,))
+                    ancora.execute("INSERT INTO categorias SELECT * FROM anterior.categorias WHERE categoria = ?",
+                                   (categoria,))
+                    continue
+                self._carregar(ancora, categoria, versao)
+            if self._uri is not None:
+                ancora.commit()
+                ancora.execute("DETACH DATABASE anterior")
+            ancora.executescript(_INDICES)
+            for categoria in self.downloader.DOWNLOAD_URLS:
+                ancora.execute(f'CREATE VIEW "{categoria}" AS SELECT * FROM dados WHERE categoria = \'{categoria}\'')
+            ancora.execute("ANALYZE")
+            ancora.commit()
+            paginas = ancora.execute("PRAGMA page_count").fetchone()[0]
+            tamanho_pagina = ancora.execute("PRAGMA page_size").fetchone()[0]
+
+            with self._lock:
+                antiga = self._ancora
+                self._ancora, self._uri, self._versoes = ancora, uri, versoes
+                self._bytes = paginas * tamanho_pagina
+            if antiga is not None:
+                antiga.close()
+            logger.info(f"Espelho SQL atualizado em {time.perf_counter() - inicio:.2f}s ({self._bytes} bytes)")
+        # Fora do lock da montagem: o despejo de categorias não espera a próxima geração
+        self.downloader.aplicar_orcamento()
+        return uri
+
+    def _carregar(self, conexao: sqlite3.Connection, categoria: str, versao: int) -> Optional[int]:
+        """
+        Insere o formato longo da versão da categoria, lido da carga recebida
+        no aviso de nova versão ou da carga vigente do downloader.
+
+        Returns:
+            Versão carregada ou None se a versão não estiver mais disponível
+        """
+        with self._agenda:
+            carga = self._cargas.pop(categoria, None)
+            if carga is not None and carga.get("versao", 0) > versao:
+                # Versão instalada depois do início desta montagem: fica para a próxima passada
+                self._cargas[categoria] = carga
+                carga = None
+        if carga is None or carga.get("versao") != versao:
+            carga = self.downloader.carga_vigente(categoria)
+        if carga is None or carga.get("versao") != versao:
+            return None
+        longo = longo_da_carga(carga)
+        # Só o formato longo é usado daqui em diante: uma carga lida do disco já pode ser liberada
+        del carga
+        pais = longo["pai"].where(longo["pai"].notna(), None)
+        conexao.executemany(
+            "INSERT INTO dados VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(
+                itertools.repeat(categoria),
+                longo["entidade"].astype(str).tolist(),
+                pais.tolist(),
+                longo["folha"].astype(int).tolist(),
+                longo["ano"].astype(int).tolist(),
+                longo["quantidade"].tolist(),
+                longo["valor"].tolist(),
+            ),
+        )
+        conexao.execute("INSERT INTO categorias VALUES (?, ?, ?)", (categoria, versao, len(longo)))
+        return versao
+
+    def consultar(self, sql: str, limite: int = SQL_MAX_ROWS, prazo: float = SQL_TIMEOUT) -> Dict[str, Any]:
+        """
+        Executa uma consulta somente leitura.
+
+        Args:
+            sql: Uma única instrução SELECT (ou WITH ... SELECT)
+            limite: Número máximo de linhas retornadas
+            prazo: Segundos de execução antes da interrupção
+
+        Returns:
+            Dicionário com colunas, linhas, se o resultado foi truncado e a duração
+
+        Raises:
+            ConsultaInvalida: Se a consulta não for uma leitura válida ou exceder o prazo
+        """
+        if self._uri is None:
+            self.atualizar()
+        elif self.pendentes():
+            # Versões carregadas sem aviso (ex.: antes da criação do espelho): atualiza em segundo plano
+            self.agendar()
+        with self._lock:
+            # Sob o lock, a geração não é substituída (e destruída) antes de a conexão abrir
+            conexao = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        inicio = time.monotonic()
+        limite_tempo = inicio + prazo
+        try:
+            conexao.execute("PRAGMA query_only = ON")
+            conexao.set_authorizer(_autorizar)
+            conexao.set_progress_handler(lambda: time.monotonic() > limite_tempo, PASSOS_PROGRESSO)
+            cursor = conexao.execute(sql)
+            if cursor.description is None:
+                raise ConsultaInvalida("A instrução não retorna linhas.")
+            colunas = [coluna[0] for coluna in cursor.description]
+            linhas: List[tuple] = cursor.fetchmany(limite + 1)
+        except sqlite3.OperationalError as e:
+            if time.monotonic() > limite_tempo:
+                raise ConsultaInvalida(f"Consulta interrompida após {prazo:g}s.") from e
+            raise ConsultaInvalida(str(e)) from e
+        except (sqlite3.DatabaseError, sqlite3.Warning, sqlite3.ProgrammingError) as e:
+            raise ConsultaInvalida(str(e)) from e
+        finally:
+            conexao.close()
+        return {
+            "colunas": colunas,
+            "linhas": [list(linha) for linha in linhas[:limite]],
+            "truncado": len(linhas) > limite,
+            "duracao_ms": round((time.monotonic() - inicio) * 1000, 2),
+        }
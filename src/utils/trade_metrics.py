@@ -0,0 +1,184 @@
+"""
+Métricas derivadas dos arquivos de comércio exterior (importação e exportação).
+
+Os CSVs trazem, para cada país e ano, a quantidade (kg) e o valor (US$) em
+colunas pareadas ("2019" e "2019.1"). A partir dessas colunas, numa matriz
+densa em float64 (ver year_matrix.YearMatrix), são calculados, de forma
+vetorizada e uma vez por versão do dataset:
+
+- preço unitário (US$/kg): valor / quantidade, nos anos com quantidade positiva
+- participação de cada país no total do ano, em quantidade e em valor
+
+O saldo comercial (exportação − importação do mesmo produto, por país)
+cruza duas categorias e é mantido por TradeBalance, refeito quando a versão
+de qualquer uma delas muda.
+
+A matriz da categoria, em float32, não serve de base: com 24 bits de
+mantissa, valores em US$ da ordem de 1,5e8 são arredondados em até 8
+dólares, e o erro passa para o preço unitário e para o saldo.
+"""
+import threading
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from src.utils.hierarchy import HierarchyIndex
+from src.utils.long_format import PADRAO_VALOR
+from src.utils.year_matrix import YearMatrix
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Pares exportação -> importação do mesmo produto
+CONTRAPARTES = {
+    "exportacao_vinho": "importacao_vinho",
+    "exportacao_espumante": "importacao_espumante",
+    "exportacao_frescas": "importacao_frescas",
+    "exportacao_suco": "importacao_suco",
+}
+CONTRAPARTES.update({importacao: exportacao for exportacao, importacao in list(CONTRAPARTES.items())})
+
+
+def calcular(df: "pd.DataFrame", hierarquia: Optional[HierarchyIndex], coluna: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Preço unitário e participações de uma categoria com quantidade e valor.
+
+    Args:
+        df: DataFrame largo da categoria
+        hierarquia: Índice hierárquico da categoria, se houver
+        coluna: Nome da coluna da entidade nos registros (ex.: "País")
+
+    Returns:
+        Dicionário com a coluna da entidade, a matriz em float64 ("matriz",
+        usada no saldo comercial) e os arrays (entidades x anos)
+        "preco_unitario", "participacao_quantidade" e "participacao_valor",
+        ou None se a categoria não tiver valor em US$
+    """
+    if not any(PADRAO_VALOR.match(str(col)) for col in df.columns):
+        return None
+    matriz = YearMatrix.from_dataframe(df, hierarquia, dtype=np.float64)
+    if matriz is None or "valor" not in matriz.medidas:
+        return None
+    quantidade = matriz.valores[:, :, matriz.medidas.index("quantidade")]
+    valor = matriz.valores[:, :, matriz.medidas.index("valor")]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        preco = np.where(quantidade > 0, valor / quantidade, np.nan)
+        participacoes = {
+            nome: np.where(total > 0, medida / total, np.nan)
+            for nome, medida in (("participacao_quantidade", quantidade), ("participacao_valor", valor))
+            for total in [np.nansum(medida[matriz.folha], axis=0)]
+        }
+    return {"coluna": coluna, "matriz": matriz, "preco_unitario": preco, **participacoes}
+
+
+def _chave(nome: Any) -> str:
+    return str(nome).strip().lower()
+
+
+def saldo(exportacao: YearMatrix, importacao: YearMatrix, linhas_de: YearMatrix) -> Dict[str, np.ndarray]:
+    """
+    Saldo comercial (exportação − importação) por país e ano, alinhado às
+    linhas e anos de `linhas_de` (uma das duas matrizes, em float64).
+
+    Países ausentes de um dos arquivos contam como zero nesse arquivo;
+    nomes repetidos são somados.
+
+    Returns:
+        Dicionário com os arrays "saldo_quantidade" e "saldo_valor"
+    """
+    nomes = [_chave(nome) for nome in linhas_de.entidades]
+    posicoes = {nome: i for i, nome in reversed(list(enumerate(nomes)))}
+    grupos = np.array([posicoes[nome] for nome in nomes], dtype=np.intp)
+    resultado = {}
+    for medida in ("quantidade", "valor"):
+        total = np.zeros((len(nomes), len(linhas_de.anos)))
+        for sinal, matriz in ((1.0, exportacao), (-1.0, importacao)):
+            # Linha de destino de cada linha da matriz (-1: país ausente em linhas_de)
+            destino = np.array([posicoes.get(_chave(nome), -1) for nome in matriz.entidades], dtype=np.intp)
+            # Coluna de cada ano de linhas_de na matriz (-1: ano ausente)
+            pos_ano = {int(ano): j for j, ano in enumerate(matriz.anos)}
+            colunas = np.array([pos_ano.get(int(ano), -1) for ano in linhas_de.anos], dtype=np.intp)
+            presentes = destino >= 0
+            valores = np.nan_to_num(matriz.valores[presentes][:, :, matriz.medidas.index(medida)])
+            alinhados = np.where(colunas >= 0, valores[:, colunas], 0.0)
+            np.add.at(total, destino[presentes], sinal * alinhados)
+        # Nomes repetidos recebem o saldo do primeiro, que acumulou todos
+        resultado[f"saldo_{medida}"] = total[grupos]
+    return resultado
+
+
+class TradeBalance:
+    """
+    Saldo comercial de cada categoria de comércio exterior, refeito apenas
+    quando a versão da categoria ou da contraparte muda.
+    """
+
+    def __init__(self, downloader):
+        """
+        Args:
+            downloader: CSVDownloader de onde vêm as matrizes
+        """
+        self.downloader = downloader
+        self._saldos: Dict[str, Tuple[Tuple[Optional[int], Optional[int]], Dict[str, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    def saldo(self, categoria: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Saldo comercial alinhado às linhas e anos da matriz da categoria.
+
+        Returns:
+            Dicionário com "saldo_quantidade" e "saldo_valor" ou None se a
+            categoria não tiver contraparte ou os dados não estiverem disponíveis
+        """
+        contraparte = CONTRAPARTES.get(categoria)
+        if contraparte is None:
+            return None
+        metricas = self.downloader.get_trade_metrics(categoria)
+        outras = self.downloader.get_trade_metrics(contraparte)
+        if metricas is None or outras is None:
+            return None
+        matriz, outra = metricas["matriz"], outras["matriz"]
+        versoes = (self.downloader.versao(categoria), self.downloader.versao(contraparte))
+        with self._lock:
+            atual = self._saldos.get(categoria)
+            if atual is not None and atual[0] == versoes:
+                return atual[1]
+            if categoria.startswith("exportacao"):
+                calculado = saldo(matriz, outra, matriz)
+            else:
+                calculado = saldo(outra, matriz, matriz)
+            self._saldos[categoria] = (versoes, calculado)
+            return calculado
+
+
+def registros(matriz: YearMatrix, metricas: Dict[str, Any], saldos: Optional[Dict[str, np.ndarray]],
+              linhas: List[int], anos: List[int]) -> List[Dict[str, Any]]:
+    """
+    Monta os registros (país, ano) das linhas e anos escolhidos.
+
+    Args:
+        matriz: Matriz densa da categoria
+        metricas: Resultado de `calcular`
+        saldos: Resultado de TradeBalance.saldo, se houver contraparte
+        linhas: Posições das entidades na matriz
+        anos: Posições dos anos na matriz
+
+    Returns:
+        Lista de dicionários com a entidade, o ano e as métricas
+    """
+    if not linhas or not anos:
+        return []
+    linhas_idx = np.repeat(np.asarray(linhas, dtype=np.intp), len(anos))
+    anos_idx = np.tile(np.asarray(anos, dtype=np.intp), len(linhas))
+    colunas = {
+        metricas["coluna"] or "entidade": matriz.entidades[linhas_idx].tolist(),
+        "ano": matriz.anos[anos_idx].astype(int).tolist(),
+    }
+    arrays = {nome: metricas[nome] for nome in ("preco_unitario", "participacao_quantidade", "participacao_valor")}
+    if saldos is not None:
+        arrays.update(saldos)
+    for nome, valores in arrays.items():
+        selecionados = valores[linhas_idx, anos_idx].astype(np.float64)
+        colunas[nome] = np.where(np.isnan(selecionados), None, selecionados).tolist()
+    nomes = list(colunas)
+    return [dict(zip(nomes, linha)) for linha in zip(*colunas.values())]
@@ -0,0 +1,271 @@
+"""
+Cliente HTTP para o site da Embrapa, com prazo total, retentativas e hedging.
+
+O servidor da Embrapa tem tempos de resposta longos e erráticos. Cada chamada
+feita por este cliente:
+
+- tem um prazo total (UPSTREAM_DEADLINE): nenhuma espera ultrapassa o prazo,
+  e cada requisição, inclusive a leitura do corpo, é interrompida quando ele
+  acaba, liberando a thread do pool;
+- é repetida em caso de erro de rede, timeout ou status 5xx, até
+  UPSTREAM_RETRIES vezes, com backoff exponencial e jitter completo;
+- opcionalmente dispara uma segunda requisição idêntica (hedge) se a primeira
+  não responder dentro do p95 das latências recentes do host; vence a
+  primeira resposta;
+- passa pelo circuit breaker do host (ver circuit_breaker.py).
+
+Com UPSTREAM_CASSETTE_MODE=record as respostas são gravadas em disco e, com
+UPSTREAM_CASSETTE_MODE=replay, servidas de lá sem rede (ver cassette.py).
+
+Contadores de tentativas, retentativas e hedges ficam em `metrics()`.
+"""
+import random
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from src.utils.circuit_breaker import get_breaker, CircuitOpenError
+from src.utils.cassette import Cassette, CassetteMissing
+from src.utils.config import (
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_READ_TIMEOUT,
+    UPSTREAM_DEADLINE,
+    UPSTREAM_RETRIES,
+    UPSTREAM_BACKOFF_BASE,
+    UPSTREAM_BACKOFF_MAX,
+    UPSTREAM_HEDGE_ENABLED,
+    UPSTREAM_HEDGE_DELAY,
+    UPSTREAM_HEDGE_MIN_DELAY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Amostras de latência mantidas por host para o cálculo do p95
+JANELA_LATENCIAS = 100
+MIN_AMOSTRAS_P95 = 5
+
+# Bytes por leitura do corpo: entre duas leituras, o prazo da chamada é conferido
+BLOCO_LEITURA = 64 * 1024
+
+
+class UpstreamError(Exception):
+    """
+    Falha definitiva de uma chamada ao host, após retentativas.
+    """
+
+
+class UpstreamClient:
+    """
+    Cliente HTTP com prazo total, retentativas com jitter e hedging.
+    """
+
+    def __init__(self, deadline: float = UPSTREAM_DEADLINE, retries: int = UPSTREAM_RETRIES,
+                 hedge: bool = UPSTREAM_HEDGE_ENABLED, cassete: Optional[Cassette] = None):
+        """
+        Args:
+            deadline: Prazo total padrão de cada chamada, em segundos
+            retries: Retentativas após a primeira tentativa
+            hedge: Se True, dispara requisições de hedge após o p95 do host
+            cassete: Gravação/reprodução das respostas (padrão: configuração UPSTREAM_CASSETTE_*)
+        """
+        self.deadline = deadline
+        self.retries = retries
+        self.hedge = hedge
+        self.cassete = cassete or Cassette()
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="upstream")
+        self._latencias: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._contadores = {
+            "requisicoes": 0,
+            "tentativas": 0,
+            "retentativas": 0,
+            "hedges": 0,
+            "hedges_vencedores": 0,
+            "falhas": 0,
+            "recusadas_circuito": 0,
+            "bytes": 0,
+        }
+
+    def get(self, url: str, deadline: Optional[float] = None) -> requests.Response:
+        """
+        Faz um GET respeitando o prazo, com retentativas e hedging.
+
+        Args:
+            url: URL a buscar
+            deadline: Prazo total em segundos (padrão: UPSTREAM_DEADLINE)
+
+        Returns:
+            Resposta com status < 500
+
+        Raises:
+            CircuitOpenError: Se o circuito do host estiver aberto
+            UpstreamError: Se todas as tentativas falharem ou o prazo esgotar
+                (no modo replay, se não houver resposta gravada)
+        """
+        if self.cassete.modo == "replay":
+            return self._reproduzir(url)
+        breaker = get_breaker(url)
+        if not breaker.permitir():
+            self._incrementar("recusadas_circuito")
+            raise CircuitOpenError(f"Circuito aberto para {urlsplit(url).netloc}")
+
+        self._incrementar("requisicoes")
+        inicio = time.monotonic()
+        limite = inicio + (deadline or self.deadline)
+        ultimo_erro: Optional[Exception] = None
+        for tentativa in range(self.retries + 1):
+            if tentativa:
+                # Jitter completo: espera aleatória entre 0 e o backoff exponencial
+                espera = random.uniform(0, min(UPSTREAM_BACKOFF_MAX, UPSTREAM_BACKOFF_BASE * 2 ** (tentativa - 1)))
+                if time.monotonic() + espera >= limite:
+                    break
+                time.sleep(espera)
+                self._incrementar("retentativas")
+                logger.info(f"Retentativa {tentativa} para {url}: {ultimo_erro}")
+            try:
+                resposta = self._tentar(url, limite)
+            except Exception as e:
+                ultimo_erro = e
+                continue
+            if resposta.status_code >= 500:
+                ultimo_erro = UpstreamError(f"Status code: {resposta.status_code}")
+                continue
+            breaker.registrar_sucesso()
+            self._incrementar("bytes", len(resposta.content))
+            if self.cassete.modo == "record":
+                self.cassete.gravar(url, resposta, time.monotonic() - inicio)
+            return resposta
+
+        breaker.registrar_falha()
+        self._incrementar("falhas")
+        raise UpstreamError(f"Falha ao obter {url}: {ultimo_erro or 'prazo esgotado'}")
+
+    def _reproduzir(self, url: str) -> requests.Response:
+        """
+        Resposta gravada da URL, sem rede, circuit breaker ou retentativas.
+        """
+        self._incrementar("requisicoes")
+        try:
+            resposta = self.cassete.reproduzir(url)
+        except CassetteMissing as e:
+            self._incrementar("falhas")
+            raise UpstreamError(str(e))
+        self._incrementar("bytes", len(resposta.content))
+        return resposta
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Contadores do cliente e o atraso de hedge atual de cada host.
+        """
+        with self._lock:
+            contadores = dict(self._contadores)
+            hosts = list(self._latencias)
+        return {**contadores, "atraso_hedge": {host: round(self._atraso_hedge(host), 3) for host in hosts}}
+
+    def _tentar(self, url: str, limite: float) -> requests.Response:
+        """
+        Uma tentativa lógica: a requisição principal e, se demorar, um hedge.
+        """
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            raise requests.Timeout("Prazo esgotado")
+        futuros = [self._executor.submit(self._requisitar, url, limite)]
+        if self.hedge:
+            atraso = self._atraso_hedge(urlsplit(url).netloc)
+            feitos, _ = wait(futuros, timeout=min(atraso, restante))
+            if not feitos and time.monotonic() < limite:
+                self._incrementar("hedges")
+                futuros.append(self._executor.submit(self._requisitar, url, limite))
+
+        pendentes = set(futuros)
+        ultimo_erro: Optional[Exception] = None
+        while pendentes:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            feitos, pendentes = wait(pendentes, timeout=restante, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                try:
+                    resposta = futuro.result()
+                except Exception as e:
+                    ultimo_erro = e
+                    continue
+                if resposta.status_code >= 500 and pendentes:
+                    # Ainda há uma requisição em andamento que pode ter sucesso
+                    ultimo_erro = UpstreamError(f"Status code: {resposta.status_code}")
+                    continue
+                if futuro is not futuros[0]:
+                    self._incrementar("hedges_vencedores")
+                for perdedor in pendentes:
+                    perdedor.add_done_callback(_fechar_resposta)
+                return resposta
+        for perdedor in pendentes:
+            perdedor.add_done_callback(_fechar_resposta)
+        raise ultimo_erro or requests.Timeout("Prazo esgotado")
+
+    def _requisitar(self, url: str, limite: float) -> requests.Response:
+        """
+        Uma requisição, limitada ao prazo da chamada.
+
+        Os timeouts do requests valem para a conexão e para cada leitura do
+        socket, não para a resposta inteira: um servidor que envia o corpo
+        aos poucos manteria a thread do pool ocupada muito depois do prazo.
+        O corpo é lido em blocos e abandonado quando o prazo acaba, o que
+        devolve a thread ao pool no máximo uma leitura depois dele.
+        """
+        self._incrementar("tentativas")
+        restante = max(limite - time.monotonic(), 0.001)
+        inicio = time.monotonic()
+        resposta = self._session.get(
+            url,
+            timeout=(min(UPSTREAM_CONNECT_TIMEOUT, restante), min(UPSTREAM_READ_TIMEOUT, restante)),
+            stream=True,
+        )
+        try:
+            partes = []
+            for parte in resposta.iter_content(BLOCO_LEITURA):
+                if time.monotonic() >= limite:
+                    raise requests.Timeout(f"Prazo esgotado durante a leitura de {url}")
+                partes.append(parte)
+        except BaseException:
+            resposta.close()
+            raise
+        resposta._content = b"".join(partes)
+        if resposta.status_code < 500:
+            host = urlsplit(url).netloc
+            with self._lock:
+                self._latencias.setdefault(host, deque(maxlen=JANELA_LATENCIAS)).append(time.monotonic() - inicio)
+        return resposta
+
+    def _atraso_hedge(self, host: str) -> float:
+        """
+        p95 das latências recentes do host, ou UPSTREAM_HEDGE_DELAY sem amostras suficientes.
+        """
+        with self._lock:
+            amostras = sorted(self._latencias.get(host, ()))
+        if len(amostras) < MIN_AMOSTRAS_P95:
+            return UPSTREAM_HEDGE_DELAY
+        return max(amostras[int(0.95 * (len(amostras) - 1))], UPSTREAM_HEDGE_MIN_DELAY)
+
+    def _incrementar(self, nome: str, valor: int = 1):
+        with self._lock:
+            self._contadores[nome] += valor
+
+
+def _fechar_resposta(futuro):
+    """
+    Libera a conexão de uma requisição que perdeu para outra.
+    """
+    if not futuro.cancelled() and futuro.exception() is None:
+        futuro.result().close()
+
+
+# Cliente compartilhado por downloader e scrapers
+upstream = UpstreamClient()
@@ -0,0 +1,100 @@
+"""
+Aquecimento dos datasets na inicialização da aplicação.
+
+Logo após o deploy, as primeiras requisições de cada endpoint pagariam o
+download e o parsing dos CSVs. O aquecimento carrega todas as categorias
+antes que a instância seja considerada pronta (/readyz): primeiro do que
+já existe localmente (snapshot compartilhado, CSV baixado anteriormente ou
+distribuído em DATA_DIR), o que é rápido, e depois da Embrapa para as
+categorias que ainda faltarem ou cujo arquivo local tem mais de CACHE_TTL
+segundos. Se a Embrapa não responder, a instância fica pronta com os dados
+antigos, e /readyz lista as categorias desatualizadas.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from src.utils.config import REFRESH_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """
+    Executa e acompanha o aquecimento de um CSVDownloader.
+    """
+
+    def __init__(self, downloader):
+        """
+        Args:
+            downloader: Instância de CSVDownloader a aquecer
+        """
+        self.downloader = downloader
+        self.fase = "pendente"
+        self.inicio: Optional[float] = None
+        self.fim: Optional[float] = None
+
+    async def run(self, upstream: bool = True):
+        """
+        Carrega todas as categorias: primeiro localmente, depois da Embrapa.
+
+        Args:
+            upstream: Se True, baixa da Embrapa as categorias sem dados locais
+                ou com dados desatualizados. Quando o agendador está ativo, ele
+                mesmo faz essa etapa.
+        """
+        self.inicio = time.time()
+        categorias = list(self.downloader.DOWNLOAD_URLS)
+
+        self.fase = "local"
+        locais = await asyncio.gather(*[
+            run_in_threadpool(self.downloader.load_local, categoria) for categoria in categorias
+        ])
+        faltantes = [c for c, ok in zip(categorias, locais) if not ok]
+        logger.info(f"Aquecimento local: {len(categorias) - len(faltantes)}/{len(categorias)} categorias")
+        desatualizadas = self.desatualizadas()
+        if desatualizadas:
+            logger.warning(f"Dados locais desatualizados: {', '.join(desatualizadas)}")
+            faltantes += desatualizadas
+
+        if upstream and faltantes:
+            self.fase = "upstream"
+            semaforo = asyncio.Semaphore(REFRESH_MAX_CONCURRENCY)
+
+            async def baixar(categoria: str):
+                async with semaforo:
+                    return await run_in_threadpool(self.downloader.refresh, categoria)
+
+            await asyncio.gather(*[baixar(categoria) for categoria in faltantes])
+
+        self.fase = "concluido"
+        self.fim = time.time()
+        logger.info(f"Aquecimento concluído em {self.fim - self.inicio:.1f}s")
+
+    def ready(self) -> bool:
+        """
+        Indica se todas as categorias estão disponíveis: em cache ou, se
+        despejadas pelo orçamento de memória, no disco.
+        """
+        return all(estado["carregado"] or estado.get("despejado") for estado in self.downloader.status().values())
+
+    def desatualizadas(self) -> List[str]:
+        """
+        Categorias servidas com dados de mais de CACHE_TTL segundos (ex.: CSV
+        local antigo com a Embrapa fora do ar).
+        """
+        return [categoria for categoria, estado in self.downloader.status().items() if estado.get("desatualizado")]
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Fase do aquecimento e estado de carga de cada categoria.
+        """
+        return {
+            "fase": self.fase,
+            "desatualizadas": self.desatualizadas(),
+            "duracao": round((self.fim or time.time()) - self.inicio, 1) if self.inicio else None,
+            "categorias": self.downloader.status(),
+        }
@@ -0,0 +1,157 @@
+"""
+Representação densa dos datasets da Embrapa como matriz entidade x ano.
+
+Cada categoria vira um array NumPy float32 contíguo de forma
+(entidades, anos, medidas), em que as medidas são ("quantidade",) ou, nos
+arquivos de importação/exportação, ("quantidade", "valor"). Consultas de
+série temporal passam a ser fatiamentos do array, sem percorrer a lista de
+registros.
+"""
+from typing import Dict, Any, Optional, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.utils.hierarchy import HierarchyIndex
+from src.utils.long_format import coluna_entidade, PADRAO_QUANTIDADE, PADRAO_VALOR
+
+
+def _somar_linhas(valores: np.ndarray) -> np.ndarray:
+    """
+    Soma as linhas ignorando valores ausentes; anos sem nenhum valor ficam NaN.
+    """
+    soma = np.nansum(valores, axis=0, dtype=np.float64)
+    return np.where(np.isnan(valores).all(axis=0), np.nan, soma)
+
+
+class YearMatrix:
+    """
+    Matriz entidade x ano x medida de uma categoria.
+    """
+
+    def __init__(self, valores: np.ndarray, entidades: np.ndarray, anos: np.ndarray,
+                 medidas: Tuple[str, ...], folha: Optional[np.ndarray] = None, dtype: type = np.float32):
+        """
+        Args:
+            valores: Array de forma (entidades, anos, medidas)
+            entidades: Nomes das entidades, na ordem das linhas do CSV
+            anos: Anos, na ordem das colunas
+            medidas: Nomes das medidas da última dimensão
+            folha: Máscara das linhas que entram em somas (evita dupla contagem)
+            dtype: Tipo dos valores; float32 por padrão, float64 quando a precisão
+                dos valores em US$ importa (ver trade_metrics)
+        """
+        self.valores = np.ascontiguousarray(valores, dtype=dtype)
+        self.entidades = entidades
+        self.anos = anos
+        self.medidas = medidas
+        self.folha = folha if folha is not None else np.ones(len(entidades), dtype=bool)
+        self._por_nome: Dict[str, List[int]] = {}
+        for pos, nome in enumerate(entidades):
+            self._por_nome.setdefault(str(nome).lower(), []).append(pos)
+        self._pos_ano = {int(ano): j for j, ano in enumerate(anos)}
+
+    @classmethod
+    def from_dataframe(cls, df: "pd.DataFrame", hierarquia: Optional[HierarchyIndex] = None,
+                       dtype: type = np.float32) -> Optional["YearMatrix"]:
+        """
+        Materializa a matriz a partir do DataFrame largo do CSV.
+
+        Args:
+            df: DataFrame no formato original
+            hierarquia: Índice hierárquico da categoria, se houver
+            dtype: Tipo dos valores
+
+        Returns:
+            YearMatrix ou None se o DataFrame não tiver entidade ou anos
+        """
+        import pandas as pd
+
+        col_entidade = coluna_entidade(df)
+        colunas_qtd = [col for col in df.columns if PADRAO_QUANTIDADE.match(str(col))]
+        if col_entidade is None or not colunas_qtd:
+            return None
+
+        colunas_valor = {str(col)[:4]: col for col in df.columns if PADRAO_VALOR.match(str(col))}
+        medidas = ("quantidade", "valor") if colunas_valor else ("quantidade",)
+
+        valores = np.full((len(df), len(colunas_qtd), len(medidas)), np.nan, dtype=dtype)
+        valores[:, :, 0] = df[colunas_qtd].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=dtype)
+        if colunas_valor:
+            for j, col in enumerate(colunas_qtd):
+                if str(col) in colunas_valor:
+                    valores[:, j, 1] = pd.to_numeric(df[colunas_valor[str(col)]], errors='coerce').to_numpy(dtype=dtype)
+
+        entidades = df[col_entidade].fillna('').astype(str).str.strip().to_numpy()
+        anos = np.array([int(col) for col in colunas_qtd], dtype=np.int16)
+        folha = hierarquia.folha if hierarquia is not None else None
+        return cls(valores, entidades, anos, medidas, folha, dtype)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Tamanho em bytes do array de valores.
+        """
+        return self.valores.nbytes
+
+    def linhas(self, entidade: str) -> List[int]:
+        """
+        Posições das linhas com o nome informado (sem diferenciar maiúsculas).
+        """
+        return self._por_nome.get(entidade.strip().lower(), [])
+
+    def intervalo_anos(self, ano_inicio: Optional[int] = None, ano_fim: Optional[int] = None) -> slice:
+        """
+        Converte um intervalo de anos (inclusivo) em fatia da dimensão de anos.
+        """
+        inicio = int(np.searchsorted(self.anos, ano_inicio, side='left')) if ano_inicio is not None else 0
+        fim = int(np.searchsorted(self.anos, ano_fim, side='right')) if ano_fim is not None else len(self.anos)
+        return slice(inicio, fim)
+
+    def serie(self, entidade: str, medida: str = "quantidade", anos: slice = slice(None)) -> Optional[np.ndarray]:
+        """
+        Série anual de uma entidade. Nomes repetidos (ex.: "Tinto" em duas
+        categorias) são somados; anos sem valor em nenhuma delas ficam NaN.
+
+        Returns:
+            Array com um valor por ano ou None se a entidade não existir
+        """
+        posicoes = self.linhas(entidade)
+        if not posicoes:
+            return None
+        k = self.medidas.index(medida)
+        if len(posicoes) == 1:
+            return self.valores[posicoes[0], anos, k]
+        return _somar_linhas(self.valores[posicoes, anos, k])
+
+    def soma(self, medida: str = "quantidade", anos: slice = slice(None)) -> np.ndarray:
+        """
+        Soma anual sobre todas as entidades folha (NaN nos anos sem nenhum valor).
+        """
+        k = self.medidas.index(medida)
+        return _somar_linhas(self.valores[self.folha, anos, k])
+
+    def ano(self, ano: int, medida: str = "quantidade") -> Optional[np.ndarray]:
+        """
+        Valores de todas as entidades em um único ano.
+
+        Returns:
+            Array com um valor por entidade ou None se o ano não existir
+        """
+        j = self._pos_ano.get(int(ano))
+        if j is None:
+            return None
+        return self.valores[:, j, self.medidas.index(medida)]
+
+    def resumo(self) -> Dict[str, Any]:
+        """
+        Metadados da matriz (dimensões e tamanho).
+        """
+        return {
+            "entidades": len(self.entidades),
+            "anos": [int(self.anos[0]), int(self.anos[-1])] if len(self.anos) else [],
+            "medidas": list(self.medidas),
+            "bytes": self.nbytes,
+        }